@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import importlib
+import time
+
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_text
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+from ansible.utils.vars import merge_hash
+
+try:
+    from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+    HAS_ARG_SPEC_VALIDATOR = True
+except ImportError:
+    HAS_ARG_SPEC_VALIDATOR = False
+
+display = Display()
+
+MODULE_PACKAGE = 'ansible_collections.haught.apcos.plugins.modules.%s'
+
+# Seconds a configuration snapshot from apcos_facts is diffed against
+DEFAULT_MAX_AGE = 300
+
+# Modules whose src option is a template rendered on the controller
+TEMPLATE_MODULES = ('apcos_config_lines',)
+
+# Options handled by the module itself on the device side
+MODULE_ONLY_OPTIONS = ('plan_path', 'fingerprint_path', 'connection_stats')
+
+
+class CacheMiss(Exception):
+    pass
+
+
+class CachedConnection(object):
+    """Stands in for the device connection, any use of it is a cache miss"""
+
+    def __getattr__(self, name):
+        raise CacheMiss('%s needs the device' % name)
+
+
+class ControllerModule(object):
+    """The parts of AnsibleModule used by build_commands(), on the controller
+
+    The configuration sources are answered from the snapshot through the
+    same device_configs cache get_config() fills on the device.
+    """
+
+    def __init__(self, name, params, configs, check_mode):
+        self._name = name
+        self.params = params
+        self.check_mode = check_mode
+        self.device_configs = dict(configs)
+        self.apcos_connection = CachedConnection()
+
+    def fail_json(self, msg, **kwargs):
+        # let the module run on the device and report it
+        raise CacheMiss(msg)
+
+    def warn(self, warning):
+        raise CacheMiss(warning)
+
+
+class ActionModule(ActionBase):
+    """Diff the apcos configuration modules on the controller
+
+    When the host has a configuration snapshot from apcos_facts younger
+    than ansible_apcos_config_max_age seconds, the module's own
+    build_commands() runs here against the snapshot. A task with nothing
+    to change, or any task in check mode, returns without starting the
+    module. Otherwise the module runs as usual and the sources of the
+    commands it pushed are dropped from the snapshot, as they are no
+    longer current.
+
+    The src template of apcos_config_lines is rendered here as well.
+    """
+
+    def run(self, tmp=None, task_vars=None):
+        self._supports_check_mode = True
+        self._supports_async = True
+
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        task_vars = task_vars or {}
+        name = self._task.action.split('.')[-1]
+        if name in TEMPLATE_MODULES and self._task.args.get('src'):
+            try:
+                self._template_src()
+            except (AnsibleError, IOError, OSError) as exc:
+                result.update(failed=True, msg=to_text(exc))
+                return result
+        wrap_async = self._task.async_val and not self._connection.has_native_async
+
+        configs = None if wrap_async else self._cached_configs(task_vars)
+        if configs is not None:
+            try:
+                commands = self._controller_commands(name, configs)
+            except CacheMiss as exc:
+                display.vvv('%s: diffing on the device, %s' % (name, exc), host=self._play_context.remote_addr)
+            else:
+                if not commands or self._play_context.check_mode:
+                    result.update(changed=bool(commands), commands=commands)
+                    return result
+
+        result = merge_hash(result, self._execute_module(task_vars=task_vars, wrap_async=wrap_async))
+
+        if configs is not None and result.get('changed'):
+            sources = set(command.split()[0] for command in result.get('commands', []))
+            configs = dict((key, value) for key, value in configs.items() if key.split()[0] not in sources)
+            result['ansible_facts'] = merge_hash(result.get('ansible_facts', {}), {'ansible_net_config': configs})
+
+        if not wrap_async:
+            self._remove_tmp_path(self._connection._shell.tmpdir)
+
+        return result
+
+    def _template_src(self):
+        path = self._find_needle('templates', self._task.args['src'])
+        with open(path) as f:
+            self._task.args['src'] = self._templar.template(to_text(f.read()))
+
+    def _cached_configs(self, task_vars):
+        if not HAS_ARG_SPEC_VALIDATOR:
+            return None
+        if any(self._task.args.get(option) for option in MODULE_ONLY_OPTIONS):
+            return None
+        facts = task_vars.get('ansible_facts') or {}
+        configs = facts.get('net_config')
+        taken = facts.get('net_config_time')
+        if not isinstance(configs, dict) or not taken:
+            return None
+        max_age = int(self._templar.template(task_vars.get('ansible_apcos_config_max_age', DEFAULT_MAX_AGE)))
+        if time.time() - float(taken) > max_age:
+            display.vvv('configuration snapshot is older than %d seconds' % max_age, host=self._play_context.remote_addr)
+            return None
+        return configs
+
+    def _controller_commands(self, name, configs):
+        module = importlib.import_module(MODULE_PACKAGE % name)
+        validator = ArgumentSpecValidator(
+            module.ARGUMENT_SPEC,
+            mutually_exclusive=getattr(module, 'MUTUALLY_EXCLUSIVE', None),
+            required_by=getattr(module, 'REQUIRED_BY', None),
+            required_one_of=getattr(module, 'REQUIRED_ONE_OF', None),
+        )
+        validated = validator.validate(self._task.args)
+        if validated.error_messages:
+            raise CacheMiss('; '.join(validated.error_messages))
+        controller = ControllerModule(name, validated.validated_parameters, configs, self._play_context.check_mode)
+        if hasattr(module, 'check_params'):
+            module.check_params(controller)
+        return module.build_commands(controller)
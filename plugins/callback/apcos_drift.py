@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+author: "Matt Haught (@haught)"
+name: apcos_drift
+type: aggregate
+short_description: Collect apcos_drift results into a JSONL file
+description:
+  - Appends one JSON line per host to a file as the results of the
+    C(haught.apcos.apcos_drift) module come in, and prints a summary of
+    the drifted hosts at the end of the play.
+  - Failed and unreachable hosts are recorded with their error so the
+    file covers the whole fleet.
+requirements:
+  - enable in configuration
+options:
+  output_path:
+    description:
+      - Path of the JSONL file the results are appended to.
+    type: path
+    default: ~/.ansible/apcos_drift.jsonl
+    env:
+      - name: APCOS_DRIFT_OUTPUT
+    ini:
+      - section: callback_apcos_drift
+        key: output_path
+'''
+
+import json
+import os
+from datetime import datetime, timezone
+
+from ansible.module_utils._text import to_bytes
+from ansible.plugins.callback import CallbackBase
+
+MODULE = 'apcos_drift'
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'haught.apcos.apcos_drift'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self._output = None
+        self._hosts = 0
+        self._drifted = 0
+        self._failed = 0
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CallbackModule, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+        path = os.path.expanduser(self.get_option('output_path'))
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._output = open(to_bytes(path, errors='surrogate_or_strict'), 'a')
+
+    def _write(self, result, record):
+        if result._task.action.split('.')[-1] != MODULE:
+            return False
+        record.update({
+            'host': result._host.get_name(),
+            'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        })
+        self._output.write(json.dumps(record, sort_keys=True) + '\n')
+        self._output.flush()
+        self._hosts += 1
+        return True
+
+    def v2_runner_on_ok(self, result):
+        record = dict((key, result._result.get(key)) for key in ('drift', 'drifted', 'score'))
+        if self._write(result, record) and record['drifted']:
+            self._drifted += 1
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        if self._write(result, {'failed': True, 'msg': result._result.get('msg')}):
+            self._failed += 1
+
+    def v2_runner_on_unreachable(self, result):
+        if self._write(result, {'unreachable': True, 'msg': result._result.get('msg')}):
+            self._failed += 1
+
+    def v2_playbook_on_stats(self, stats):
+        if self._hosts:
+            self._display.display('APC drift: %d hosts checked, %d drifted, %d failed' % (
+                self._hosts, self._drifted, self._failed))
+        if self._output:
+            self._output.close()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+author: "Matt Haught (@haught)"
+name: apcos_timing
+type: aggregate
+short_description: Record where the time of apcos tasks goes
+description:
+  - Appends one record per host and task of every C(haught.apcos) module
+    to a JSONL or CSV file as the results come in. A record holds the
+    task duration and, from the I(apcos_timing) result of the module, the
+    seconds spent logging in, fetching the capabilities, reading sources,
+    pushing commands and running commands.
+  - Prints the slowest cards and commands of the run at the end of the
+    playbook.
+  - Sets the C(APCOS_TIMING) environment variable, which has the modules
+    time their runs. Without it they do not fetch the counters of the
+    connection for the timings.
+requirements:
+  - enable in configuration
+options:
+  output_path:
+    description:
+      - Path of the file the records are appended to.
+    type: path
+    default: ~/.ansible/apcos_timing.jsonl
+    env:
+      - name: APCOS_TIMING_OUTPUT
+    ini:
+      - section: callback_apcos_timing
+        key: output_path
+  output_format:
+    description:
+      - Format of the records. CSV leaves out the breakdown by command.
+    type: str
+    choices: ['jsonl', 'csv']
+    default: jsonl
+    env:
+      - name: APCOS_TIMING_FORMAT
+    ini:
+      - section: callback_apcos_timing
+        key: output_format
+  top:
+    description:
+      - Number of cards and commands listed in the summary.
+    type: int
+    default: 10
+    env:
+      - name: APCOS_TIMING_TOP
+    ini:
+      - section: callback_apcos_timing
+        key: top
+'''
+
+import csv
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from ansible.module_utils._text import to_bytes
+from ansible.plugins.callback import CallbackBase
+
+PREFIX = 'apcos_'
+
+FIELDS = ('timestamp', 'host', 'module', 'task', 'status', 'duration', 'connect', 'capabilities',
+          'reads', 'read_time', 'writes', 'write_time', 'commands', 'command_time', 'total')
+
+# Parts of a run summed up in the summary
+PHASES = ('connect', 'capabilities', 'read_time', 'write_time', 'command_time')
+
+# Read by the modules, which only time their runs when it is set
+TIMING_ENV = 'APCOS_TIMING'
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'haught.apcos.apcos_timing'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self._output = None
+        self._csv = None
+        self._started = {}
+        self._records = 0
+        self._hosts = {}
+        self._commands = {}
+        self._phases = dict((phase, 0.0) for phase in PHASES)
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CallbackModule, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+        # the workers and the modules they start inherit the environment
+        os.environ[TIMING_ENV] = '1'
+        path = os.path.expanduser(self.get_option('output_path'))
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        if self.get_option('output_format') == 'csv':
+            new = not os.path.exists(path) or not os.path.getsize(path)
+            self._output = open(to_bytes(path, errors='surrogate_or_strict'), 'a', newline='')
+            self._csv = csv.DictWriter(self._output, FIELDS, extrasaction='ignore')
+            if new:
+                self._csv.writeheader()
+        else:
+            self._output = open(to_bytes(path, errors='surrogate_or_strict'), 'a')
+
+    def _record(self, result, status, duration=None):
+        module = result._task.action.split('.')[-1]
+        if not module.startswith(PREFIX):
+            return
+        host = result._host.get_name()
+        timing = result._result.get('apcos_timing') or {}
+        record = {
+            'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'host': host,
+            'module': module,
+            'task': result._task.get_name(),
+            'status': status,
+            'duration': round(duration, 4) if duration is not None else None,
+            'connect': timing.get('connect'),
+            'capabilities': timing.get('capabilities'),
+            'total': timing.get('total'),
+        }
+        for key, prefix in (('reads', 'read'), ('writes', 'write'), ('commands', 'command')):
+            entry = timing.get(key) or {}
+            record[key] = entry.get('count')
+            record[prefix + '_time'] = entry.get('time')
+        if self._csv:
+            self._csv.writerow(record)
+        else:
+            record['per_command'] = timing.get('per_command', {})
+            self._output.write(json.dumps(record, sort_keys=True) + '\n')
+        self._output.flush()
+
+        self._records += 1
+        card = self._hosts.setdefault(host, {'tasks': 0, 'time': 0.0})
+        card['tasks'] += 1
+        card['time'] += duration if duration is not None else timing.get('total') or 0.0
+        for phase in PHASES:
+            self._phases[phase] += record[phase] or 0.0
+        for name, entry in timing.get('per_command', {}).items():
+            command = self._commands.setdefault(name, {'count': 0, 'time': 0.0})
+            command['count'] += entry['count']
+            command['time'] += entry['time']
+
+    def _duration(self, result):
+        start = self._started.pop((result._host.get_name(), result._task._uuid), None)
+        return time.time() - start if start is not None else None
+
+    def v2_runner_on_start(self, host, task):
+        self._started[(host.get_name(), task._uuid)] = time.time()
+
+    def v2_runner_on_ok(self, result):
+        duration = self._duration(result)
+        # the items of a loop are recorded one by one
+        if isinstance(result._result.get('results'), list):
+            return
+        self._record(result, 'changed' if result._result.get('changed') else 'ok', duration)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        duration = self._duration(result)
+        if isinstance(result._result.get('results'), list):
+            return
+        self._record(result, 'failed', duration)
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, 'unreachable', self._duration(result))
+
+    def v2_runner_on_skipped(self, result):
+        self._duration(result)
+
+    def v2_runner_item_on_ok(self, result):
+        self._record(result, 'changed' if result._result.get('changed') else 'ok')
+
+    def v2_runner_item_on_failed(self, result):
+        self._record(result, 'failed')
+
+    def v2_playbook_on_stats(self, stats):
+        if self._records:
+            self._display.display('APC timing: %d tasks on %d cards, %s' % (
+                self._records, len(self._hosts),
+                ', '.join('%s %.1fs' % (phase.replace('_time', ''), self._phases[phase]) for phase in PHASES)))
+            top = self.get_option('top')
+            self._display.display('Slowest cards:')
+            for host, card in sorted(self._hosts.items(), key=lambda item: -item[1]['time'])[:top]:
+                self._display.display('  %-30s %8.2fs %4d tasks' % (host, card['time'], card['tasks']))
+            if self._commands:
+                self._display.display('Slowest commands:')
+                for name, command in sorted(self._commands.items(), key=lambda item: -item[1]['time'])[:top]:
+                    self._display.display('  %-30s %8.2fs %6d sent %6.3fs avg' % (
+                        name, command['time'], command['count'], command['time'] / command['count']))
+        if self._output:
+            self._output.close()
@@ -27,57 +27,245 @@ short_description: Use apcos cliconf to run command on APC OS devices
 description:
   - This apcos plugin provides low level abstraction apis for
     sending and receiving CLI commands from APC OS devices.
+options:
+  cache_ttl:
+    description:
+      - Number of seconds the output of read-only commands is kept by the
+        persistent connection and reused by later reads, including reads
+        of later tasks. C(0) disables the cache.
+      - The cache is cleared by every configuration change and by every
+        command that is not known to be read-only.
+    type: int
+    default: 0
+    env:
+      - name: ANSIBLE_APCOS_CACHE_TTL
+    vars:
+      - name: ansible_apcos_cache_ttl
+  cache_size:
+    description:
+      - Maximum number of command outputs kept in the cache. The least
+        recently used output is dropped first.
+    type: int
+    default: 32
+    env:
+      - name: ANSIBLE_APCOS_CACHE_SIZE
+    vars:
+      - name: ansible_apcos_cache_size
+  record_path:
+    description:
+      - Path of a transcript file on the controller. Every command sent to
+        the device is appended to it as a JSON line with the prompt, the
+        answer, the output and the time it took, for offline replay with
+        C(tests/perf/replay.py).
+      - The transcript holds ALL commands and output, including passwords.
+        Only use it against lab devices.
+    type: path
+    env:
+      - name: ANSIBLE_APCOS_RECORD_PATH
+    vars:
+      - name: ansible_apcos_record_path
 '''
 
-import re
 import json
+import shlex
+import time
+from collections import OrderedDict
 
 from ansible.module_utils._text import to_text
-from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import to_list
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import parse_device_info
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.utils import to_list
 from ansible.plugins.cliconf import CliconfBase
 
 
+# Sources that get_config() reads
+CONFIG_SOURCES = ('boot', 'cipher', 'console', 'date', 'dns', 'eapol',
+                  'email', 'firewall', 'ftp', 'ntp', 'portspeed', 'prompt',
+                  'radius', 'session', 'smtp', 'snmp', 'snmptrap', 'snmpv3',
+                  'system', 'tcpip', 'tcpip6', 'user', 'userdflt', 'web')
+
+# Sources that change on their own, always read from the device
+LIVE_SOURCES = ('session',)
+
+# Commands that get() may answer from the cache when sent without arguments
+READ_ONLY_COMMANDS = CONFIG_SOURCES + ('about', 'detstatus', 'upsabout')
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
 class Cliconf(CliconfBase):
 
-    def get_device_info(self):
-        device_info = {}
+    __rpc__ = CliconfBase.__rpc__ + ['get_configs', 'get_stats']
+
+    def __init__(self, *args, **kwargs):
+        super(Cliconf, self).__init__(*args, **kwargs)
+        self._cache = OrderedDict()
+        self._stats = {
+            'commands': 0,
+            'bytes_read': 0,
+            'command_time': 0.0,
+            'prompt_time': 0.0,
+            'timeouts': 0,
+            'errors': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'connects': 0,
+            'connect_time': 0.0,
+            'last_connect': None,
+            'latency': [0] * (len(LATENCY_BUCKETS) + 1),
+            'per_command': {},
+        }
+        self._mark = {}
+
+    def _record(self, command, elapsed, prompt, out=None, exc=None):
+        stats = self._stats
+        stats['commands'] += 1
+        stats['command_time'] += elapsed
+        if prompt is not None:
+            stats['prompt_time'] += elapsed
+        if out is not None:
+            stats['bytes_read'] += len(out)
+        if exc is not None:
+            stats['errors'] += 1
+            if 'timeout' in to_text(exc).lower():
+                stats['timeouts'] += 1
+        bucket = len(LATENCY_BUCKETS)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                bucket = index
+                break
+        stats['latency'][bucket] += 1
+
+        # only the command name is kept, arguments may hold secrets
+        name = to_text(command).split(' ', 1)[0] if command else ''
+        entry = stats['per_command'].setdefault(name, {'count': 0, 'time': 0.0, 'max': 0.0})
+        entry['count'] += 1
+        entry['time'] += elapsed
+        entry['max'] = max(entry['max'], elapsed)
 
-        device_info['network_os'] = 'apcos'
-        reply = self.get('about')
-        data = to_text(reply, errors='surrogate_or_strict').strip()
+    def _ensure_connected(self):
+        # log in here rather than inside the first command, so the login
+        # is not counted as command time
+        if getattr(self._connection, '_connected', True):
+            return
+        start = time.time()
+        self._connection._connect()
+        end = time.time()
+        self._stats['connects'] += 1
+        self._stats['connect_time'] += end - start
+        self._stats['last_connect'] = {'at': end, 'time': end - start}
 
-        match = re.search(r'Hardware Revision:\s+(\S+)', data)
-        if match:
-            device_info['network_os_version'] = match.group(1)
+    def send_command(self, command=None, prompt=None, answer=None, sendonly=False, newline=True,
+                     prompt_retry_check=False, check_all=False):
+        self._ensure_connected()
+        start = time.time()
+        try:
+            out = super(Cliconf, self).send_command(command=command, prompt=prompt, answer=answer, sendonly=sendonly,
+                                                    newline=newline, prompt_retry_check=prompt_retry_check,
+                                                    check_all=check_all)
+        except Exception as exc:
+            elapsed = time.time() - start
+            self._record(command, elapsed, prompt, exc=exc)
+            self._record_transcript(command, prompt, answer, elapsed, exc=exc)
+            raise
+        elapsed = time.time() - start
+        self._record(command, elapsed, prompt, out=out)
+        self._record_transcript(command, prompt, answer, elapsed, out=out)
+        return out
 
-        match = re.search(r'^Model Number:\s+(\S+)', data, re.M)
-        if match:
-            device_info['network_os_model'] = match.group(1)
+    # Counters since the connection was opened. Times are in seconds, latency
+    # counts the commands per LATENCY_BUCKETS bucket plus one for slower ones.
+    # With mark set, since_mark holds the commands sent since the previous
+    # call with mark set, so a task gets its share from a single call.
+    def get_stats(self, mark=False):
+        stats = dict(self._stats)
+        stats['latency_buckets'] = list(LATENCY_BUCKETS)
+        stats['cached'] = len(self._cache)
+        if mark:
+            stats['since_mark'] = {}
+            for name, entry in self._stats['per_command'].items():
+                prior = self._mark.get(name, {'count': 0, 'time': 0.0})
+                if entry['count'] > prior['count']:
+                    stats['since_mark'][name] = {'count': entry['count'] - prior['count'],
+                                                 'time': entry['time'] - prior['time']}
+            self._mark = dict((name, dict(entry)) for name, entry in self._stats['per_command'].items())
+        return stats
 
-        reply = self.get('dns')
-        data = to_text(reply, errors='surrogate_or_strict').strip()
+    def _get_option(self, option, default=None):
+        try:
+            value = self.get_option(option)
+        except KeyError:
+            return default
+        return default if value is None else value
 
-        match = re.search(r'^Host Name:\s+(\S+)', data, re.M)
-        if match:
-            device_info['network_os_hostname'] = match.group(1)
+    def _cache_option(self, option):
+        return self._get_option(option, 0)
 
-        return device_info
+    def _record_transcript(self, command, prompt, answer, elapsed, out=None, exc=None):
+        path = self._get_option('record_path')
+        if not path:
+            return
+        entry = {
+            'command': to_text(command),
+            'prompt': [to_text(item) for item in prompt] if isinstance(prompt, list) else prompt and to_text(prompt),
+            'answer': [to_text(item) for item in answer] if isinstance(answer, list) else answer and to_text(answer),
+            'elapsed': round(elapsed, 4),
+        }
+        if exc is not None:
+            entry['error'] = to_text(exc)
+        else:
+            entry['output'] = to_text(out, errors='surrogate_or_strict')
+        with open(path, 'a') as f:
+            f.write(json.dumps(entry, sort_keys=True) + '\n')
+
+    def _cached_command(self, command):
+        ttl = self._cache_option('cache_ttl')
+        if ttl <= 0 or command in LIVE_SOURCES:
+            return self.send_command(command)
+
+        now = time.time()
+        entry = self._cache.pop(command, None)
+        if entry is not None and now - entry[0] < ttl:
+            self._cache[command] = entry
+            self._stats['cache_hits'] += 1
+            return entry[1]
+        self._stats['cache_misses'] += 1
+
+        out = self.send_command(command)
+        self._cache[command] = (now, out)
+        while len(self._cache) > max(self._cache_option('cache_size'), 1):
+            self._cache.popitem(last=False)
+        return out
+
+    def invalidate_cache(self):
+        self._cache.clear()
+
+    def get_device_info(self):
+        about = to_text(self.get('about'), errors='surrogate_or_strict').strip()
+        dns = to_text(self.get('dns'), errors='surrogate_or_strict').strip()
+        return parse_device_info(about, dns)
 
     def get_config(self, source='date', flags=None):
-        if source not in ('boot', 'cipher', 'console', 'date', 'dns', 'eapol',
-                          'email', 'firewall', 'ftp', 'ntp', 'portspeed', 'prompt',
-                          'radius', 'session', 'smtp', 'snmp', 'snmptrap', 'snmpv3',
-                          'system', 'tcpip', 'tcpip6', 'user', 'userdflt', 'web'):
+        if source not in CONFIG_SOURCES:
             raise ValueError("fetching configuration from %s is not supported" % source)
         cmd = source
 
         flags = [] if flags is None else flags
-        cmd += ' '.join(flags)
+        cmd += ' ' + ' '.join(flags)
         cmd = cmd.strip()
 
-        return self.send_command(cmd)
+        return self._cached_command(cmd)
+
+    def get_configs(self, sources):
+        responses = []
+        for source in to_list(sources):
+            # quoted flags such as user names with spaces stay one flag
+            parts = shlex.split(source, posix=False)
+            responses.append(self.get_config(source=parts[0], flags=parts[1:]))
+        return responses
 
     def edit_config(self, command):
+        self.invalidate_cache()
         for cmd in to_list(command):
             if isinstance(cmd, dict):
                 command = cmd['command']
@@ -92,8 +280,15 @@ class Cliconf(CliconfBase):
                 self.send_command(command=command, prompt=prompt, answer=answer, sendonly=False, newline=newline)
 
     def get(self, command, prompt=None, answer=None, sendonly=False, newline=True, check_all=False):
+        if prompt is None and answer is None and not sendonly and command.strip() in READ_ONLY_COMMANDS:
+            return self._cached_command(command.strip())
+        self.invalidate_cache()
         return self.send_command(command=command, prompt=prompt, answer=answer, sendonly=sendonly, newline=newline, check_all=check_all)
 
+    def run_commands(self, commands=None, check_rc=True):
+        self.invalidate_cache()
+        return super(Cliconf, self).run_commands(commands=commands, check_rc=check_rc)
+
     def get_capabilities(self):
         result = super(Cliconf, self).get_capabilities()
         return json.dumps(result)
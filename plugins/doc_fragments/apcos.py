@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+
+    DOCUMENTATION = r'''
+options:
+  plan_path:
+    description:
+      - Path on the controller of a plan file for this task. Use a
+        separate file per device.
+      - In check mode the commands are written to the plan together
+        with a fingerprint of every source read to build them. The
+        secrets of the task are masked in the stored commands.
+      - In a normal run with an existing plan, the sources are read again
+        in one batch and the planned commands are pushed without being
+        rebuilt, with the secrets filled in from the task. The run fails
+        if the task or a source changed since the plan was written. The
+        plan is removed once it has passed these checks.
+    type: path
+  fingerprint_path:
+    description:
+      - Path on the controller of a fingerprint file for this task. Use a
+        separate file per device.
+      - When a run finds nothing to change, a fingerprint of the task
+        options and of every source it read is saved to this file. The
+        next run with the same options only reads those sources and, if
+        none of them changed, returns without parsing or comparing them.
+      - Not used when I(forcepwchange) is set.
+    type: path
+  connection_stats:
+    description:
+      - Return the counters of the persistent connection to the device as
+        I(connection_stats).
+    type: bool
+    default: false
+'''
+
+    SNMP = r'''
+options:
+  snmp:
+    description:
+      - Read the values that have an SNMP object with SNMP GET requests
+        instead of the CLI. Anything that cannot be read over SNMP is
+        read from the CLI, as is everything when the card does not
+        answer.
+      - Requires the pysnmp python library.
+    type: dict
+    suboptions:
+      host:
+        description:
+          - Address of the SNMP agent. Defaults to the host the CLI
+            connection logs in to.
+        type: str
+      port:
+        description:
+          - UDP port of the SNMP agent.
+        type: int
+        default: 161
+      community:
+        description:
+          - Community with read access.
+        type: str
+        required: true
+      version:
+        description:
+          - SNMP version of the requests.
+        type: str
+        choices: ['v1', 'v2c']
+        default: v2c
+      timeout:
+        description:
+          - Seconds to wait for a response.
+        type: float
+        default: 1
+      retries:
+        description:
+          - Number of times a request is retried.
+        type: int
+        default: 1
+'''
+
+    SECRET_STORE = r'''
+options:
+  secret_store:
+    description:
+      - Path on the controller of a file that keeps salted hashes of the
+        secrets last applied to this device. Use a separate file per device.
+      - When set, a secret is also pushed when it differs from the one last
+        applied, so I(forcepwchange) is not needed to change it. Secrets
+        that have not been applied with the store yet are pushed once.
+    type: path
+'''
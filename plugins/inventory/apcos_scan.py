@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+author: "Matt Haught (@haught)"
+name: apcos_scan
+short_description: Discover APC network management cards by scanning networks
+description:
+  - Scans the configured networks for APC UPS network management cards
+    and adds every card found as a host, set up for the
+    C(ansible.netcommon.network_cli) connection and the apcos modules.
+  - The addresses are probed concurrently, at most I(concurrency) at a
+    time. With the C(banner) probe a card is recognised by the banner of
+    its SSH server. The C(about) probe checks the banner the same way
+    first, then logs in to the hosts that passed, runs C(about) and C(dns)
+    once and keeps the cards whose output looks like an NMC, which also
+    sets the model, firmware and host name variables.
+  - The C(about) probe sends I(username) and I(password) to every host
+    whose banner matches I(banner_patterns). Without I(known_hosts) the
+    host keys are not checked, as cards found for the first time are not
+    known yet, so a host in the scanned networks that answers with a
+    matching banner receives the credentials. Set I(known_hosts) to
+    only log in to cards whose key is known.
+  - Enable the inventory cache to keep the scan results for
+    I(cache_timeout) seconds, so repeated inventory loads do not scan.
+  - The inventory file name must end with C(apcos_scan.yml) or
+    C(apcos_scan.yaml).
+requirements:
+  - python >= 3.6
+  - asyncssh for the C(about) probe
+extends_documentation_fragment:
+  - constructed
+  - inventory_cache
+options:
+  plugin:
+    description: Token that ensures this is a source file for this plugin.
+    required: true
+    choices: ['haught.apcos.apcos_scan']
+  networks:
+    description:
+      - Networks to scan in CIDR notation, or single addresses.
+    type: list
+    elements: str
+    required: true
+  exclude:
+    description:
+      - Addresses or networks in CIDR notation left out of the scan.
+    type: list
+    elements: str
+    default: []
+  port:
+    description:
+      - SSH port of the cards.
+    type: int
+    default: 22
+  timeout:
+    description:
+      - Seconds a probe of one address may take, including the login of
+        the C(about) probe.
+    type: float
+    default: 10
+  concurrency:
+    description:
+      - Maximum number of addresses probed at the same time.
+    type: int
+    default: 64
+  probe:
+    description:
+      - How cards are recognised, see the description.
+    type: str
+    choices: ['banner', 'about']
+    default: banner
+  banner_patterns:
+    description:
+      - Regular expressions matched against the SSH banner by the
+        C(banner) probe. A card is recognised if any of them matches.
+    type: list
+    elements: str
+    default: ['cryptlib', 'APC']
+  username:
+    description:
+      - User name for the C(about) probe.
+    type: str
+    env:
+      - name: ANSIBLE_NET_USERNAME
+  password:
+    description:
+      - Password for the C(about) probe.
+      - I(username) and I(password) may be templates, for example a
+        lookup.
+    type: str
+    env:
+      - name: ANSIBLE_NET_PASSWORD
+  known_hosts:
+    description:
+      - Path of a known hosts file the host keys of the C(about) probe
+        are checked against. Cards whose key is not in it are skipped.
+      - If not set, host keys are not checked.
+    type: path
+  hostnames:
+    description:
+      - Name of the hosts. C(hostname) uses the host name of the card when
+        the C(about) probe found one and no other card has it, and the
+        address otherwise.
+    type: str
+    choices: ['address', 'hostname']
+    default: address
+'''
+
+EXAMPLES = '''
+# apcos_scan.yml
+plugin: haught.apcos.apcos_scan
+networks:
+  - 10.20.0.0/24
+  - 10.21.0.0/23
+exclude:
+  - 10.20.0.1
+probe: about
+username: apc
+password: "{{ lookup('env', 'APC_PASSWORD') }}"
+hostnames: hostname
+keyed_groups:
+  - key: apcos_model
+    prefix: model
+cache: true
+cache_plugin: jsonfile
+cache_connection: ~/.ansible/apcos_scan
+cache_timeout: 86400
+'''
+
+import asyncio
+import ipaddress
+import re
+
+from ansible.errors import AnsibleParserError
+from ansible.module_utils._text import to_native, to_text
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import parse_device_info
+
+try:
+    import asyncssh
+    HAS_ASYNCSSH = True
+except ImportError:
+    HAS_ASYNCSSH = False
+
+PROMPT_RE = re.compile(r'apc>\s*$')
+
+# Host variables set from the device information of the about probe
+DEVICE_INFO_VARS = {
+    'network_os_firmware': 'apcos_firmware',
+    'network_os_hostname': 'apcos_hostname',
+    'network_os_model': 'apcos_model',
+    'network_os_version': 'apcos_hardware_revision',
+}
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = 'haught.apcos.apcos_scan'
+
+    def verify_file(self, path):
+        if super(InventoryModule, self).verify_file(path):
+            return path.endswith(('apcos_scan.yml', 'apcos_scan.yaml'))
+        return False
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option('cache') and cache
+        update_cache = self.get_option('cache') and not cache
+
+        cards = None
+        if use_cache:
+            try:
+                cards = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+        if cards is None:
+            cards = self._scan()
+        if update_cache:
+            self._cache[cache_key] = cards
+
+        self._populate(cards)
+
+    def _addresses(self):
+        try:
+            excluded = [ipaddress.ip_network(to_text(network), strict=False) for network in self.get_option('exclude')]
+            addresses = []
+            for network in self.get_option('networks'):
+                network = ipaddress.ip_network(to_text(network), strict=False)
+                hosts = list(network.hosts()) if network.num_addresses > 2 else list(network)
+                addresses.extend(address for address in hosts if not any(address in net for net in excluded))
+        except ValueError as exc:
+            raise AnsibleParserError('invalid network: %s' % to_native(exc))
+        return sorted(set(addresses))
+
+    def _credential(self, option):
+        value = self.get_option(option)
+        if value and self.templar.is_template(value):
+            value = self.templar.template(value)
+        return value
+
+    def _scan(self):
+        if self.get_option('probe') == 'about':
+            if not HAS_ASYNCSSH:
+                raise AnsibleParserError('the about probe requires the asyncssh python library')
+            self._credentials = (self._credential('username'), self._credential('password'))
+        addresses = [str(address) for address in self._addresses()]
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(self._probe_all(addresses))
+        finally:
+            loop.close()
+        return [card for card in results if card]
+
+    async def _probe_all(self, addresses):
+        semaphore = asyncio.Semaphore(max(self.get_option('concurrency'), 1))
+        probe = self._probe_about if self.get_option('probe') == 'about' else self._probe_banner
+
+        async def bounded(address):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(probe(address), self.get_option('timeout'))
+                except (asyncio.TimeoutError, OSError, EOFError):
+                    return None
+                except Exception as exc:
+                    self.display.vvv('apcos_scan: %s: %s' % (address, to_native(exc)))
+                    return None
+
+        return await asyncio.gather(*(bounded(address) for address in addresses))
+
+    async def _probe_banner(self, address):
+        reader, writer = await asyncio.open_connection(address, self.get_option('port'))
+        try:
+            banner = to_text(await reader.readline(), errors='surrogate_then_replace').strip()
+        finally:
+            writer.close()
+        if not any(re.search(pattern, banner) for pattern in self.get_option('banner_patterns')):
+            return None
+        return {'address': address, 'banner': banner}
+
+    async def _probe_about(self, address):
+        # the credentials only go to hosts that look like a card
+        if await self._probe_banner(address) is None:
+            return None
+        username, password = self._credentials
+        conn = await asyncssh.connect(address, port=self.get_option('port'), username=username, password=password,
+                                      known_hosts=self.get_option('known_hosts') or None)
+        try:
+            process = await conn.create_process(term_type='vt100')
+            await self._read_prompt(process)
+            outputs = []
+            for command in ('about', 'dns'):
+                process.stdin.write(command + '\r')
+                outputs.append(await self._read_prompt(process))
+            process.stdin.write('exit\r')
+        finally:
+            conn.close()
+        device_info = parse_device_info(*outputs)
+        if 'network_os_model' not in device_info:
+            return None
+        card = {'address': address, 'banner': conn.get_extra_info('server_version')}
+        card.update(device_info)
+        return card
+
+    async def _read_prompt(self, process):
+        output = ''
+        while not PROMPT_RE.search(output[-256:]):
+            data = await process.stdout.read(4096)
+            if not data:
+                raise EOFError('connection closed before the prompt')
+            output += data
+        return output.replace('\r', '')
+
+    def _populate(self, cards):
+        strict = self.get_option('strict')
+        by_hostname = self.get_option('hostnames') == 'hostname'
+        hostnames = [card.get('network_os_hostname') for card in cards]
+        for card in cards:
+            name = card['address']
+            hostname = card.get('network_os_hostname')
+            if by_hostname and hostname and hostnames.count(hostname) == 1:
+                name = hostname
+            self.inventory.add_host(name)
+            variables = {
+                'ansible_host': card['address'],
+                'ansible_port': self.get_option('port'),
+                'ansible_connection': 'ansible.netcommon.network_cli',
+                'ansible_network_os': 'haught.apcos.apcos',
+                'apcos_banner': card.get('banner'),
+            }
+            for key, var in DEVICE_INFO_VARS.items():
+                if key in card:
+                    variables[var] = card[key]
+            for var, value in variables.items():
+                self.inventory.set_variable(name, var, value)
+            self._set_composite_vars(self.get_option('compose'), variables, name, strict=strict)
+            self._add_host_to_composed_groups(self.get_option('groups'), variables, name, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option('keyed_groups'), variables, name, strict=strict)
@@ -29,11 +29,35 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+import binascii
+import hashlib
 import json
+import os
 import re
-from ansible.module_utils._text import to_text
-from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import to_list
-from ansible.module_utils.connection import Connection
+import tempfile
+import time
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.six import string_types
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.utils import to_list
+from ansible.module_utils.connection import Connection, ConnectionError
+
+apcos_argument_spec = dict(
+    plan_path=dict(type='path'),
+    fingerprint_path=dict(type='path'),
+    connection_stats=dict(type='bool', default=False),
+)
+
+# Options that choose how the device is read, left out of fingerprints
+TRANSPORT_KEYS = ('snmp',)
+
+# Stands in for the secrets of a task in the commands of a plan
+SECRET_PLACEHOLDER = '<secret:%d>'
+
+# Keys whose values change on every read and are left out of fingerprints
+VOLATILE_KEYS = ('datetime', 'date', 'time', 'uptime')
+
+# Set by the haught.apcos.apcos_timing callback to have the runs timed
+TIMING_ENV = 'APCOS_TIMING'
 
 
 def get_connection(module):
@@ -78,11 +102,109 @@ def get_capabilities(module):
     if hasattr(module, 'apcos_capabilities'):
         return module.apcos_capabilities
 
+    timing = get_timing(module)
+    start = time.time()
     capabilities = Connection(module._socket_path).get_capabilities()
+    timing['capabilities'] += time.time() - start
     module.apcos_capabilities = json.loads(capabilities)
     return module.apcos_capabilities
 
 
+def get_timing(module):
+    """Get the timings of a module run
+
+    The timings start with the first call and are added to by the
+    functions that talk to the device.
+
+    Args:
+        module: A valid AnsibleModule instance.
+
+    Returns:
+        A dictionary of the seconds spent fetching the capabilities and
+        of the count and seconds of the sources read, the commands pushed
+        and the commands run.
+    """
+    if not hasattr(module, 'apcos_timing'):
+        module.apcos_timing = {
+            'start': time.time(),
+            'capabilities': 0.0,
+            'reads': {'count': 0, 'time': 0.0},
+            'writes': {'count': 0, 'time': 0.0},
+            'commands': {'count': 0, 'time': 0.0},
+        }
+    return module.apcos_timing
+
+
+def _add_time(module, key, count, start):
+    entry = get_timing(module)[key]
+    entry['count'] += count
+    entry['time'] += time.time() - start
+
+
+def timing_enabled():
+    """Tell whether the runs are timed
+
+    Returns:
+        True when the APCOS_TIMING environment variable is set.
+    """
+    return os.environ.get(TIMING_ENV, '') not in ('', '0')
+
+
+def add_timing(module, result, stats=None):
+    """Add the timings of a run to a module result as apcos_timing
+
+    Only runs that used the connection are timed, and only when
+    timing_enabled(). The login time is included when the connection
+    logged in during the run, and the commands sent during the run are
+    broken down by command name.
+
+    Args:
+        module: A valid AnsibleModule instance.
+        result: The result dictionary passed to exit_json().
+        stats: Connection counters already fetched at the end of the run
+            with mark set.
+
+    Returns:
+        None
+    """
+    if not timing_enabled():
+        return
+    if not hasattr(module, 'apcos_connection') or not hasattr(module, 'apcos_timing'):
+        return
+    timing = dict(module.apcos_timing)
+    start = timing.pop('start')
+    timing['connect'] = 0.0
+    if stats is None:
+        try:
+            stats = module.apcos_connection.get_stats(mark=True)
+        except ConnectionError:
+            stats = {}
+    last_connect = stats.get('last_connect')
+    if last_connect and last_connect['at'] >= start:
+        timing['connect'] = last_connect['time']
+    timing['per_command'] = stats.get('since_mark', {})
+    timing['total'] = time.time() - start
+    result['apcos_timing'] = timing
+
+
+def add_connection_stats(module, result):
+    """Add the connection counters and the timings to a module result
+
+    Args:
+        module: A valid AnsibleModule instance.
+        result: The result dictionary passed to exit_json().
+
+    Returns:
+        None
+    """
+    stats = None
+    if module.params.get('connection_stats'):
+        # one call serves both when the run is timed
+        stats = get_connection(module).get_stats(mark=timing_enabled())
+        result['connection_stats'] = dict((key, value) for key, value in stats.items() if key != 'since_mark')
+    add_timing(module, result, stats)
+
+
 def run_commands(module, commands):
     """Run command list against connection.
 
@@ -104,7 +226,9 @@ def run_commands(module, commands):
         prompt = cmd['prompt']
         answer = cmd['answer']
 
+        start = time.time()
         out = connection.get(command, prompt, answer)
+        _add_time(module, 'commands', 1, start)
 
         try:
             out = to_text(out, errors='surrogate_or_strict')
@@ -116,7 +240,7 @@ def run_commands(module, commands):
     return responses
 
 
-def get_config(module, source="date"):
+def get_config(module, source="date", flags=None):
     """Get switch configuration
 
     Gets the described device's current configuration. If a configuration has
@@ -124,22 +248,55 @@ def get_config(module, source="date"):
 
     Args:
         module: A valid AnsibleModule instance.
+        source: The configuration source to read.
+        flags: Optional list of flags appended to the source command.
 
     Returns:
         A string containing the configuration.
     """
     if not hasattr(module, 'device_configs'):
         module.device_configs = {}
-    elif module.device_configs != {}:
-        return module.device_configs
+    key = ' '.join([source] + list(flags or []))
+    if key in module.device_configs:
+        return module.device_configs[key]
 
     connection = get_connection(module)
-    out = connection.get_config(source=source)
+    start = time.time()
+    out = connection.get_config(source=source, flags=flags)
+    _add_time(module, 'reads', 1, start)
     cfg = to_text(out, errors='surrogate_then_replace').strip()
-    module.device_configs = cfg
+    module.device_configs[key] = cfg
     return cfg
 
 
+def get_configs(module, sources):
+    """Get several configuration sources in one batch
+
+    Sources that have not been retrieved yet are read with a single call to
+    the connection and cached like get_config() does.
+
+    Args:
+        module: A valid AnsibleModule instance.
+        sources: Iterable of sources, each optionally followed by flags
+            (for example 'user -l').
+
+    Returns:
+        A list of configuration strings in the order of sources.
+    """
+    if not hasattr(module, 'device_configs'):
+        module.device_configs = {}
+    sources = list(sources)
+    missing = [source for source in sources if source not in module.device_configs]
+    if missing:
+        connection = get_connection(module)
+        start = time.time()
+        outputs = connection.get_configs(missing)
+        _add_time(module, 'reads', len(missing), start)
+        for source, out in zip(missing, outputs):
+            module.device_configs[source] = to_text(out, errors='surrogate_then_replace').strip()
+    return [module.device_configs[source] for source in sources]
+
+
 def load_config(module, commands):
     """Apply a list of commands to a device.
 
@@ -154,23 +311,52 @@ def load_config(module, commands):
         None
     """
     connection = get_connection(module)
+    start = time.time()
     connection.edit_config(commands)
+    _add_time(module, 'writes', len(to_list(commands)), start)
+
 
+def parse_device_info(about, dns=None):
+    """Parse the device information of a card
 
-def parse_config(config):
+    Args:
+        about: Output of the about command.
+        dns: Output of the dns command, for the host name.
+
+    Returns:
+        A dictionary of the network_os_* keys found, as returned by the
+        get_device_info() method of the cliconf plugin.
+    """
+    device_info = {'network_os': 'apcos'}
+    for key, pattern, output in (
+        ('network_os_version', r'^Hardware Revision:\s+(\S+)', about),
+        ('network_os_model', r'^Model Number:\s+(\S+)', about),
+        ('network_os_firmware', r'^APC OS\(AOS\)\s*\n-+\s*\nName:.*\nVersion:\s+(\S+)', about),
+        ('network_os_hostname', r'^Host Name:\s+(\S+)', dns),
+    ):
+        match = re.search(pattern, output or '', re.M)
+        if match:
+            device_info[key] = match.group(1)
+    return device_info
+
+
+def parse_config(config, schema=None):
     parsed = {}
     for line in config.split('\n'):
         line_parts = re.match(r'^(.+):\s+(.+)$', line)
         if hasattr(line_parts, 'group'):
             key = line_parts.group(1).replace(" ", "").lower()
             value = line_parts.group(2) if re.search(r'\S', line_parts.group(2)) else ""
+            if schema and value and key in schema:
+                value = schema[key](value.strip())
             parsed[key] = value
     return parsed
 
 
-def parse_config_section(config, section, index=None, indexName="Index"):
+def config_section_lines(config, section):
+    if section is None:
+        return config.split('\n')
     found_section = False
-    found_index = None
     section_values = []
     for line in config.split('\n'):
         if found_section is True:
@@ -180,18 +366,462 @@ def parse_config_section(config, section, index=None, indexName="Index"):
                 section_values.append(line)
         if line == section:
             found_section = True
+    return section_values
+
+
+def parse_config_indexed(config, section, indexName="Index", schema=None):
+    """Parse every indexed record of a config section
+
+    Args:
+        config: Output of a configuration source.
+        section: Header line of the section to parse, or None to parse
+            the whole output.
+        indexName: Name of the key that starts each record.
+        schema: A compiled schema passed on to parse_config().
+
+    Returns:
+        A dictionary of record index to parsed record.
+    """
+    found_index = None
     subsection = {}
-    for line in section_values:
-        if index is not None:
-            index_search = re.match(r'\s+?' + indexName + r':\s+(.+)', line)
-            if hasattr(index_search, 'group'):
-                found_index = int(index_search.group(1))
-                subsection[found_index] = []
-            if found_index is not None:
-                subsection[found_index].append(line)
+    for line in config_section_lines(config, section):
+        index_search = re.match(r'\s*' + indexName + r':\s+(.+)', line)
+        if hasattr(index_search, 'group'):
+            found_index = int(index_search.group(1))
+            subsection[found_index] = []
+        if found_index is not None:
+            subsection[found_index].append(line)
+    for key in subsection:
+        subsection[key] = parse_config("\n".join(subsection[key]), schema)
+    return subsection
+
+
+def parse_config_section(config, section, index=None, indexName="Index", schema=None):
     if index is not None:
-        for key in subsection:
-            subsection[key] = parse_config("\n".join(subsection[key]))
+        subsection = parse_config_indexed(config, section, indexName, schema)
         if index in subsection.keys():
             return subsection[index]
-    return parse_config("\n".join(section_values))
+    return parse_config("\n".join(config_section_lines(config, section)), schema)
+
+
+def parse_log_timestamp(date, time):
+    """Convert an NMC log date and time to an ISO 8601 timestamp
+
+    The NMC prints log dates in the format configured with the date
+    command, so mm/dd/yyyy, dd.mm.yyyy and yyyy-mm-dd are all accepted.
+    The resulting strings sort chronologically.
+
+    Args:
+        date: Date column of a log entry.
+        time: Time column of a log entry.
+
+    Returns:
+        A timestamp string, or None if the date is not recognised.
+    """
+    match = re.match(r'^(\d{2})/(\d{2})/(\d{4})$', date)
+    if match:
+        return '%s-%s-%sT%s' % (match.group(3), match.group(1), match.group(2), time)
+    match = re.match(r'^(\d{2})\.(\d{2})\.(\d{4})$', date)
+    if match:
+        return '%s-%s-%sT%s' % (match.group(3), match.group(2), match.group(1), time)
+    match = re.match(r'^(\d{4})-(\d{2})-(\d{2})$', date)
+    if match:
+        return '%s-%s-%sT%s' % (match.group(1), match.group(2), match.group(3), time)
+    return None
+
+
+def log_entry_hash(entry):
+    """Hash a parsed log entry
+
+    Args:
+        entry: A dictionary describing one log entry.
+
+    Returns:
+        A short hex digest that identifies the entry.
+    """
+    data = json.dumps(entry, sort_keys=True)
+    return hashlib.sha256(to_bytes(data, errors='surrogate_or_strict')).hexdigest()[:16]
+
+
+def filter_log_entries(entries, cursor=None):
+    """Drop log entries already covered by a cursor
+
+    A cursor holds the timestamp of the newest entry seen and the hashes of
+    every entry logged at that timestamp, so entries sharing the last second
+    are not lost or repeated.
+
+    Args:
+        entries: Parsed log entries, each with a `timestamp` key.
+        cursor: A cursor previously returned by `log_cursor`.
+
+    Returns:
+        The entries newer than the cursor, oldest first.
+    """
+    entries = sorted(entries, key=lambda entry: entry['timestamp'])
+    if not cursor or not cursor.get('timestamp'):
+        return entries
+    seen = set(cursor.get('hashes', []))
+    new_entries = []
+    for entry in entries:
+        if entry['timestamp'] > cursor['timestamp']:
+            new_entries.append(entry)
+        elif entry['timestamp'] == cursor['timestamp'] and log_entry_hash(entry) not in seen:
+            new_entries.append(entry)
+    return new_entries
+
+
+def log_cursor(entries, cursor=None):
+    """Advance a log cursor past a list of entries
+
+    Args:
+        entries: Parsed log entries, each with a `timestamp` key.
+        cursor: The cursor the entries were filtered with.
+
+    Returns:
+        A dictionary with the newest timestamp and the hashes of the
+        entries logged at that timestamp.
+    """
+    cursor = dict(cursor) if cursor else {'timestamp': None, 'hashes': []}
+    for entry in entries:
+        if cursor['timestamp'] is None or entry['timestamp'] > cursor['timestamp']:
+            cursor = {'timestamp': entry['timestamp'], 'hashes': []}
+        if entry['timestamp'] == cursor['timestamp']:
+            entry_hash = log_entry_hash(entry)
+            if entry_hash not in cursor['hashes']:
+                cursor['hashes'] = cursor['hashes'] + [entry_hash]
+    return cursor
+
+
+def read_state(path):
+    """Read a controller side state file
+
+    Args:
+        path: Path of a JSON state file.
+
+    Returns:
+        The decoded state, or an empty dictionary if the file does not exist.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_state(path, state):
+    """Atomically write a controller side state file
+
+    Args:
+        path: Path of a JSON state file. Missing directories are created.
+        state: A JSON serializable object.
+
+    Returns:
+        None
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.apcos-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(state, f, sort_keys=True)
+    os.rename(tmp_path, path)
+
+
+def new_salt():
+    """Get a random hex encoded salt for hash_secret()"""
+    return to_text(binascii.hexlify(os.urandom(16)))
+
+
+def hash_secret(value, salt):
+    """Hash a secret for the secret store
+
+    Args:
+        value: The secret.
+        salt: Hex encoded salt.
+
+    Returns:
+        A hex encoded PBKDF2-SHA256 digest.
+    """
+    digest = hashlib.pbkdf2_hmac('sha256', to_bytes(value, errors='surrogate_or_strict'),
+                                 binascii.unhexlify(salt), 100000)
+    return to_text(binascii.hexlify(digest))
+
+
+def get_secret_store(module):
+    """Get the remembered secret hashes of a device
+
+    Args:
+        module: A valid AnsibleModule instance with a secret_store option.
+
+    Returns:
+        A dictionary of field name to salt and hash.
+    """
+    if not hasattr(module, 'apcos_secret_store'):
+        module.apcos_secret_store = read_state(module.params.get('secret_store'))
+        module.apcos_secret_changes = {}
+    return module.apcos_secret_store
+
+
+def secret_changed(module, field, value):
+    """Check a secret against the secret store
+
+    Args:
+        module: A valid AnsibleModule instance with a secret_store option.
+        field: Name the secret is remembered under.
+        value: The desired secret.
+
+    Returns:
+        True if a secret store is used and the secret differs from the one
+        last applied, False otherwise.
+    """
+    if not module.params.get('secret_store') or value is None:
+        return False
+    stored = get_secret_store(module).get(field)
+    if not stored:
+        return True
+    return hash_secret(value, stored['salt']) != stored['hash']
+
+
+def remember_secret(module, field, value):
+    """Queue a secret to be remembered once it has been applied
+
+    Args:
+        module: A valid AnsibleModule instance with a secret_store option.
+        field: Name the secret is remembered under.
+        value: The secret being applied.
+
+    Returns:
+        None
+    """
+    if not module.params.get('secret_store'):
+        return
+    get_secret_store(module)
+    salt = new_salt()
+    module.apcos_secret_changes[field] = {'salt': salt, 'hash': hash_secret(value, salt)}
+
+
+def save_secrets(module):
+    """Write secrets queued by remember_secret() to the secret store
+
+    Args:
+        module: A valid AnsibleModule instance with a secret_store option.
+
+    Returns:
+        None
+    """
+    if not module.params.get('secret_store') or not getattr(module, 'apcos_secret_changes', None):
+        return
+    store = dict(get_secret_store(module))
+    store.update(module.apcos_secret_changes)
+    write_state(module.params['secret_store'], store)
+    module.apcos_secret_store = store
+    module.apcos_secret_changes = {}
+
+
+def config_fingerprint(config):
+    """Fingerprint a configuration source
+
+    Blank lines, trailing whitespace and values that change on every read
+    (such as the device clock) are dropped before hashing, so the fingerprint
+    only changes when the configuration does.
+
+    Args:
+        config: Output of a configuration source.
+
+    Returns:
+        A hex encoded SHA-256 digest.
+    """
+    lines = []
+    for line in config.split('\n'):
+        line = line.rstrip()
+        key = line.split(':', 1)[0].replace(" ", "").lower()
+        if line and key not in VOLATILE_KEYS:
+            lines.append(line)
+    return hashlib.sha256(to_bytes('\n'.join(lines), errors='surrogate_or_strict')).hexdigest()
+
+
+def params_fingerprint(module, salt):
+    """Fingerprint the task parameters of a module
+
+    The parameters are hashed like a secret, as they may include
+    passwords.
+
+    Args:
+        module: A valid AnsibleModule instance.
+        salt: Hex encoded salt.
+
+    Returns:
+        A hex encoded digest of every parameter that describes the desired
+        configuration.
+    """
+    params = dict((key, value) for key, value in module.params.items()
+                  if key not in apcos_argument_spec and key not in TRANSPORT_KEYS)
+    return hash_secret(json.dumps(params, sort_keys=True, default=str), salt)
+
+
+def _plan_secrets(module):
+    # the no_log values of the task, in an order that only depends on them
+    return sorted(value for value in getattr(module, 'no_log_values', ()) if value)
+
+
+def _replace_secrets(commands, replace):
+    planned = []
+    for command in commands:
+        if isinstance(command, dict):
+            command = dict((key, replace(value) if isinstance(value, string_types) else value)
+                           for key, value in command.items())
+        elif isinstance(command, string_types):
+            command = replace(command)
+        planned.append(command)
+    return planned
+
+
+def mask_secrets(module, commands):
+    """Replace the no_log values of a task in commands with placeholders
+
+    Args:
+        module: A valid AnsibleModule instance.
+        commands: The commands built by the module.
+
+    Returns:
+        The commands with every secret replaced by a placeholder that
+        unmask_secrets() fills in again from the same task parameters.
+    """
+    secrets = _plan_secrets(module)
+    # longer secrets first, so one that holds another is replaced whole
+    order = sorted(range(len(secrets)), key=lambda index: -len(secrets[index]))
+
+    def replace(text):
+        for index in order:
+            text = text.replace(secrets[index], SECRET_PLACEHOLDER % index)
+        return text
+    return _replace_secrets(commands, replace)
+
+
+def unmask_secrets(module, commands):
+    """Fill the placeholders of mask_secrets() in again
+
+    Args:
+        module: A valid AnsibleModule instance with the task parameters
+            the commands were masked with.
+        commands: The commands returned by mask_secrets().
+
+    Returns:
+        The commands as they were built.
+    """
+    secrets = _plan_secrets(module)
+
+    def replace(text):
+        return re.sub(SECRET_PLACEHOLDER.replace('%d', r'(\d+)'), lambda match: secrets[int(match.group(1))], text)
+    return _replace_secrets(commands, replace)
+
+
+def write_plan(module, commands):
+    """Write the plan of a check mode run
+
+    The plan holds the commands, a fingerprint of every source read to
+    build them and a fingerprint of the task parameters. The secrets of
+    the task are masked in the stored commands and filled in from the
+    task parameters when the plan is applied.
+
+    Args:
+        module: A valid AnsibleModule instance with a plan_path option.
+        commands: The commands built by the module.
+
+    Returns:
+        None
+    """
+    if not module.check_mode or not module.params.get('plan_path'):
+        return
+    configs = getattr(module, 'device_configs', {})
+    salt = new_salt()
+    write_state(module.params['plan_path'], {
+        'module': module._name,
+        'salt': salt,
+        'params': params_fingerprint(module, salt),
+        'sources': dict((source, config_fingerprint(config)) for source, config in configs.items()),
+        'commands': mask_secrets(module, commands),
+        'secrets': getattr(module, 'apcos_secret_changes', {}),
+    })
+
+
+def read_plan(module):
+    """Read a plan written by a check mode run
+
+    The sources the plan was built from are read again in one batch and
+    compared to the fingerprints in the plan. A plan is used once and
+    removed once it has been checked against the task and the device.
+
+    Args:
+        module: A valid AnsibleModule instance with a plan_path option.
+
+    Returns:
+        The planned commands, or None if there is no plan to apply.
+    """
+    path = module.params.get('plan_path')
+    if module.check_mode or not path or not os.path.exists(path):
+        return None
+    plan = read_state(path)
+    if (plan.get('module') != module._name or not plan.get('salt') or
+            plan.get('params') != params_fingerprint(module, plan['salt'])):
+        module.fail_json(msg='plan %s was written for a different task' % path)
+    sources = sorted(plan.get('sources', {}))
+    for source, config in zip(sources, get_configs(module, sources)):
+        if config_fingerprint(config) != plan['sources'][source]:
+            module.fail_json(msg='%s changed on the device since plan %s was written' % (source, path))
+    if plan.get('secrets'):
+        get_secret_store(module)
+        module.apcos_secret_changes = plan['secrets']
+    os.remove(path)
+    return unmask_secrets(module, plan['commands'])
+
+
+def config_unchanged(module):
+    """Check whether a task can be skipped
+
+    Compares the task parameters and the sources read by the last run that
+    found nothing to change, as saved by save_fingerprints(), with the
+    current ones. Only the raw sources are read, in one batch, and nothing
+    is parsed.
+
+    Args:
+        module: A valid AnsibleModule instance with a fingerprint_path option.
+
+    Returns:
+        True if neither the parameters nor the sources changed since then.
+    """
+    path = module.params.get('fingerprint_path')
+    if not path or module.params.get('forcepwchange') is True:
+        return False
+    state = read_state(path)
+    if not state.get('sources') or state.get('params') != params_fingerprint(module, state['salt']):
+        return False
+    sources = sorted(state['sources'])
+    for source, config in zip(sources, get_configs(module, sources)):
+        if config_fingerprint(config) != state['sources'][source]:
+            return False
+    module.apcos_unchanged = True
+    return True
+
+
+def save_fingerprints(module, commands):
+    """Save the fingerprints of a run that found nothing to change
+
+    Args:
+        module: A valid AnsibleModule instance with a fingerprint_path option.
+        commands: The commands the run is going to push.
+
+    Returns:
+        None
+    """
+    path = module.params.get('fingerprint_path')
+    if not path or commands or module.check_mode or getattr(module, 'apcos_unchanged', False):
+        return
+    configs = getattr(module, 'device_configs', {})
+    if not configs:
+        return
+    salt = new_salt()
+    write_state(path, {
+        'salt': salt,
+        'params': params_fingerprint(module, salt),
+        'sources': dict((source, config_fingerprint(config)) for source, config in configs.items()),
+    })
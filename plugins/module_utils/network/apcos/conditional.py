@@ -0,0 +1,195 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+import shlex
+
+from ansible.module_utils.parsing.convert_bool import BOOLEANS_TRUE, BOOLEANS_FALSE
+from ansible.module_utils.six import string_types, text_type
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import parse_config
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import to_bool
+
+
+class FailedConditionalError(Exception):
+    def __init__(self, msg, failed_conditional):
+        super(FailedConditionalError, self).__init__(msg)
+        self.failed_conditional = failed_conditional
+
+
+class Conditional(object):
+    """A wait_for condition compiled once and evaluated on every retry
+
+    Conditions have the form ``result[N] [not] OPERATOR VALUE`` to test the
+    raw output of a command or ``result[N].KEY [not] OPERATOR VALUE`` to test
+    one line of it, where KEY is named like the keys of parse_config(). The
+    ordering operators compare the first number found in the output.
+    """
+
+    OPERATORS = {
+        'eq': ['eq', '=='],
+        'neq': ['neq', 'ne', '!='],
+        'gt': ['gt', '>'],
+        'ge': ['ge', '>='],
+        'lt': ['lt', '<'],
+        'le': ['le', '<='],
+        'contains': ['contains'],
+        'matches': ['matches'],
+    }
+
+    KEY_RE = re.compile(r'^result\[(\d+)\](?:\.([^.\s]+))?$')
+    NUMBER_RE = re.compile(r'[-+]?\d+(?:\.\d+)?')
+    NUMBER_ONLY_RE = re.compile(r'^[-+]?\d+(?:\.\d+)?$')
+
+    def __init__(self, conditional):
+        self.raw = conditional
+        self.negate = False
+        try:
+            components = shlex.split(conditional)
+        except ValueError:
+            raise ValueError('failed to parse conditional: %s' % conditional)
+        if len(components) < 3:
+            raise ValueError('failed to parse conditional: %s' % conditional)
+        key, val, op_components = components[0], components[-1], components[1:-1]
+        if 'not' in op_components:
+            self.negate = True
+            op_components.remove('not')
+        if len(op_components) != 1:
+            raise ValueError('failed to parse conditional: %s' % conditional)
+
+        match = self.KEY_RE.match(key)
+        if not match:
+            raise ValueError('unsupported key %s in conditional: %s' % (key, conditional))
+        self.index = int(match.group(1))
+        self.key = match.group(2).lower() if match.group(2) else None
+
+        self.func = self._func(op_components[0])
+        # contains and matches use the value as written, the comparisons
+        # the value cast to a number or boolean
+        self.text = text_type(val)
+        self.value = self._cast_value(val)
+        if self.func == self.matches:
+            self.regex = re.compile(self.text, re.M)
+
+    def __call__(self, responses, parsed=None):
+        """Evaluate the condition
+
+        Args:
+            responses: List of command outputs.
+            parsed: Optional dictionary shared by the conditions of one retry,
+                so each output is parsed only once.
+
+        Returns:
+            True if the condition is met.
+        """
+        result = self.func(self.get_value(responses, parsed))
+        return not result if self.negate else result
+
+    def _cast_value(self, value):
+        if re.match(r'^[-+]?\d+\.\d+$', value):
+            return float(value)
+        elif re.match(r'^[-+]?\d+$', value):
+            return int(value)
+        elif value in BOOLEANS_TRUE:
+            return True
+        elif value in BOOLEANS_FALSE:
+            return False
+        return text_type(value)
+
+    def _func(self, oper):
+        for func, operators in self.OPERATORS.items():
+            if oper in operators:
+                return getattr(self, func)
+        raise ValueError('unknown operator: %s' % oper)
+
+    def get_value(self, responses, parsed=None):
+        try:
+            value = responses[self.index]
+        except IndexError:
+            raise FailedConditionalError('unable to apply conditional to result', self.raw)
+        if self.key is None:
+            return value
+        if parsed is None:
+            parsed = {}
+        if self.index not in parsed:
+            parsed[self.index] = parse_config(value)
+        return parsed[self.index].get(self.key)
+
+    def number(self, value):
+        if isinstance(value, (int, float)):
+            return value
+        # a whole output starts with its status code, so it is only a
+        # number when it holds nothing else
+        if self.key is None:
+            match = self.NUMBER_ONLY_RE.match((value or '').strip())
+        else:
+            match = self.NUMBER_RE.search(value or '')
+        if not match:
+            return None
+        return float(match.group(0)) if '.' in match.group(0) else int(match.group(0))
+
+    def compare(self, value):
+        if isinstance(self.value, bool) or not isinstance(self.value, (int, float)):
+            return None
+        return self.number(value)
+
+    def eq(self, value):
+        number = self.compare(value)
+        if number is not None:
+            return number == self.value
+        if isinstance(self.value, bool) and isinstance(value, string_types):
+            return to_bool(value.strip()) is self.value
+        if isinstance(value, string_types):
+            return value.strip() == text_type(self.value)
+        return value == self.value
+
+    def neq(self, value):
+        return not self.eq(value)
+
+    def gt(self, value):
+        number = self.compare(value)
+        return number is not None and number > self.value
+
+    def ge(self, value):
+        number = self.compare(value)
+        return number is not None and number >= self.value
+
+    def lt(self, value):
+        number = self.compare(value)
+        return number is not None and number < self.value
+
+    def le(self, value):
+        number = self.compare(value)
+        return number is not None and number <= self.value
+
+    def contains(self, value):
+        return value is not None and self.text in value
+
+    def matches(self, value):
+        return value is not None and self.regex.search(value) is not None
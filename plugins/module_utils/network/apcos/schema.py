@@ -0,0 +1,341 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+
+try:
+    import ipaddress
+    HAS_IPADDRESS = True
+except ImportError:
+    HAS_IPADDRESS = False
+
+from ansible.module_utils._text import to_text
+
+
+TRUE_VALUES = ('enabled', 'enable', 'yes', 'on', 'true')
+FALSE_VALUES = ('disabled', 'disable', 'no', 'off', 'false')
+
+SECONDS = {
+    'day': 86400,
+    'hour': 3600,
+    'hr': 3600,
+    'min': 60,
+    'sec': 1,
+}
+
+# Value types of the keys returned by parse_config() for every source.
+# Keys that are not listed stay strings.
+SCHEMAS = {
+    'about': {
+        'managementuptime': 'seconds',
+        'uptime': 'seconds',
+    },
+    'console': {
+        'telnet': 'bool',
+        'ssh': 'bool',
+        'telnetport': 'int',
+        'sshport': 'int',
+    },
+    'detstatus': {
+        'runtimeremaining': 'seconds',
+        'batterycapacity': 'percent',
+    },
+    'dns': {
+        'activeprimarydnsserver': 'ip',
+        'activesecondarydnsserver': 'ip',
+        'overridemanualdnssettings': 'bool',
+        'primarydnsserver': 'ip',
+        'secondarydnsserver': 'ip',
+        'systemnamesync': 'bool',
+    },
+    'ftp': {
+        'service': 'bool',
+        'ftpport': 'int',
+    },
+    'ntp': {
+        'ntpstatus': 'bool',
+        'activeprimaryntpserver': 'ip',
+        'activesecondaryntpserver': 'ip',
+        'overridemanualntpsettings': 'bool',
+        'primaryntpserver': 'ip',
+        'secondaryntpserver': 'ip',
+    },
+    'radius': {
+        'access': ('enum', {
+            'local only': 'local',
+            'radius, then local': 'radiuslocal',
+            'radius only': 'radius',
+        }),
+        'primaryserver': 'ip',
+        'primaryserverport': 'int',
+        'primaryservertimeout': 'int',
+        'secondaryserver': 'ip',
+        'secondaryserverport': 'int',
+        'secondaryservertimeout': 'int',
+    },
+    'smtp': {
+        'port': 'int',
+        'auth': 'bool',
+        'req.cert': 'bool',
+    },
+    'snmp': {
+        'snmpv1': 'bool',
+        'accesscontrol#': 'int',
+        'address': 'ip',
+    },
+    'snmpv3': {
+        'snmpv3': 'bool',
+        'index': 'int',
+        'authentication': ('enum', {'sha': 'SHA', 'md5': 'MD5', 'none': 'NONE'}),
+        'encryption': ('enum', {'aes': 'AES', 'des': 'DES', 'none': 'NONE'}),
+        'access': 'bool',
+        'nmsip/hostname': 'ip',
+    },
+    'snmptrap': {
+        'index': 'int',
+        'receiverip': 'ip',
+        'traptype': ('enum', {'snmpv1': 'snmpv1', 'snmpv3': 'snmpv3'}),
+        'generation': 'bool',
+        'authtraps': 'bool',
+    },
+    'system': {
+        'hostnamesync': 'bool',
+        'uptime': 'seconds',
+    },
+    'tcpip': {
+        'ipv4': 'bool',
+        'ipv4address': 'ip',
+        'subnetmask': 'ip',
+        'gateway': 'ip',
+    },
+    'user': {
+        'status': 'bool',
+        'access': 'bool',
+        'sessiontimeout': 'seconds',
+        'userpermission': ('enum', {
+            'super user': 'superuser',
+            'administrator': 'administrator',
+            'device': 'device',
+            'device user': 'device',
+            'read-only': 'readonly',
+            'read-only user': 'readonly',
+            'network-only': 'networkonly',
+            'network-only user': 'networkonly',
+        }),
+    },
+    'web': {
+        'http': 'bool',
+        'https': 'bool',
+        'httpport': 'int',
+        'httpsport': 'int',
+        'limitedstatusaccess': 'bool',
+        'lim.statuspageused': 'bool',
+        'tls1.2ciphersuitefilter': 'int',
+    },
+}
+
+# Keys of the parse_config() output set by the command line flags of each
+# source, used to tell whether a command is already in effect. Flags that
+# set secrets or indexed entries are not listed.
+FLAGS = {
+    'console': {
+        '-t': 'telnet',
+        '-s': 'ssh',
+        '-pt': 'telnetport',
+        '-ps': 'sshport',
+    },
+    'dns': {
+        '-p': 'primarydnsserver',
+        '-s': 'secondarydnsserver',
+        '-d': 'domainname',
+        '-n': 'domainnameipv6',
+        '-h': 'hostname',
+        '-y': 'systemnamesync',
+        '-OM': 'overridemanualdnssettings',
+    },
+    'ftp': {
+        '-S': 'service',
+        '-p': 'ftpport',
+    },
+    'ntp': {
+        '-e': 'ntpstatus',
+        '-p': 'primaryntpserver',
+        '-s': 'secondaryntpserver',
+        '-OM': 'overridemanualntpsettings',
+    },
+    'radius': {
+        '-a': 'access',
+        '-p1': 'primaryserver',
+        '-o1': 'primaryserverport',
+        '-t1': 'primaryservertimeout',
+        '-p2': 'secondaryserver',
+        '-o2': 'secondaryserverport',
+        '-t2': 'secondaryservertimeout',
+    },
+    'smtp': {
+        '-f': 'from',
+        '-s': 'server',
+        '-p': 'port',
+        '-a': 'auth',
+        '-u': 'user',
+        '-e': 'encryption',
+        '-c': 'req.cert',
+        '-i': 'certfile',
+    },
+    'system': {
+        '-n': 'name',
+        '-c': 'contact',
+        '-l': 'location',
+        '-m': 'message',
+        '-s': 'hostnamesync',
+    },
+    'tcpip': {
+        '-S': 'ipv4',
+        '-i': 'ipv4address',
+        '-s': 'subnetmask',
+        '-g': 'gateway',
+        '-d': 'domainname',
+        '-h': 'hostname',
+    },
+    'web': {
+        '-h': 'http',
+        '-s': 'https',
+        '-ph': 'httpport',
+        '-ps': 'httpsport',
+        '-mp': 'minimumprotocol',
+        '-lsp': 'limitedstatusaccess',
+        '-lsd': 'lim.statuspageused',
+        '-cs': 'tls1.2ciphersuitefilter',
+    },
+}
+
+# Sections of numbered entries of each source, as (section header, name of
+# the key that starts each entry). The entries of all sections of a source
+# are merged by index. Sources not listed number their entries by Index.
+INDEXES = {
+    'snmp': (('Access Control Summary:', 'Access Control #'),),
+    'snmpv3': (('SNMPv3 User Profiles', 'Index'), ('SNMPv3 Access Control', 'Index')),
+}
+
+_compiled = {}
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def to_bool(value):
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    return value
+
+
+def to_seconds(value):
+    if value.isdigit():
+        return int(value)
+    units = re.findall(r'(\d+)\s*(day|hour|hr|min|sec)', value, re.I)
+    if not units:
+        return value
+    return sum(int(count) * SECONDS[unit.lower()] for count, unit in units)
+
+
+def to_percent(value):
+    match = re.match(r'^(\d+(?:\.\d+)?)\s*%$', value)
+    if not match:
+        return value
+    return float(match.group(1))
+
+
+def to_ip(value):
+    if not HAS_IPADDRESS:
+        return value
+    try:
+        return str(ipaddress.ip_address(to_text(value)))
+    except ValueError:
+        pass
+    try:
+        return str(ipaddress.ip_interface(to_text(value)))
+    except ValueError:
+        return value
+
+
+def to_enum(choices):
+    def convert(value):
+        return choices.get(value.lower(), value)
+    return convert
+
+
+CONVERTERS = {
+    'int': to_int,
+    'bool': to_bool,
+    'seconds': to_seconds,
+    'percent': to_percent,
+    'ip': to_ip,
+}
+
+
+def compile_schema(spec):
+    """Compile a schema spec
+
+    Args:
+        spec: A dictionary of parsed key names to a type name or to an
+            ('enum', choices) tuple.
+
+    Returns:
+        A dictionary of parsed key names to converter functions.
+    """
+    schema = {}
+    for key, value_type in spec.items():
+        if isinstance(value_type, tuple):
+            schema[key] = to_enum(value_type[1])
+        else:
+            schema[key] = CONVERTERS[value_type]
+    return schema
+
+
+def get_schema(source):
+    """Get the compiled schema of a configuration source
+
+    Schemas are compiled the first time they are asked for and reused
+    afterwards.
+
+    Args:
+        source: A configuration source as passed to get_config().
+
+    Returns:
+        A dictionary suitable for the schema argument of parse_config().
+    """
+    if source not in _compiled:
+        _compiled[source] = compile_schema(SCHEMAS.get(source, {}))
+    return _compiled[source]
@@ -0,0 +1,315 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+
+from ansible.module_utils._text import to_text
+from ansible.module_utils.basic import missing_required_lib
+from ansible.module_utils.connection import Connection
+
+snmp_argument_spec = dict(
+    snmp=dict(type='dict', options=dict(
+        host=dict(type='str'),
+        port=dict(type='int', default=161),
+        community=dict(type='str', required=True, no_log=True),
+        version=dict(type='str', default='v2c', choices=['v1', 'v2c']),
+        timeout=dict(type='float', default=1),
+        retries=dict(type='int', default=1),
+    )),
+)
+
+# Objects read over SNMP by name. Configuration values are named after the
+# keys parse_config() returns for them.
+OIDS = {
+    # SNMPv2-MIB
+    'sysdescr': '1.3.6.1.2.1.1.1.0',
+    'contact': '1.3.6.1.2.1.1.4.0',
+    'name': '1.3.6.1.2.1.1.5.0',
+    'location': '1.3.6.1.2.1.1.6.0',
+    # PowerNet-MIB
+    'batterycapacity': '1.3.6.1.4.1.318.1.1.1.2.2.1.0',
+    'runtimeremaining': '1.3.6.1.4.1.318.1.1.1.2.2.3.0',
+    'statusofups': '1.3.6.1.4.1.318.1.1.1.4.1.1.0',
+}
+
+# Keys of every configuration source that can be read over SNMP
+SOURCE_KEYS = {
+    'system': ('name', 'contact', 'location'),
+}
+
+# upsBasicOutputStatus values, as the CLI prints them
+OUTPUT_STATUS = {
+    1: 'Unknown',
+    2: 'On Line',
+    3: 'On Battery',
+    4: 'On Smart Boost',
+    5: 'Timed Sleeping',
+    6: 'Software Bypass',
+    7: 'Off',
+    8: 'Rebooting',
+    9: 'Switched Bypass',
+    10: 'Hardware Failure Bypass',
+    11: 'Sleeping Until Power Return',
+    12: 'On Smart Trim',
+    13: 'Eco Mode',
+    14: 'Hot Standby',
+    15: 'On Battery Test',
+}
+
+# Device information fields of the sysDescr of a card
+SYS_DESCR_FIELDS = {
+    'MN': 'network_os_model',
+    'HR': 'network_os_version',
+    'PF': 'network_os_firmware',
+}
+
+# Objects requested per GET
+BATCH = 16
+
+
+class SnmpError(Exception):
+    pass
+
+
+# pysnmp takes a good part of a second to import, so it is only imported
+# by the modules that use SNMP, the first time they do
+asyncio = None
+hlapi = None
+univ = None
+HAS_ASYNC_HLAPI = False
+
+
+def has_pysnmp():
+    """Import pysnmp on first use
+
+    Returns:
+        True if pysnmp could be imported.
+    """
+    global asyncio, hlapi, univ, HAS_ASYNC_HLAPI
+    if hlapi is not None:
+        return True
+    try:
+        import asyncio as asyncio_module
+        from pysnmp.hlapi.v3arch import asyncio as hlapi_module
+        HAS_ASYNC_HLAPI = True
+    except ImportError:
+        try:
+            from pysnmp import hlapi as hlapi_module
+        except ImportError:
+            return False
+        asyncio_module = None
+    from pyasn1.type import univ as univ_module
+    asyncio, univ, hlapi = asyncio_module, univ_module, hlapi_module
+    return True
+
+
+def snmp_value(value):
+    """Convert a value of a response to a python value
+
+    Args:
+        value: A pyasn1 value of a variable binding.
+
+    Returns:
+        An int for numbers, a string for strings, or None for objects the
+        agent does not have.
+    """
+    if value is None or isinstance(value, univ.Null):
+        return None
+    if isinstance(value, univ.Integer):
+        return int(value)
+    if isinstance(value, univ.OctetString):
+        return to_text(value.asOctets(), errors='surrogate_then_replace')
+    return to_text(value.prettyPrint())
+
+
+def _get_requests(params, batches):
+    engine = hlapi.SnmpEngine()
+    auth = hlapi.CommunityData(params['community'], mpModel=0 if params['version'] == 'v1' else 1)
+    address = (params['host'], params['port'])
+    if not HAS_ASYNC_HLAPI:
+        target = hlapi.UdpTransportTarget(address, timeout=params['timeout'], retries=params['retries'])
+        for batch in batches:
+            yield next(hlapi.getCmd(engine, auth, target, hlapi.ContextData(),
+                                    *[hlapi.ObjectType(hlapi.ObjectIdentity(oid)) for oid in batch], lookupMib=False))
+        return
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        target = loop.run_until_complete(hlapi.UdpTransportTarget.create(
+            address, timeout=params['timeout'], retries=params['retries']))
+        for batch in batches:
+            yield loop.run_until_complete(hlapi.get_cmd(engine, auth, target, hlapi.ContextData(),
+                                                        *[hlapi.ObjectType(hlapi.ObjectIdentity(oid)) for oid in batch],
+                                                        lookupMib=False))
+    finally:
+        engine.close_dispatcher()
+        # let the dispatcher tasks see their cancellation
+        loop.run_until_complete(asyncio.sleep(0))
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def snmp_get(params, oids):
+    """Read objects with GET requests
+
+    The objects are requested BATCH at a time, so a handful of values
+    takes a single round trip.
+
+    Args:
+        params: The snmp options of a module, with the host filled in.
+        oids: Object identifiers of the objects to read.
+
+    Returns:
+        A list of values in the order of oids, None for objects the agent
+        does not have.
+
+    Raises:
+        SnmpError: The agent did not answer.
+    """
+    if not has_pysnmp():
+        raise SnmpError(missing_required_lib('pysnmp'))
+    batches = [oids[start:start + BATCH] for start in range(0, len(oids), BATCH)]
+    values = []
+    responses = _get_requests(params, batches)
+    try:
+        for batch, response in zip(batches, responses):
+            error_indication, error_status, dummy, var_binds = response
+            if error_indication:
+                raise SnmpError(to_text(error_indication))
+            if error_status:
+                # SNMPv1 fails the whole request when one object is missing
+                values.extend([None] * len(batch))
+                continue
+            values.extend(snmp_value(value) for dummy, value in var_binds)
+    finally:
+        responses.close()
+    return values
+
+
+def get_snmp_params(module):
+    """Get the snmp options of a module with the host filled in
+
+    The host defaults to the address the persistent connection logs in to.
+
+    Args:
+        module: A valid AnsibleModule instance with an snmp option.
+
+    Returns:
+        The snmp options, or None when SNMP is not used.
+    """
+    params = module.params.get('snmp')
+    if not params or getattr(module, 'apcos_snmp_failed', False):
+        return None
+    if not has_pysnmp():
+        module.fail_json(msg=missing_required_lib('pysnmp'))
+    params = dict(params)
+    if not params.get('host'):
+        if not getattr(module, '_socket_path', None):
+            return None
+        params['host'] = Connection(module._socket_path).get_option('host')
+    return params
+
+
+def read_snmp(module, names):
+    """Read named objects over SNMP
+
+    Values are cached on the module, so every object is requested once.
+    When the agent does not answer a warning is issued and SNMP is not
+    used again by the module.
+
+    Args:
+        module: A valid AnsibleModule instance with an snmp option.
+        names: Names of objects in OIDS.
+
+    Returns:
+        A dictionary of the names that could be read to their values.
+    """
+    params = get_snmp_params(module)
+    if params is None:
+        return {}
+    if not hasattr(module, 'snmp_values'):
+        module.snmp_values = {}
+    missing = [name for name in names if name in OIDS and name not in module.snmp_values]
+    if missing:
+        try:
+            values = snmp_get(params, [OIDS[name] for name in missing])
+        except SnmpError as exc:
+            module.warn('SNMP read from %s failed, reading from the CLI: %s' % (params['host'], exc))
+            module.apcos_snmp_failed = True
+            return {}
+        module.snmp_values.update(zip(missing, values))
+    return dict((name, module.snmp_values[name]) for name in names if module.snmp_values.get(name) is not None)
+
+
+def read_snmp_config(module, source, keys):
+    """Read configuration values over SNMP
+
+    Plans and fingerprints are built from the CLI output of the sources,
+    so SNMP is not used together with plan_path or fingerprint_path, nor
+    for a source already read from the CLI.
+
+    Args:
+        module: A valid AnsibleModule instance with an snmp option.
+        source: The configuration source the values belong to.
+        keys: Keys of the values as returned by parse_config().
+
+    Returns:
+        A dictionary of keys to values, or None if any of them has to be
+        read from the CLI.
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    if any(key not in SOURCE_KEYS.get(source, ()) for key in keys):
+        return None
+    if module.params.get('plan_path') or module.params.get('fingerprint_path'):
+        return None
+    if source in getattr(module, 'device_configs', {}):
+        return None
+    values = read_snmp(module, keys)
+    if len(values) != len(keys):
+        return None
+    return values
+
+
+def parse_sys_descr(descr):
+    """Parse the device information of a card from its sysDescr
+
+    Args:
+        descr: The sysDescr of the card, for example
+            'APC Web/SNMP Management Card (MB:v4.2.1 PF:v1.4.2.1 ... MN:AP9641 HR:05 ...)'.
+
+    Returns:
+        A dictionary of the network_os_* keys found.
+    """
+    device_info = {}
+    for field, value in re.findall(r'\b([A-Z]+\d*):(\S+)', descr or ''):
+        if field in SYS_DESCR_FIELDS:
+            device_info[SYS_DESCR_FIELDS[field]] = value.rstrip(')')
+    return device_info
@@ -0,0 +1,94 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Small stand-ins for the ansible.netcommon helpers the modules use, so
+# their payloads do not carry the netcommon module_utils tree.
+
+
+def to_list(val):
+    if isinstance(val, (list, tuple, set)):
+        return list(val)
+    elif val is not None:
+        return [val]
+    else:
+        return list()
+
+
+class ComplexList(object):
+    """Transforms a list of values to a list of dicts
+
+    Each attribute of attrs may set key, to map a plain value to that
+    attribute, required, default and choices.
+
+    Example::
+
+        command = ComplexList(dict(
+            command=dict(key=True),
+            prompt=dict(),
+            answer=dict()
+        ), module)
+        command(['system', {'command': 'reboot', 'prompt': 'YES', 'answer': 'YES'}])
+    """
+
+    def __init__(self, attrs, module):
+        self._attributes = attrs
+        self._module = module
+        keys = [name for name, attr in attrs.items() if attr.get('key')]
+        if len(keys) > 1:
+            module.fail_json(msg='only one key value can be specified')
+        self._key = keys[0] if keys else None
+
+    def to_dict(self, value):
+        obj = dict((name, attr.get('default')) for name, attr in self._attributes.items())
+        if self._key:
+            obj[self._key] = value
+        return obj
+
+    def entity(self, value):
+        if not isinstance(value, dict):
+            value = self.to_dict(value)
+
+        unknown = set(value).difference(self._attributes)
+        if unknown:
+            self._module.fail_json(msg='invalid keys: %s' % ','.join(sorted(unknown)))
+
+        for name, attr in self._attributes.items():
+            if value.get(name) is None:
+                value[name] = attr.get('default')
+            if (attr.get('required') or attr.get('key')) and value[name] is None:
+                self._module.fail_json(msg='missing required attribute %s' % name)
+            if 'choices' in attr and value[name] not in attr['choices']:
+                self._module.fail_json(msg='%s must be one of %s, got %s' % (name, ', '.join(attr['choices']), value[name]))
+        return value
+
+    def __call__(self, iterable):
+        if not isinstance(iterable, (list, tuple)):
+            self._module.fail_json(msg='value must be an iterable')
+        return [self.entity(value) for value in iterable]
@@ -0,0 +1 @@
+network/apcos/apcos_config_lines.py
\ No newline at end of file
@@ -0,0 +1 @@
+network/apcos/apcos_datalog.py
\ No newline at end of file
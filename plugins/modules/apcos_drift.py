@@ -0,0 +1 @@
+network/apcos/apcos_drift.py
\ No newline at end of file
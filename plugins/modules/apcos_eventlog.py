@@ -0,0 +1 @@
+network/apcos/apcos_eventlog.py
\ No newline at end of file
@@ -0,0 +1 @@
+network/apcos/apcos_facts.py
\ No newline at end of file
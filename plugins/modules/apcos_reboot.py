@@ -0,0 +1 @@
+network/apcos/apcos_reboot.py
\ No newline at end of file
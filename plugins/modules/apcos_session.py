@@ -0,0 +1 @@
+network/apcos/apcos_session.py
\ No newline at end of file
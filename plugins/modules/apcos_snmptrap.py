@@ -0,0 +1 @@
+network/apcos/apcos_snmptrap.py
\ No newline at end of file
@@ -0,0 +1 @@
+network/apcos/apcos_user.py
\ No newline at end of file
@@ -42,6 +42,18 @@ options:
         before moving forward. If the conditional is not true
         within the configured number of retries, the task fails.
         See examples.
+      - A condition is C(result[N] OPERATOR VALUE) to test the whole
+        output of the Nth command, or C(result[N].KEY OPERATOR VALUE)
+        to test one line of it. KEY is the text before the colon in
+        lower case without spaces, for example C(batterycapacity) for
+        C(Battery Capacity).
+      - Operators are C(eq), C(neq), C(gt), C(ge), C(lt), C(le),
+        C(contains) and C(matches), optionally preceded by C(not). With
+        a number as VALUE, the operators compare the first number in the
+        value of a KEY. A whole output is only compared as a number when
+        it holds nothing else, as it starts with the status code.
+      - Conditions are compiled once and every output is parsed only
+        once per retry.
     type: list
     elements: str
   match:
@@ -71,6 +83,12 @@ options:
         trying the command again.
     default: 1
     type: int
+  connection_stats:
+    description:
+      - Return the counters of the persistent connection to the device as
+        I(connection_stats).
+    default: false
+    type: bool
 '''
 
 EXAMPLES = """
@@ -94,6 +112,15 @@ tasks:
         - result[0] contains UPS01
         - result[1] contains example.net
 
+  - name: Wait for the battery to charge
+    haught.apcos.apcos_command:
+      commands: detstatus -all
+      wait_for:
+        - result[0].batterycapacity ge 90
+        - result[0].statusofups matches "^On Line"
+      retries: 30
+      interval: 60
+
   - name: Run command that requires answering a prompt
     haught.apcos.apcos_command:
       commands:
@@ -118,14 +145,52 @@ failed_conditions:
   returned: failed
   type: list
   sample: ['...', '...']
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 import re
 import time
 
-from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import run_commands
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import run_commands, add_connection_stats
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import ComplexList
-from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.parsing import Conditional
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.utils import ComplexList
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.conditional import (
+    Conditional,
+    FailedConditionalError,
+)
 from ansible.module_utils.six import string_types
 
 
@@ -169,7 +234,8 @@ def main():
         match=dict(default='all', choices=['all', 'any']),
 
         retries=dict(default=10, type='int'),
-        interval=dict(default=1, type='int')
+        interval=dict(default=1, type='int'),
+        connection_stats=dict(default=False, type='bool')
     )
 
     module = AnsibleModule(
@@ -184,7 +250,10 @@ def main():
     result['warnings'] = warnings
 
     wait_for = module.params['wait_for'] or list()
-    conditionals = [Conditional(c) for c in wait_for]
+    try:
+        conditionals = [Conditional(c) for c in wait_for]
+    except (ValueError, re.error) as exc:
+        module.fail_json(msg=str(exc))
 
     retries = module.params['retries']
     interval = module.params['interval']
@@ -192,9 +261,14 @@ def main():
 
     while retries > 0:
         responses = run_commands(module, commands)
+        parsed = {}
 
         for item in list(conditionals):
-            if item(responses):
+            try:
+                met = item(responses, parsed)
+            except FailedConditionalError as exc:
+                module.fail_json(msg=str(exc), failed_conditions=[exc.failed_conditional])
+            if met:
                 if match == 'any':
                     conditionals = list()
                     break
@@ -217,6 +291,8 @@ def main():
         'stdout_lines': list(to_lines(responses))
     })
 
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
@@ -0,0 +1,227 @@
+#!/usr/bin/python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: apcos_config_lines
+author: "Matt Haught (@haught)"
+short_description: Push configuration lines to APC OS devices.
+description:
+  - This module pushes configuration commands to APC UPS NMC systems,
+    for settings without a dedicated module such as C(tcpip) or
+    C(console).
+  - Each line is mapped to the configuration source named by its first
+    word, for example C(tcpip -i 10.0.0.5) to C(tcpip). Every source
+    touched is read in one batch and lines whose settings are all in
+    effect already are dropped. The remaining lines are pushed together.
+  - Lines are always pushed when they set something that cannot be read
+    back, such as passwords, secrets or indexed entries, or when their
+    source is not known to this module.
+extends_documentation_fragment:
+  - haught.apcos.apcos
+notes:
+  - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
+  - APC NMC v2 cards running AOS <= v6.8.2 and APC
+    NMC v3 cards running AOS < v1.4.2.1 have a bug that
+    stalls output and will not work with ansible
+options:
+  lines:
+    description:
+      - The configuration commands to push, one per line, for example
+        C(tcpip -h ups001 -d example.net).
+    type: list
+    elements: str
+    aliases: ['commands']
+  src:
+    description:
+      - Path of a template of configuration commands, one per line. The
+        template is rendered on the controller. Blank lines and lines
+        starting with C(#) are ignored.
+    type: str
+'''
+
+EXAMPLES = """
+- name: Set the host name and disable telnet
+  haught.apcos.apcos_config_lines:
+    lines:
+      - tcpip -h ups001 -d example.net
+      - console -t disable
+
+- name: Push a templated configuration
+  haught.apcos.apcos_config_lines:
+    src: nmc.j2
+"""
+
+RETURN = """
+commands:
+  description: The list of configuration mode commands to send to the device
+  returned: always
+  type: list
+  sample:
+    - tcpip -h ups001
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
+"""
+
+import shlex
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import (
+    load_config,
+    get_configs,
+    parse_config,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
+)
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import FLAGS, get_schema
+
+ARGUMENT_SPEC = dict(
+    lines=dict(type='list', elements='str', aliases=['commands']),
+    src=dict(type='str'),
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
+
+MUTUALLY_EXCLUSIVE = [('lines', 'src')]
+
+REQUIRED_ONE_OF = [('lines', 'src')]
+
+
+def get_lines(module):
+    if module.params['src'] is not None:
+        lines = module.params['src'].splitlines()
+    else:
+        lines = module.params['lines']
+    lines = [' '.join(line.split()) for line in lines]
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+def line_settings(line):
+    """Split a line into its source and the settings it makes
+
+    Args:
+        line: A configuration command.
+
+    Returns:
+        The source and a dictionary of parsed key to value, or None as
+        settings if any part of the line cannot be checked.
+    """
+    try:
+        words = shlex.split(line)
+    except ValueError:
+        return line.split()[0], None
+    source = words[0]
+    flags = FLAGS.get(source)
+    if not flags or len(words) < 3 or len(words) % 2 != 1:
+        return source, None
+    settings = {}
+    for flag, value in zip(words[1::2], words[2::2]):
+        if flag not in flags:
+            return source, None
+        settings[flags[flag]] = value
+    return source, settings
+
+
+def in_effect(settings, config, schema):
+    for key, value in settings.items():
+        if key in schema:
+            value = schema[key](value)
+        if config.get(key) != value:
+            return False
+    return True
+
+
+def build_commands(module):
+    lines = [(line, line_settings(line)) for line in get_lines(module)]
+    sources = sorted(set(source for line, (source, settings) in lines if settings is not None))
+    configs = {}
+    for source, output in zip(sources, get_configs(module, sources)):
+        configs[source] = parse_config(output, get_schema(source))
+    commands = []
+    for line, (source, settings) in lines:
+        if settings is None or not in_effect(settings, configs[source], get_schema(source)):
+            if line not in commands:
+                commands.append(line)
+    return commands
+
+
+def main():
+    """ main entry point for module execution
+    """
+    module = AnsibleModule(
+        argument_spec=ARGUMENT_SPEC,
+        mutually_exclusive=MUTUALLY_EXCLUSIVE,
+        required_one_of=REQUIRED_ONE_OF,
+        supports_check_mode=True
+    )
+
+    warnings = list()
+
+    result = {'changed': False}
+
+    if warnings:
+        result['warnings'] = warnings
+
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
+
+    result['commands'] = commands
+
+    if commands:
+        if not module.check_mode:
+            load_config(module, commands)
+
+        result['changed'] = True
+
+    add_connection_stats(module, result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: apcos_datalog
+author: "Matt Haught (@haught)"
+short_description: Collect the data log from APC OS devices.
+description:
+  - This module reads the data log of APC UPS NMC systems, parses it
+    into typed columns and returns summary statistics per column.
+  - When I(cursor_path) is set, only rows newer than the previous run
+    are parsed and returned.
+  - When I(dest) is set, the new rows are appended to a columnar file
+    on the controller.
+notes:
+  - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
+  - APC NMC v2 cards running AOS <= v6.8.2 and APC
+    NMC v3 cards running AOS < v1.4.2.1 have a bug that
+    stalls output and will not work with ansible
+  - Only the rows shown on the first page of the data
+    command are read.
+requirements:
+  - numpy (optional, required for I(format=npz))
+options:
+  cursor_path:
+    description:
+      - Path on the controller of the cursor file for this device.
+        Use a separate file per device, for example by templating in
+        C(inventory_hostname).
+      - If not set, every row read is returned.
+    type: path
+  dest:
+    description:
+      - Path on the controller of the columnar file the new rows are
+        appended to. Use a separate file per device.
+      - The task fails without writing when the card reports a column
+        that is not in the header of an existing C(csv) file, rather
+        than dropping it.
+    type: path
+  format:
+    description:
+      - Format of I(dest). C(npz) is a compressed NumPy archive with one
+        array per column, C(csv) is a gzip compressed CSV file.
+      - C(auto) uses C(npz) when numpy is installed and C(csv) otherwise.
+    type: str
+    choices: ['auto', 'npz', 'csv']
+    default: auto
+'''
+
+EXAMPLES = """
+- name: Append new data log rows to a per host archive
+  haught.apcos.apcos_datalog:
+    cursor_path: "{{ playbook_dir }}/cursors/{{ inventory_hostname }}-data.json"
+    dest: "{{ playbook_dir }}/datalog/{{ inventory_hostname }}.npz"
+  register: datalog
+"""
+
+RETURN = """
+columns:
+  description: The value columns of the data log
+  returned: always
+  type: list
+  sample: ['vmin', 'vmax', 'vout', 'wout', 'iout', 'freq', 'cap', 'vbat', 'tupsc']
+rows:
+  description: The number of new rows read
+  returned: always
+  type: int
+  sample: 12
+stats:
+  description: The min, max, mean and 95th percentile of every column over the new rows
+  returned: always
+  type: dict
+  sample:
+    cap:
+      min: 98.0
+      max: 100.0
+      mean: 99.5
+      p95: 100.0
+cursor:
+  description: The cursor after this run
+  returned: always
+  type: dict
+  sample:
+    timestamp: "2021-03-26T16:00:00"
+    hashes: ['0f0c6b1cd5b7ac49']
+dest:
+  description: The columnar file the rows were appended to
+  returned: when I(dest) is set
+  type: str
+  sample: /srv/datalog/ups01.npz
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
+"""
+
+import csv
+import gzip
+import io
+import os
+import re
+import tempfile
+
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ansible.module_utils._text import to_text
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import (
+    run_commands,
+    parse_log_timestamp,
+    filter_log_entries,
+    log_cursor,
+    read_state,
+    write_state,
+    add_timing,
+)
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+COMMAND = {
+    'command': 'data',
+    'prompt': r'<ESC>- Exit',
+    'answer': '\x1b',
+}
+
+
+def to_number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_datalog(output):
+    columns = None
+    rows = []
+    for line in output.split('\n'):
+        line_parts = line.split()
+        if len(line_parts) < 3:
+            continue
+        if line_parts[0] == 'Date' and line_parts[1] == 'Time':
+            columns = [column.lower() for column in line_parts[2:]]
+            continue
+        if columns is None or not re.match(r'^\d{1,2}:\d{2}:\d{2}$', line_parts[1]):
+            continue
+        timestamp = parse_log_timestamp(line_parts[0], line_parts[1])
+        if timestamp is None:
+            continue
+        row = {'timestamp': timestamp}
+        for column, value in zip(columns, line_parts[2:]):
+            row[column] = to_number(value)
+        rows.append(row)
+    return columns or [], rows
+
+
+def percentile(values, percent):
+    position = (len(values) - 1) * percent / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def column_stats(columns, rows):
+    stats = {}
+    for column in columns:
+        if HAS_NUMPY:
+            values = np.array([row.get(column) for row in rows], dtype=float)
+            values = values[~np.isnan(values)]
+            if values.size == 0:
+                continue
+            stats[column] = {
+                'min': float(values.min()),
+                'max': float(values.max()),
+                'mean': float(values.mean()),
+                'p95': float(np.percentile(values, 95)),
+            }
+        else:
+            values = sorted(row[column] for row in rows if row.get(column) is not None)
+            if not values:
+                continue
+            stats[column] = {
+                'min': values[0],
+                'max': values[-1],
+                'mean': sum(values) / len(values),
+                'p95': percentile(values, 95),
+            }
+    return stats
+
+
+def write_npz(dest, columns, rows):
+    arrays = {}
+    if os.path.exists(dest):
+        with np.load(dest) as archive:
+            arrays = dict((name, archive[name]) for name in archive.files)
+    existing = len(arrays['timestamp']) if 'timestamp' in arrays else 0
+    arrays['timestamp'] = np.concatenate([
+        arrays.get('timestamp', np.array([], dtype='U19')),
+        np.array([row['timestamp'] for row in rows], dtype='U19'),
+    ])
+    for column in set(columns) | (set(arrays) - set(['timestamp'])):
+        arrays[column] = np.concatenate([
+            arrays.get(column, np.full(existing, np.nan)),
+            np.array([row.get(column) for row in rows], dtype=float),
+        ])
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), prefix='.apcos-')
+    with os.fdopen(fd, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.rename(tmp_path, dest)
+
+
+def write_csv(dest, columns, rows):
+    header = None
+    if os.path.exists(dest):
+        with gzip.open(dest, 'rt') as f:
+            header = next(csv.reader(f), None)
+    if header is not None:
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError('%s has no column for %s, write the rows to a new file'
+                             % (dest, ', '.join(missing)))
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header is None:
+        header = ['timestamp'] + columns
+        writer.writerow(header)
+    for row in rows:
+        writer.writerow(['' if row.get(column) is None else row[column] for column in header])
+    with gzip.open(dest, 'at') as f:
+        f.write(buf.getvalue())
+
+
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        cursor_path=dict(type='path'),
+        dest=dict(type='path'),
+        format=dict(type='str', choices=['auto', 'npz', 'csv'], default='auto'),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    file_format = module.params['format']
+    if file_format == 'auto':
+        file_format = 'npz' if HAS_NUMPY else 'csv'
+    if file_format == 'npz' and not HAS_NUMPY:
+        module.fail_json(msg=missing_required_lib('numpy'))
+
+    result = {'changed': False}
+
+    cursor_path = module.params['cursor_path']
+    cursor = read_state(cursor_path)
+
+    columns, rows = parse_datalog(run_commands(module, [COMMAND])[0])
+    rows = filter_log_entries(rows, cursor)
+    cursor = log_cursor(rows, cursor)
+
+    dest = module.params['dest']
+    if dest:
+        result['dest'] = dest
+        if rows:
+            if not module.check_mode:
+                directory = os.path.dirname(os.path.abspath(dest))
+                if not os.path.isdir(directory):
+                    os.makedirs(directory)
+                if file_format == 'npz':
+                    write_npz(dest, columns, rows)
+                else:
+                    try:
+                        write_csv(dest, columns, rows)
+                    except ValueError as exc:
+                        module.fail_json(msg=to_text(exc))
+            result['changed'] = True
+
+    if cursor_path and rows and not module.check_mode:
+        write_state(cursor_path, cursor)
+
+    result['columns'] = columns
+    result['rows'] = len(rows)
+    result['stats'] = column_stats(columns, rows)
+    result['cursor'] = cursor
+
+    add_timing(module, result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
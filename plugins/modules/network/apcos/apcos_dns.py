@@ -15,6 +15,8 @@ short_description: Manage dns configuration on APC OS devices.
 description:
   - This module provides declarative management of APC UPS dns
     configuration on APC OS NMC systems.
+extends_documentation_fragment:
+  - haught.apcos.apcos
 notes:
   - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
   - APC NMC v2 cards running AOS <= v6.8.2 and APC
@@ -69,6 +71,41 @@ commands:
   type: list
   sample:
     - dns -n ups001
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -76,14 +113,33 @@ from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos i
     load_config,
     get_config,
     parse_config,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
 )
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
 
 SOURCE = "dns"
+SCHEMA = get_schema(SOURCE)
+
+ARGUMENT_SPEC = dict(
+    primaryserver=dict(type='str'),
+    secondaryserver=dict(type='str'),
+    domainname=dict(type='str'),
+    domainnameipv6=dict(type='str'),
+    hostname=dict(type='str'),
+    systemnamesync=dict(type='bool'),
+    overridemanual=dict(type='bool')
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
 
 
 def build_commands(module):
     commands = []
-    config = parse_config(get_config(module, source=SOURCE))
+    config = parse_config(get_config(module, source=SOURCE), SCHEMA)
     if module.params['primaryserver']:
         if config['primarydnsserver'] != module.params['primaryserver']:
             commands.append(SOURCE + ' -p ' + module.params['primaryserver'])
@@ -100,14 +156,14 @@ def build_commands(module):
         if config['hostname'] != module.params['hostname']:
             commands.append(SOURCE + ' -h ' + module.params['hostname'])
     if module.params['systemnamesync'] is not None:
-        if config['systemnamesync'].lower() == "disabled" and module.params['systemnamesync'] is True:
+        if config['systemnamesync'] is False and module.params['systemnamesync'] is True:
             commands.append(SOURCE + ' -y enable')
-        elif config['systemnamesync'].lower() == "enabled" and module.params['systemnamesync'] is False:
+        elif config['systemnamesync'] is True and module.params['systemnamesync'] is False:
             commands.append(SOURCE + ' -y disable')
     if module.params['overridemanual'] is not None:
-        if config['overridemanualdnssettings'].lower() == "disabled" and module.params['overridemanual'] is True:
+        if config['overridemanualdnssettings'] is False and module.params['overridemanual'] is True:
             commands.append(SOURCE + ' -OM enable')
-        elif config['overridemanualdnssettings'].lower() == "enabled" and module.params['overridemanual'] is False:
+        elif config['overridemanualdnssettings'] is True and module.params['overridemanual'] is False:
             commands.append(SOURCE + ' -OM disable')
     return commands
 
@@ -115,18 +171,8 @@ def build_commands(module):
 def main():
     """ main entry point for module execution
     """
-    argument_spec = dict(
-        primaryserver=dict(type='str'),
-        secondaryserver=dict(type='str'),
-        domainname=dict(type='str'),
-        domainnameipv6=dict(type='str'),
-        hostname=dict(type='str'),
-        systemnamesync=dict(type='bool'),
-        overridemanual=dict(type='bool')
-    )
-
     module = AnsibleModule(
-        argument_spec=argument_spec,
+        argument_spec=ARGUMENT_SPEC,
         supports_check_mode=True
     )
 
@@ -137,7 +183,11 @@ def main():
     if warnings:
         result['warnings'] = warnings
 
-    commands = build_commands(module)
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
 
     result['commands'] = commands
 
@@ -147,6 +197,8 @@ def main():
 
         result['changed'] = True
 
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
@@ -0,0 +1,194 @@
+#!/usr/bin/python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: apcos_drift
+author: "Matt Haught (@haught)"
+short_description: Report drift from a golden profile on APC OS devices.
+description:
+  - This module compares the settings of APC UPS NMC systems with a
+    golden profile covering any number of configuration sources and
+    returns only the keys that differ, plus a drift score.
+  - Every source in the profile is read in one batch. Nothing is changed
+    on the device.
+  - Use the C(haught.apcos.apcos_drift) callback plugin to collect the
+    results of a whole fleet into a JSONL file.
+notes:
+  - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
+  - APC NMC v2 cards running AOS <= v6.8.2 and APC
+    NMC v3 cards running AOS < v1.4.2.1 have a bug that
+    stalls output and will not work with ansible
+options:
+  profile:
+    description:
+      - Golden profile. A dictionary of configuration sources, such as
+        C(dns) or C(system), to the expected settings of that source.
+      - Settings are named like the lines of the source output in lower
+        case without spaces, for example C(primarydnsserver) for
+        C(Primary DNS Server). Values are compared the same way the
+        configuration modules compare them, so C(true) matches
+        C(enabled) and C(300) matches C(5 Minutes) for durations.
+      - For sources listing numbered entries, such as C(snmptrap), use
+        the entry index as key and a dictionary of settings as value.
+    type: dict
+    required: true
+'''
+
+EXAMPLES = """
+- name: Check for drift from the golden settings
+  haught.apcos.apcos_drift:
+    profile:
+      dns:
+        primarydnsserver: "10.1.1.1"
+        domainname: "example.net"
+      ntp:
+        ntpstatus: true
+        primaryntpserver: "10.1.1.2"
+      web:
+        http: false
+        https: true
+      snmptrap:
+        1:
+          receiverip: "10.1.1.10"
+          generation: true
+  register: drift
+"""
+
+RETURN = """
+drift:
+  description: The settings that differ from the profile, by source
+  returned: always
+  type: dict
+  sample:
+    dns:
+      primarydnsserver:
+        expected: "10.1.1.1"
+        actual: "1.1.1.1"
+    snmptrap:
+      "1.generation":
+        expected: true
+        actual: false
+drifted:
+  description: The number of settings that differ from the profile
+  returned: always
+  type: int
+  sample: 2
+score:
+  description: The fraction of the settings in the profile that differ, from 0.0 to 1.0
+  returned: always
+  type: float
+  sample: 0.25
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six import string_types
+from ansible.module_utils._text import to_text
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import (
+    get_configs,
+    parse_config,
+    parse_config_indexed,
+    add_timing,
+)
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema, INDEXES
+
+
+def expected_value(schema, key, value):
+    if key in schema:
+        if isinstance(value, string_types):
+            return schema[key](value)
+        return value
+    if isinstance(value, string_types):
+        return value
+    return to_text(value)
+
+
+def compare_settings(expected, config, schema, prefix=''):
+    drift = {}
+    for key, value in expected.items():
+        key = to_text(key).lower().replace(' ', '')
+        value = expected_value(schema, key, value)
+        if config.get(key) != value:
+            drift[prefix + key] = {'expected': value, 'actual': config.get(key)}
+    return drift
+
+
+def is_indexed(settings):
+    return bool(settings) and all(to_text(key).isdigit() for key in settings)
+
+
+def check_source(source, settings, output):
+    schema = get_schema(source.split()[0])
+    if not is_indexed(settings):
+        return compare_settings(settings, parse_config(output, schema), schema), len(settings)
+    entries = {}
+    for section, index_name in INDEXES.get(source.split()[0], ((None, 'Index'),)):
+        for index, entry in parse_config_indexed(output, section, index_name, schema).items():
+            entries.setdefault(index, {}).update(entry)
+    drift = {}
+    count = 0
+    for index, expected in settings.items():
+        drift.update(compare_settings(expected or {}, entries.get(int(index), {}), schema, '%s.' % index))
+        count += len(expected or {})
+    return drift, count
+
+
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        profile=dict(type='dict', required=True),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    profile = module.params['profile']
+    for source, settings in profile.items():
+        if not isinstance(settings, dict):
+            module.fail_json(msg='the settings of source %s must be a dictionary' % source)
+
+    result = {'changed': False}
+
+    sources = sorted(profile)
+    drift = {}
+    total = 0
+    for source, output in zip(sources, get_configs(module, sources)):
+        source_drift, count = check_source(source, profile[source], output)
+        if source_drift:
+            drift[source] = source_drift
+        total += count
+
+    drifted = sum(len(source_drift) for source_drift in drift.values())
+
+    result['drift'] = drift
+    result['drifted'] = drifted
+    result['score'] = round(float(drifted) / total, 4) if total else 0.0
+
+    add_timing(module, result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
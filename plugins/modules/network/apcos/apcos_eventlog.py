@@ -0,0 +1,144 @@
+#!/usr/bin/python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: apcos_eventlog
+author: "Matt Haught (@haught)"
+short_description: Collect event log entries from APC OS devices.
+description:
+  - This module reads the event log of APC UPS NMC systems and returns
+    the entries as parsed records.
+  - When I(cursor_path) is set, a cursor describing the newest entry
+    returned is kept on the controller and only entries newer than the
+    cursor are returned on the next run.
+notes:
+  - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
+  - APC NMC v2 cards running AOS <= v6.8.2 and APC
+    NMC v3 cards running AOS < v1.4.2.1 have a bug that
+    stalls output and will not work with ansible
+  - Only the entries shown on the first page of the eventlog
+    command are read, so collect often enough that new entries
+    fit on one page.
+options:
+  cursor_path:
+    description:
+      - Path on the controller of the cursor file for this device.
+        Use a separate file per device, for example by templating in
+        C(inventory_hostname).
+      - If not set, every entry read is returned.
+    type: path
+'''
+
+EXAMPLES = """
+- name: Collect new event log entries
+  haught.apcos.apcos_eventlog:
+    cursor_path: "{{ playbook_dir }}/cursors/{{ inventory_hostname }}.json"
+  register: eventlog
+"""
+
+RETURN = """
+entries:
+  description: The event log entries newer than the cursor, oldest first
+  returned: always
+  type: list
+  sample:
+    - timestamp: "2021-03-26T16:04:38"
+      event: "System: Configuration change. SNMPv3 settings."
+      code: "0x0021"
+cursor:
+  description: The cursor after this run
+  returned: always
+  type: dict
+  sample:
+    timestamp: "2021-03-26T16:04:38"
+    hashes: ['0f0c6b1cd5b7ac49']
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
+"""
+
+import re
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import (
+    run_commands,
+    parse_log_timestamp,
+    filter_log_entries,
+    log_cursor,
+    read_state,
+    write_state,
+    add_timing,
+)
+
+COMMAND = {
+    'command': 'eventlog',
+    'prompt': r'<ESC>- Exit',
+    'answer': '\x1b',
+}
+
+
+def parse_eventlog(output):
+    entries = []
+    for line in output.split('\n'):
+        line_parts = re.match(r'^(\S+)\s+(\d{1,2}:\d{2}:\d{2})\s+(.+?)(?:\s+(0x[0-9A-Fa-f]{4}))?\s*$', line)
+        if hasattr(line_parts, 'group'):
+            timestamp = parse_log_timestamp(line_parts.group(1), line_parts.group(2))
+            if timestamp is None:
+                continue
+            entries.append({
+                'timestamp': timestamp,
+                'event': line_parts.group(3),
+                'code': line_parts.group(4),
+            })
+    return entries
+
+
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        cursor_path=dict(type='path'),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    result = {'changed': False}
+
+    cursor_path = module.params['cursor_path']
+    cursor = read_state(cursor_path)
+
+    entries = filter_log_entries(parse_eventlog(run_commands(module, [COMMAND])[0]), cursor)
+    cursor = log_cursor(entries, cursor)
+
+    if cursor_path and entries and not module.check_mode:
+        write_state(cursor_path, cursor)
+
+    result['entries'] = entries
+    result['cursor'] = cursor
+
+    add_timing(module, result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
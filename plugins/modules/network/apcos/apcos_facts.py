@@ -0,0 +1,273 @@
+#!/usr/bin/python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: apcos_facts
+author: "Matt Haught (@haught)"
+short_description: Collect facts from APC OS devices.
+description:
+  - This module collects the device information and a snapshot of the
+    configuration sources of APC UPS NMC systems as facts.
+  - The configuration sources are read in one batch and kept as the raw
+    output of each source. The configuration modules diff against this
+    snapshot on the controller while it is younger than
+    I(ansible_apcos_config_max_age) seconds, and only connect to the
+    device when there is something to change.
+  - With I(snmp) the device information and UPS status are read with
+    SNMP GET requests instead of the CLI, which is much faster than
+    logging in. Values the card does not answer over SNMP are read from
+    the CLI. The configuration snapshot is always read from the CLI.
+extends_documentation_fragment:
+  - haught.apcos.apcos.snmp
+notes:
+  - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
+  - APC NMC v2 cards running AOS <= v6.8.2 and APC
+    NMC v3 cards running AOS < v1.4.2.1 have a bug that
+    stalls output and will not work with ansible
+options:
+  gather_subset:
+    description:
+      - Restrict the facts collected to the given subsets. Possible
+        values are C(all), C(default) for the device information,
+        C(config) for the configuration snapshot and C(status) for the
+        UPS status. A value prefixed with
+        C(!) excludes that subset. When only exclusions are given, every
+        other subset is collected.
+    type: list
+    elements: str
+    default: ['all']
+  sources:
+    description:
+      - Configuration sources kept in the snapshot, each optionally
+        followed by flags, for example C(user -n apc).
+      - Defaults to the sources read by the configuration modules.
+    type: list
+    elements: str
+'''
+
+EXAMPLES = """
+- name: Collect all facts
+  haught.apcos.apcos_facts:
+
+- name: Read the device information and UPS status over SNMP
+  haught.apcos.apcos_facts:
+    gather_subset: '!config'
+    snmp:
+      community: "{{ snmp_community }}"
+
+- name: Snapshot the sources of the accounts managed below
+  haught.apcos.apcos_facts:
+    gather_subset: config
+    sources:
+      - system
+      - user -l
+      - user -n apc
+"""
+
+RETURN = """
+ansible_net_gather_subset:
+  description: The list of fact subsets collected from the device
+  returned: always
+  type: list
+ansible_net_firmware:
+  description: The APC OS version running on the card
+  returned: when default is gathered
+  type: str
+ansible_net_hostname:
+  description: The host name of the device, the system name when read over SNMP
+  returned: when default is gathered
+  type: str
+ansible_net_model:
+  description: The model number of the card
+  returned: when default is gathered
+  type: str
+ansible_net_version:
+  description: The hardware revision of the card
+  returned: when default is gathered
+  type: str
+ansible_net_ups_status:
+  description: The output status of the UPS
+  returned: when status is gathered
+  type: str
+  sample: On Line
+ansible_net_battery_capacity:
+  description: The remaining battery capacity in percent
+  returned: when status is gathered
+  type: float
+  sample: 100.0
+ansible_net_runtime_remaining:
+  description: The runtime remaining on battery in seconds
+  returned: when status is gathered
+  type: int
+  sample: 7500
+ansible_net_config:
+  description: The raw output of every configuration source read, by source
+  returned: when config is gathered
+  type: dict
+  sample:
+    dns: "E000: Success\\nPrimary DNS Server:\\t1.1.1.1\\n..."
+ansible_net_config_time:
+  description: The time the configuration sources were read, in seconds since the epoch
+  returned: when config is gathered
+  type: float
+  sample: 1616775878.2
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
+"""
+
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import (
+    get_connection,
+    get_configs,
+    parse_config,
+    run_commands,
+    add_timing,
+)
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp import (
+    snmp_argument_spec,
+    read_snmp,
+    parse_sys_descr,
+    OUTPUT_STATUS,
+)
+
+SUBSETS = ('default', 'config', 'status')
+
+# Sources read by the configuration modules
+DEFAULT_SOURCES = ['dns', 'ftp', 'ntp', 'radius', 'smtp', 'snmp', 'snmptrap',
+                   'snmpv3', 'system', 'user -l', 'web']
+
+DEVICE_INFO_FACTS = {
+    'network_os_firmware': 'firmware',
+    'network_os_hostname': 'hostname',
+    'network_os_model': 'model',
+    'network_os_version': 'version',
+}
+
+STATUS_COMMAND = 'detstatus -all'
+
+STATUS_FACTS = {
+    'statusofups': 'ups_status',
+    'batterycapacity': 'battery_capacity',
+    'runtimeremaining': 'runtime_remaining',
+}
+
+
+def gather_subsets(module):
+    subsets = set()
+    excluded = set()
+    for subset in module.params['gather_subset']:
+        exclude = subset.startswith('!')
+        subset = subset.lstrip('!')
+        if subset == 'all':
+            names = set(SUBSETS)
+        elif subset in SUBSETS:
+            names = set([subset])
+        else:
+            module.fail_json(msg='Subset must be one of [%s], got %s' % (', '.join(('all',) + SUBSETS), subset))
+        if exclude:
+            excluded.update(names)
+        else:
+            subsets.update(names)
+    if not subsets:
+        subsets = set(SUBSETS)
+    return sorted(subsets - excluded)
+
+
+def device_info_facts(module, values):
+    device_info = parse_sys_descr(values.get('sysdescr'))
+    if 'name' in values:
+        device_info['network_os_hostname'] = values['name']
+    if any(key not in device_info for key in DEVICE_INFO_FACTS):
+        device_info = dict(get_connection(module).get_device_info(), **device_info)
+    facts = {}
+    for key, fact in DEVICE_INFO_FACTS.items():
+        if key in device_info:
+            facts['ansible_net_%s' % fact] = device_info[key]
+    return facts
+
+
+def status_facts(values, status=None):
+    status = dict(status or {})
+    if 'statusofups' in values:
+        status['statusofups'] = OUTPUT_STATUS.get(values['statusofups'], str(values['statusofups']))
+    if 'batterycapacity' in values:
+        status['batterycapacity'] = float(values['batterycapacity'])
+    if 'runtimeremaining' in values:
+        # TimeTicks are hundredths of a second
+        status['runtimeremaining'] = values['runtimeremaining'] // 100
+    if isinstance(status.get('statusofups'), str):
+        status['statusofups'] = status['statusofups'].split(',')[0].strip()
+    facts = {}
+    for key, fact in STATUS_FACTS.items():
+        if key in status:
+            facts['ansible_net_%s' % fact] = status[key]
+    return facts
+
+
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        gather_subset=dict(type='list', elements='str', default=['all']),
+        sources=dict(type='list', elements='str'),
+    )
+    argument_spec.update(snmp_argument_spec)
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    subsets = gather_subsets(module)
+    facts = {'ansible_net_gather_subset': subsets}
+
+    names = []
+    if 'default' in subsets:
+        names.extend(['sysdescr', 'name'])
+    if 'status' in subsets:
+        names.extend(sorted(STATUS_FACTS))
+    values = read_snmp(module, names)
+
+    if 'default' in subsets:
+        facts.update(device_info_facts(module, values))
+
+    if 'status' in subsets:
+        status = {}
+        if any(key not in values for key in STATUS_FACTS):
+            output = run_commands(module, [{'command': STATUS_COMMAND, 'prompt': None, 'answer': None}])[0]
+            status = parse_config(output, get_schema('detstatus'))
+        facts.update(status_facts(values, status))
+
+    if 'config' in subsets:
+        sources = [' '.join(source.split()) for source in module.params['sources'] or DEFAULT_SOURCES]
+        facts['ansible_net_config_time'] = time.time()
+        facts['ansible_net_config'] = dict(zip(sources, get_configs(module, sources)))
+
+    result = {'ansible_facts': facts, 'changed': False}
+    add_timing(module, result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,8 @@ short_description: Manage FTP configuration on APC OS devices.
 description:
   - This module provides declarative management of APC FTP
     configuration on APC UPS NMC systems.
+extends_documentation_fragment:
+  - haught.apcos.apcos
 notes:
   - Tested APC NMC v3 (AP9641) running APC OS v2.2.1.1
   - APC NMC v2 cards running AOS <= v6.8.2 and APC
@@ -44,6 +46,41 @@ commands:
   type: list
   sample:
     - ftp -S enable
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -51,21 +88,35 @@ from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos i
     load_config,
     get_config,
     parse_config,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
 )
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
 
 SOURCE = "ftp"
+SCHEMA = get_schema(SOURCE)
+
+ARGUMENT_SPEC = dict(
+    enable=dict(type='bool'),
+    port=dict(type='int')
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
 
 
 def build_commands(module):
     commands = []
-    config = parse_config(get_config(module, source=SOURCE))
+    config = parse_config(get_config(module, source=SOURCE), SCHEMA)
     if module.params['enable'] is not None:
-        if config['service'].lower() == "disabled" and module.params['enable'] is True:
+        if config['service'] is False and module.params['enable'] is True:
             commands.append(SOURCE + ' -S enable')
-        elif config['service'].lower() == "enabled" and module.params['enable'] is False:
+        elif config['service'] is True and module.params['enable'] is False:
             commands.append(SOURCE + ' -S disable')
     if module.params['port'] is not None:
-        if config['ftpport'] != str(module.params['port']):
+        if config['ftpport'] != module.params['port']:
             commands.append(SOURCE + ' -p ' + str(module.params['port']))
     return commands
 
@@ -73,13 +124,8 @@ def build_commands(module):
 def main():
     """ main entry point for module execution
     """
-    argument_spec = dict(
-        enable=dict(type='bool'),
-        port=dict(type='int')
-    )
-
     module = AnsibleModule(
-        argument_spec=argument_spec,
+        argument_spec=ARGUMENT_SPEC,
         supports_check_mode=True
     )
 
@@ -90,8 +136,11 @@ def main():
     if warnings:
         result['warnings'] = warnings
 
-    commands = []
-    commands = build_commands(module)
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
 
     result['commands'] = commands
 
@@ -101,6 +150,8 @@ def main():
 
         result['changed'] = True
 
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
@@ -15,6 +15,8 @@ short_description: Manage ntp configuration on APC OS devices.
 description:
   - This module provides declarative management of APC ntp
     configuration on APC UPS NMC systems.
+extends_documentation_fragment:
+  - haught.apcos.apcos
 notes:
   - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
   - APC NMC v2 cards running AOS <= v6.8.2 and APC
@@ -58,6 +60,41 @@ commands:
   type: list
   sample:
     - ntp -a ntplocal
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -65,19 +102,35 @@ from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos i
     load_config,
     get_config,
     parse_config,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
 )
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
 
 SOURCE = "ntp"
+SCHEMA = get_schema(SOURCE)
+
+ARGUMENT_SPEC = dict(
+    enable=dict(type='bool'),
+    primaryserver=dict(type='str'),
+    secondaryserver=dict(type='str'),
+    overridemanual=dict(type='bool')
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
 
 
 def build_commands(module):
     commands = []
     commands = []
-    config = parse_config(get_config(module, source=SOURCE))
+    config = parse_config(get_config(module, source=SOURCE), SCHEMA)
     if module.params['enable'] is not None:
-        if config['ntpstatus'].lower() == "disabled" and module.params['enable'] is True:
+        if config['ntpstatus'] is False and module.params['enable'] is True:
             commands.append(SOURCE + ' -e enable')
-        elif config['ntpstatus'].lower() == "enabled" and module.params['enable'] is False:
+        elif config['ntpstatus'] is True and module.params['enable'] is False:
             commands.append(SOURCE + ' -e disable')
     if module.params['primaryserver']:
         if config['primaryntpserver'] != module.params['primaryserver']:
@@ -86,9 +139,9 @@ def build_commands(module):
         if config['secondaryntpserver'] != module.params['secondaryserver']:
             commands.append(SOURCE + ' -s ' + module.params['secondaryserver'])
     if module.params['overridemanual'] is not None:
-        if config['overridemanualntpsettings'].lower() == "disabled" and module.params['overridemanual'] is True:
+        if config['overridemanualntpsettings'] is False and module.params['overridemanual'] is True:
             commands.append(SOURCE + ' -OM enable')
-        elif config['overridemanualntpsettings'].lower() == "enabled" and module.params['overridemanual'] is False:
+        elif config['overridemanualntpsettings'] is True and module.params['overridemanual'] is False:
             commands.append(SOURCE + ' -OM disable')
     return commands
 
@@ -96,15 +149,8 @@ def build_commands(module):
 def main():
     """ main entry point for module execution
     """
-    argument_spec = dict(
-        enable=dict(type='bool'),
-        primaryserver=dict(type='str'),
-        secondaryserver=dict(type='str'),
-        overridemanual=dict(type='bool')
-    )
-
     module = AnsibleModule(
-        argument_spec=argument_spec,
+        argument_spec=ARGUMENT_SPEC,
         supports_check_mode=True
     )
 
@@ -115,13 +161,19 @@ def main():
     if warnings:
         result['warnings'] = warnings
 
-    commands = build_commands(module)
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
     result['commands'] = commands
 
     if commands:
         if not module.check_mode:
             load_config(module, commands)
         result['changed'] = True
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
@@ -15,6 +15,9 @@ short_description: Manage radius configuration on APC OS devices.
 description:
   - This module provides declarative management of APC radius
     configuration on APC UPS NMC systems.
+extends_documentation_fragment:
+  - haught.apcos.apcos
+  - haught.apcos.apcos.secret_store
 notes:
   - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
   - APC NMC v2 cards running AOS <= v6.8.2 and APC
@@ -85,6 +88,41 @@ commands:
   type: list
   sample:
     - radius -a radiuslocal
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -92,51 +130,74 @@ from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos i
     load_config,
     get_config,
     parse_config,
+    secret_changed,
+    remember_secret,
+    save_secrets,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
 )
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
 
 SOURCE = "radius"
+SCHEMA = get_schema(SOURCE)
+
+ARGUMENT_SPEC = dict(
+    access=dict(type='str', choices=['local', 'radiuslocal', 'radius']),
+    primaryserver=dict(type='str'),
+    primaryport=dict(type='int'),
+    primarysecret=dict(type='str', no_log=True),
+    primarytimeout=dict(type='int'),
+    secondaryserver=dict(type='str'),
+    secondaryport=dict(type='int'),
+    secondarysecret=dict(type='str', no_log=True),
+    secondarytimeout=dict(type='int'),
+    forcepwchange=dict(type='bool', default=False),
+    secret_store=dict(type='path')
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
 
 
 def build_commands(module):
     commands = []
-    config = parse_config(get_config(module, source=SOURCE))
+    config = parse_config(get_config(module, source=SOURCE), SCHEMA)
     if module.params['access']:
-        if module.params['access'] == 'local':
-            if config['access'] != 'Local Only':
-                commands.append(SOURCE + ' -a ' + module.params['access'])
-        elif module.params['access'] == 'radiuslocal':
-            if config['access'] != 'RADIUS, then Local':
-                commands.append(SOURCE + ' -a ' + module.params['access'])
-        elif module.params['access'] == 'radius':
-            if config['access'] != 'RADIUS Only':
-                commands.append(SOURCE + ' -a ' + module.params['access'])
-    if module.params['primaryserver'] or module.params['forcepwchange'] is True:
+        if config['access'] != module.params['access']:
+            commands.append(SOURCE + ' -a ' + module.params['access'])
+    force_primary = module.params['forcepwchange'] is True or secret_changed(module, 'primarysecret', module.params['primarysecret'])
+    if module.params['primaryserver'] or force_primary:
         if module.params['primaryserver']:
             if config['primaryserver'] != module.params['primaryserver']:
                 commands.append(SOURCE + ' -p1 ' + module.params['primaryserver'])
-        if config['primaryserver'] != module.params['primaryserver'] or module.params['forcepwchange'] is True:
+        if config['primaryserver'] != module.params['primaryserver'] or force_primary:
             if module.params['primarysecret']:
                 if config['primaryserversecret'] != module.params['primarysecret']:
                     commands.append(SOURCE + ' -s1 ' + module.params['primarysecret'])
+                    remember_secret(module, 'primarysecret', module.params['primarysecret'])
     if module.params['primaryport']:
-        if config['primaryserverport'] != str(module.params['primaryport']):
+        if config['primaryserverport'] != module.params['primaryport']:
             commands.append(SOURCE + ' -o1 ' + str(module.params['primaryport']))
     if module.params['primarytimeout']:
-        if config['primaryservertimeout'] != str(module.params['primarytimeout']):
+        if config['primaryservertimeout'] != module.params['primarytimeout']:
             commands.append(SOURCE + ' -t1 ' + str(module.params['primarytimeout']))
-    if module.params['secondaryserver'] or module.params['forcepwchange'] is True:
+    force_secondary = module.params['forcepwchange'] is True or secret_changed(module, 'secondarysecret', module.params['secondarysecret'])
+    if module.params['secondaryserver'] or force_secondary:
         if module.params['secondaryserver']:
             if config['secondaryserver'] != module.params['secondaryserver']:
                 commands.append(SOURCE + ' -p2 ' + module.params['secondaryserver'])
-        if config['secondaryserver'] != module.params['secondaryserver'] or module.params['forcepwchange'] is True:
+        if config['secondaryserver'] != module.params['secondaryserver'] or force_secondary:
             if module.params['secondarysecret']:
                 if config['secondaryserversecret'] != module.params['secondarysecret']:
                     commands.append(SOURCE + ' -s2 ' + module.params['secondarysecret'])
+                    remember_secret(module, 'secondarysecret', module.params['secondarysecret'])
     if module.params['secondaryport']:
-        if config['secondaryserverport'] != str(module.params['secondaryport']):
+        if config['secondaryserverport'] != module.params['secondaryport']:
             commands.append(SOURCE + ' -o2 ' + str(module.params['secondaryport']))
     if module.params['secondarytimeout']:
-        if config['secondaryservertimeout'] != str(module.params['secondarytimeout']):
+        if config['secondaryservertimeout'] != module.params['secondarytimeout']:
             commands.append(SOURCE + ' -t2 ' + str(module.params['secondarytimeout']))
     return commands
 
@@ -144,21 +205,8 @@ def build_commands(module):
 def main():
     """ main entry point for module execution
     """
-    argument_spec = dict(
-        access=dict(type='str', choices=['local', 'radiuslocal', 'radius']),
-        primaryserver=dict(type='str'),
-        primaryport=dict(type='int'),
-        primarysecret=dict(type='str', no_log=True),
-        primarytimeout=dict(type='int'),
-        secondaryserver=dict(type='str'),
-        secondaryport=dict(type='int'),
-        secondarysecret=dict(type='str', no_log=True),
-        secondarytimeout=dict(type='int'),
-        forcepwchange=dict(type='bool', default=False)
-    )
-
     module = AnsibleModule(
-        argument_spec=argument_spec,
+        argument_spec=ARGUMENT_SPEC,
         supports_check_mode=True
     )
 
@@ -169,17 +217,23 @@ def main():
     if warnings:
         result['warnings'] = warnings
 
-    commands = []
-    commands = build_commands(module)
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
 
     result['commands'] = commands
 
     if commands:
         if not module.check_mode:
             load_config(module, commands)
+            save_secrets(module)
 
         result['changed'] = True
 
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
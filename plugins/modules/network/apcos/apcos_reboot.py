@@ -0,0 +1,230 @@
+#!/usr/bin/python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: apcos_reboot
+author: "Matt Haught (@haught)"
+short_description: Reboot APC OS devices and wait for them to return.
+description:
+  - This module reboots the network management card of APC UPS NMC
+    systems and waits until it is back.
+  - After the reboot is confirmed the module polls the ssh port every
+    I(interval) seconds until it closes, so a quick reboot is not missed,
+    then polls it with exponential backoff until it opens again or the
+    deadline passes. It then reconnects and runs C(about) to
+    confirm the card restarted.
+  - Only the network management card is rebooted, the UPS keeps
+    powering its load.
+notes:
+  - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
+  - APC NMC v2 cards running AOS <= v6.8.2 and APC
+    NMC v3 cards running AOS < v1.4.2.1 have a bug that
+    stalls output and will not work with ansible
+options:
+  timeout:
+    description:
+      - Maximum number of seconds to wait for the card to come back,
+        counted from the reboot.
+    type: int
+    default: 600
+  interval:
+    description:
+      - Number of seconds between two polls while waiting for the ssh
+        port to close.
+      - Number of seconds to wait after the first failed poll while
+        waiting for the card to come back. The wait doubles after every
+        further failed poll.
+    type: int
+    default: 2
+  max_interval:
+    description:
+      - Maximum number of seconds to wait between two polls.
+    type: int
+    default: 30
+  connect_timeout:
+    description:
+      - Number of seconds to wait for the ssh port to answer a single poll.
+    type: int
+    default: 5
+'''
+
+EXAMPLES = """
+- name: Reboot the management card
+  haught.apcos.apcos_reboot:
+  register: reboot
+
+- name: Reboot with a shorter deadline
+  haught.apcos.apcos_reboot:
+    timeout: 300
+    max_interval: 10
+"""
+
+RETURN = """
+downtime:
+  description: The number of seconds from the reboot until the ssh port opened again
+  returned: when not in check mode
+  type: float
+  sample: 74.2
+elapsed:
+  description: The number of seconds from the reboot until the card answered again
+  returned: when not in check mode
+  type: float
+  sample: 81.5
+uptime:
+  description: The uptime of the card in seconds after the reboot
+  returned: when the C(about) output shows it
+  type: int
+  sample: 60
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
+"""
+
+import itertools
+import socket
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.connection import ConnectionError
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import (
+    get_connection,
+    run_commands,
+    parse_config,
+    add_timing,
+)
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
+
+SCHEMA = get_schema('about')
+
+REBOOT = {
+    'command': 'reboot',
+    'prompt': r"Enter 'YES' to continue",
+    'answer': 'YES',
+}
+
+ABOUT = {
+    'command': 'about',
+    'prompt': None,
+    'answer': None,
+}
+
+
+def port_open(host, port, timeout):
+    try:
+        sock = socket.create_connection((host, port), timeout)
+    except (socket.error, socket.timeout):
+        return False
+    sock.close()
+    return True
+
+
+def backoff(module):
+    interval = module.params['interval']
+    while True:
+        yield interval
+        interval = min(interval * 2, module.params['max_interval'])
+
+
+def wait_for_port(module, host, port, state, deadline, delays):
+    """Poll the port until it is in the wanted state and return the time it was seen"""
+    while True:
+        if port_open(host, port, module.params['connect_timeout']) is state:
+            return time.time()
+        delay = next(delays)
+        if time.time() + delay > deadline:
+            module.fail_json(msg='timed out waiting for port %s on %s to %s' % (port, host, 'open' if state else 'close'))
+        time.sleep(delay)
+
+
+def wait_for_cli(module, deadline):
+    """Reconnect to the card and run about, retrying until the CLI answers"""
+    connection = get_connection(module)
+    delays = backoff(module)
+    while True:
+        try:
+            connection.close()
+            return run_commands(module, [ABOUT])[0]
+        except ConnectionError as exc:
+            delay = next(delays)
+            if time.time() + delay > deadline:
+                module.fail_json(msg='timed out reconnecting after reboot: %s' % exc)
+            time.sleep(delay)
+
+
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        timeout=dict(type='int', default=600),
+        interval=dict(type='int', default=2),
+        max_interval=dict(type='int', default=30),
+        connect_timeout=dict(type='int', default=5),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    warnings = list()
+
+    result = {'changed': True}
+
+    if module.check_mode:
+        module.exit_json(**result)
+
+    connection = get_connection(module)
+    host = connection.get_option('host')
+    port = connection.get_option('port') or 22
+
+    start = time.time()
+    deadline = start + module.params['timeout']
+    try:
+        run_commands(module, [REBOOT])
+    except ConnectionError:
+        # the card may drop the session before the reply is read
+        pass
+
+    # the port may only be closed for a few seconds, so it is not polled with backoff
+    wait_for_port(module, host, port, False, deadline, itertools.repeat(module.params['interval']))
+    up = wait_for_port(module, host, port, True, deadline, backoff(module))
+    about = parse_config(wait_for_cli(module, deadline), SCHEMA)
+
+    result['downtime'] = round(up - start, 1)
+    result['elapsed'] = round(time.time() - start, 1)
+
+    uptime = about.get('managementuptime', about.get('uptime'))
+    if isinstance(uptime, int):
+        result['uptime'] = uptime
+        # the uptime is shown in whole minutes
+        if uptime > result['elapsed'] + 60:
+            module.fail_json(msg='the card did not reboot, its uptime is %d seconds' % uptime, **result)
+    else:
+        warnings.append('could not read the uptime from the about output')
+
+    if warnings:
+        result['warnings'] = warnings
+
+    add_timing(module, result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
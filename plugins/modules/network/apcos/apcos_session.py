@@ -0,0 +1,257 @@
+#!/usr/bin/python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: apcos_session
+author: "Matt Haught (@haught)"
+short_description: List and end sessions on APC OS devices.
+description:
+  - This module reads the active sessions of APC UPS NMC systems and
+    returns them as parsed records.
+  - With I(end_stale) set, sessions of the I(users) on the I(interfaces)
+    that have been logged in for longer than I(max_age) seconds are
+    ended. Jobs that were killed leave their sessions behind until the
+    card times them out, and the session table of the card is small, so
+    run this before a large run to make room for it.
+  - The session of the module itself is never ended.
+notes:
+  - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
+  - APC NMC v2 cards running AOS <= v6.8.2 and APC
+    NMC v3 cards running AOS < v1.4.2.1 have a bug that
+    stalls output and will not work with ansible
+  - The card shows how long a session has been logged in, not how long
+    it has been idle. Set I(max_age) longer than the longest job that
+    may still be running, or that job loses its session.
+options:
+  end_stale:
+    description:
+      - End the stale sessions.
+    type: bool
+    default: false
+  max_age:
+    description:
+      - Number of seconds a session has to be logged in before it is
+        stale.
+    type: int
+    default: 3600
+  users:
+    description:
+      - User names of the sessions that may be ended.
+      - Defaults to the user the connection logs in as.
+    type: list
+    elements: str
+  interfaces:
+    description:
+      - Interfaces of the sessions that may be ended, compared without
+        regard to case.
+    type: list
+    elements: str
+    default: ['SSH', 'Telnet']
+  connection_stats:
+    description:
+      - Return the counters of the persistent connection to the device as
+        I(connection_stats).
+    default: false
+    type: bool
+'''
+
+EXAMPLES = """
+- name: List the sessions
+  haught.apcos.apcos_session:
+  register: sessions
+
+- name: End automation sessions left behind by killed jobs
+  haught.apcos.apcos_session:
+    end_stale: true
+    max_age: 7200
+    users:
+      - apc
+      - ansible
+"""
+
+RETURN = """
+sessions:
+  description: The sessions before any was ended, with their age in seconds
+  returned: always
+  type: list
+  sample:
+    - id: 12
+      user: apc
+      interface: SSH
+      address: 10.0.0.5
+      age: 12
+      current: true
+      stale: false
+    - id: 9
+      user: apc
+      interface: SSH
+      address: 10.0.0.5
+      age: 11647
+      current: false
+      stale: true
+ended:
+  description: The IDs of the sessions ended, or that would be ended in check mode
+  returned: always
+  type: list
+  sample: [9]
+commands:
+  description: The commands sent to the device
+  returned: always
+  type: list
+  sample: ['session -d 9']
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      session:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {session: {count: 2, time: 0.73}}
+    total: 3.2
+"""
+
+import re
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.connection import ConnectionError
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import (
+    get_connection,
+    get_config,
+    load_config,
+    add_connection_stats,
+)
+
+SOURCE = "session"
+
+SESSION_RE = re.compile(r'^(\S+)\s+(.+?)\s+(\S+)\s+(?:(\d+)\s*days?\s+)?(\d+):(\d{2}):(\d{2})\s+(\d+)\s*$')
+
+
+def parse_sessions(output):
+    sessions = []
+    for line in output.split('\n'):
+        line_parts = SESSION_RE.match(line.strip())
+        if hasattr(line_parts, 'group'):
+            days, hours, minutes, seconds = (int(part or 0) for part in line_parts.group(4, 5, 6, 7))
+            sessions.append({
+                'id': int(line_parts.group(8)),
+                'user': line_parts.group(1),
+                'interface': line_parts.group(2),
+                'address': line_parts.group(3),
+                'age': days * 86400 + hours * 3600 + minutes * 60 + seconds,
+            })
+    return sessions
+
+
+def find_current(sessions, user, age):
+    """Find the session of the connection
+
+    Args:
+        sessions: The sessions returned by parse_sessions().
+        user: The user the connection logs in as, or None if unknown.
+        age: Seconds since the connection logged in, or None if unknown.
+
+    Returns:
+        The session whose age is closest to that of the connection, or
+        the youngest one if the age is unknown. None if there are none.
+    """
+    candidates = [session for session in sessions if user is None or session['user'] == user]
+    if not candidates:
+        return None
+    if age is None:
+        return min(candidates, key=lambda session: session['age'])
+    return min(candidates, key=lambda session: abs(session['age'] - age))
+
+
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        end_stale=dict(type='bool', default=False),
+        max_age=dict(type='int', default=3600),
+        users=dict(type='list', elements='str'),
+        interfaces=dict(type='list', elements='str', default=['SSH', 'Telnet']),
+        connection_stats=dict(type='bool', default=False),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    result = {'changed': False}
+
+    connection = get_connection(module)
+    user = connection.get_option('remote_user')
+    try:
+        last_connect = connection.get_stats().get('last_connect')
+    except ConnectionError:
+        last_connect = None
+    age = time.time() - last_connect['at'] if last_connect else None
+
+    sessions = parse_sessions(get_config(module, source=SOURCE))
+    current = find_current(sessions, user, age)
+
+    users = module.params['users'] or ([user] if user else [])
+    interfaces = [interface.lower() for interface in module.params['interfaces']]
+    for session in sessions:
+        session['current'] = session is current
+        session['stale'] = (not session['current'] and session['user'] in users and
+                            session['interface'].lower() in interfaces and
+                            session['age'] > module.params['max_age'])
+
+    ended = []
+    if module.params['end_stale']:
+        ended = [session['id'] for session in sessions if session['stale']]
+    commands = [SOURCE + ' -d ' + str(session_id) for session_id in ended]
+
+    if commands:
+        if not module.check_mode:
+            load_config(module, commands)
+
+        result['changed'] = True
+
+    result['sessions'] = sessions
+    result['ended'] = ended
+    result['commands'] = commands
+
+    add_connection_stats(module, result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
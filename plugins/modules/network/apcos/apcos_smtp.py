@@ -15,6 +15,9 @@ short_description: Manage SMTP configuration on APC OS devices.
 description:
   - This module provides declarative management of APC SMTP
     configuration on APC UPS NMC systems.
+extends_documentation_fragment:
+  - haught.apcos.apcos
+  - haught.apcos.apcos.secret_store
 notes:
   - Tested APC NMC v3 (AP9641) running APC OS v2.2.1.1
   - APC NMC v2 cards running AOS <= v6.8.2 and APC
@@ -78,6 +81,41 @@ commands:
   type: list
   sample:
     - smtp -a enable
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -85,14 +123,40 @@ from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos i
     load_config,
     get_config,
     parse_config,
+    secret_changed,
+    remember_secret,
+    save_secrets,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
 )
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
 
 SOURCE = "smtp"
+SCHEMA = get_schema(SOURCE)
+
+ARGUMENT_SPEC = dict(
+    from_address=dict(type='str'),
+    server=dict(type='str'),
+    port=dict(type='int'),
+    auth=dict(type='bool'),
+    user=dict(type='str'),
+    password=dict(type='str', no_log=True),
+    encryption=dict(type='str', choices=['none', 'ifavail', 'always', 'implicit']),
+    require_certificate=dict(type='bool'),
+    certificate=dict(type='str'),
+    forcepwchange=dict(type='bool', default=False),
+    secret_store=dict(type='path')
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
 
 
 def build_commands(module):
     commands = []
-    config = parse_config(get_config(module, source=SOURCE))
+    config = parse_config(get_config(module, source=SOURCE), SCHEMA)
     if module.params['from_address'] is not None:
         if config['from'] != module.params['from_address']:
             commands.append(SOURCE + ' -f ' + module.params['from_address'])
@@ -100,26 +164,28 @@ def build_commands(module):
         if config['server'] != module.params['server']:
             commands.append(SOURCE + ' -s ' + module.params['server'])
     if module.params['port'] is not None:
-        if config['port'] != str(module.params['port']):
+        if config['port'] != module.params['port']:
             commands.append(SOURCE + ' -p ' + str(module.params['port']))
     if module.params['auth'] is not None:
-        if config['auth'].lower() == "disabled" and module.params['auth'] is True:
+        if config['auth'] is False and module.params['auth'] is True:
             commands.append(SOURCE + ' -a enable')
-        elif config['auth'].lower() == "enabled" and module.params['auth'] is False:
+        elif config['auth'] is True and module.params['auth'] is False:
             commands.append(SOURCE + ' -a disable')
     if module.params['user'] is not None:
         if config['user'] != module.params['user']:
             commands.append(SOURCE + ' -u ' + module.params['user'])
     if module.params['password'] is not None:
-        if config['password'] == '<not set>' or module.params['forcepwchange'] is True:
+        if config['password'] == '<not set>' or module.params['forcepwchange'] is True or \
+                secret_changed(module, 'password', module.params['password']):
             commands.append(SOURCE + ' -w ' + module.params['password'])
+            remember_secret(module, 'password', module.params['password'])
     if module.params['encryption'] is not None:
         if config['encryption'] != module.params['encryption']:
             commands.append(SOURCE + ' -e ' + module.params['encryption'])
     if module.params['require_certificate'] is not None:
-        if config['req.cert'].lower() == "disabled" and module.params['require_certificate'] is True:
+        if config['req.cert'] is False and module.params['require_certificate'] is True:
             commands.append(SOURCE + ' -c enable')
-        elif config['req.cert'].lower() == "enabled" and module.params['require_certificate'] is False:
+        elif config['req.cert'] is True and module.params['require_certificate'] is False:
             commands.append(SOURCE + ' -c disable')
     if module.params['certificate'] is not None:
         if config['certfile'] != module.params['certificate']:
@@ -130,21 +196,8 @@ def build_commands(module):
 def main():
     """ main entry point for module execution
     """
-    argument_spec = dict(
-        from_address=dict(type='str'),
-        server=dict(type='str'),
-        port=dict(type='int'),
-        auth=dict(type='bool'),
-        user=dict(type='str'),
-        password=dict(type='str', no_log=True),
-        encryption=dict(type='str', choices=['none', 'ifavail', 'always', 'implicit']),
-        require_certificate=dict(type='bool'),
-        certificate=dict(type='str'),
-        forcepwchange=dict(type='bool', default=False)
-    )
-
     module = AnsibleModule(
-        argument_spec=argument_spec,
+        argument_spec=ARGUMENT_SPEC,
         supports_check_mode=True
     )
 
@@ -155,17 +208,23 @@ def main():
     if warnings:
         result['warnings'] = warnings
 
-    commands = []
-    commands = build_commands(module)
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
 
     result['commands'] = commands
 
     if commands:
         if not module.check_mode:
             load_config(module, commands)
+            save_secrets(module)
 
         result['changed'] = True
 
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
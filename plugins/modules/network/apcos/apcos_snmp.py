@@ -15,6 +15,8 @@ short_description: Manage snmp configuration on APC OS devices.
 description:
   - This module provides declarative management of APC snmp
     configuration on APC UPS NMC systems.
+extends_documentation_fragment:
+  - haught.apcos.apcos
 notes:
   - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
   - APC NMC v2 cards running AOS <= v6.8.2 and APC
@@ -43,6 +45,32 @@ options:
     description:
       - SNMPv1 NMS IP/CIDR address for index.
     type: str
+  communities:
+    description:
+      - List of SNMPv1 communities to configure in one task.
+      - Mutually exclusive with I(index).
+    type: list
+    elements: dict
+    suboptions:
+      index:
+        description:
+          - Index of SNMPv1 user.
+        type: int
+        choices: [1, 2, 3, 4]
+        required: true
+      community:
+        description:
+          - SNMPv1 community name.
+        type: str
+      accesstype:
+        description:
+          - SNMP access enable for index.
+        type: str
+        choices: ['disabled', 'read', 'write', 'writeplus']
+      accessaddress:
+        description:
+          - SNMPv1 NMS IP/CIDR address for index.
+        type: str
 '''
 
 EXAMPLES = """
@@ -51,6 +79,17 @@ EXAMPLES = """
     index: 1
     community: "public"
     accesstype: "read"
+
+- name: Set several communities at once
+  haught.apcos.apcos_snmp:
+    communities:
+      - index: 1
+        community: "public"
+        accesstype: "read"
+      - index: 2
+        community: "private"
+        accesstype: "write"
+        accessaddress: "10.1.1.0/24"
 """
 
 RETURN = """
@@ -60,6 +99,41 @@ commands:
   type: list
   sample:
     - snmp -c1 public
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -67,59 +141,106 @@ from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos i
     load_config,
     get_config,
     parse_config,
-    parse_config_section,
+    parse_config_indexed,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
 )
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
 
 SOURCE = "snmp"
+SCHEMA = get_schema(SOURCE)
+
+
+COMMUNITY_OPTIONS = ['index', 'community', 'accesstype', 'accessaddress']
+
+ARGUMENT_SPEC = dict(
+    enable=dict(type='bool'),
+    index=dict(type='int', choices=[1, 2, 3, 4]),
+    community=dict(type='str', no_log=True),
+    accesstype=dict(type='str', choices=['disabled', 'read', 'write', 'writeplus']),
+    accessaddress=dict(type='str'),
+    communities=dict(type='list', elements='dict', options=dict(
+        index=dict(type='int', choices=[1, 2, 3, 4], required=True),
+        community=dict(type='str', no_log=True),
+        accesstype=dict(type='str', choices=['disabled', 'read', 'write', 'writeplus']),
+        accessaddress=dict(type='str')
+    ))
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
+
+REQUIRED_BY = {
+    'community': 'index',
+    'accesstype': 'index',
+    'accessaddress': 'index',
+}
+
+MUTUALLY_EXCLUSIVE = [('index', 'communities')]
+
+
+def get_communities(module):
+    if module.params['communities']:
+        return module.params['communities']
+    if module.params['index']:
+        return [dict((key, module.params[key]) for key in COMMUNITY_OPTIONS)]
+    return []
+
+
+def build_community_commands(community, config):
+    commands = []
+    index = str(community['index'])
+    if community['community']:
+        if config.get('community') != community['community']:
+            commands.append(SOURCE + ' -c' + index + ' ' + community['community'])
+    if community['accesstype']:
+        if config.get('accesstype') != community['accesstype']:
+            commands.append(SOURCE + ' -a' + index + ' ' + community['accesstype'])
+    if community['accessaddress']:
+        if config.get('address') != community['accessaddress']:
+            commands.append(SOURCE + ' -n' + index + ' ' + community['accessaddress'])
+    return commands
 
 
 def build_commands(module):
     commands = []
-    config = {}
-    config['config'] = parse_config(config=get_config(module, source=SOURCE))
-    config['access'] = parse_config_section(
-        config=get_config(module, source=SOURCE),
+    output = get_config(module, source=SOURCE)
+    config = parse_config(config=output, schema=SCHEMA)
+    access = parse_config_indexed(
+        config=output,
         section='Access Control Summary:',
-        index=module.params['index'],
-        indexName='Access Control #')
+        indexName='Access Control #',
+        schema=SCHEMA)
     if module.params['enable'] is not None:
-        if config['config']['snmpv1'].lower() == "disabled" and module.params['enable'] is True:
+        if config['snmpv1'] is False and module.params['enable'] is True:
             commands.append(SOURCE + ' -S enable')
-        elif config['config']['snmpv1'].lower() == "enabled" and module.params['enable'] is False:
+        elif config['snmpv1'] is True and module.params['enable'] is False:
             commands.append(SOURCE + ' -S disable')
-    if module.params['community'] and module.params['index']:
-        if config['access']['community'] != module.params['community']:
-            commands.append(SOURCE + ' -c' + str(module.params['index']) + ' ' + module.params['community'])
-    if module.params['accesstype'] and module.params['index']:
-        if config['access']['accesstype'] != module.params['accesstype']:
-            commands.append(SOURCE + ' -a' + str(module.params['index']) + ' ' + module.params['accesstype'])
-    if module.params['accessaddress'] and module.params['index']:
-        if config['access']['address'] != module.params['accessaddress']:
-            commands.append(SOURCE + ' -n' + str(module.params['index']) + ' ' + module.params['accessaddress'])
+    for community in get_communities(module):
+        commands.extend(build_community_commands(community, access.get(community['index'], {})))
     return commands
 
 
+def check_params(module):
+    indexes = [community['index'] for community in get_communities(module)]
+    if len(indexes) != len(set(indexes)):
+        module.fail_json(msg='each index may only be listed once in communities')
+
+
 def main():
     """ main entry point for module execution
     """
-    argument_spec = dict(
-        enable=dict(type='bool'),
-        index=dict(type='int', choices=[1, 2, 3, 4]),
-        community=dict(type='str', no_log=True),
-        accesstype=dict(type='str', choices=['disabled', 'read', 'write', 'writeplus']),
-        accessaddress=dict(type='str')
-    )
-
     module = AnsibleModule(
-        argument_spec=argument_spec,
-        required_by={
-            'community': 'index',
-            'accesstype': 'index',
-            'accessaddress': 'index',
-        },
+        argument_spec=ARGUMENT_SPEC,
+        required_by=REQUIRED_BY,
+        mutually_exclusive=MUTUALLY_EXCLUSIVE,
         supports_check_mode=True
     )
 
+    check_params(module)
+
     warnings = list()
 
     result = {'changed': False}
@@ -127,8 +248,11 @@ def main():
     if warnings:
         result['warnings'] = warnings
 
-    commands = []
-    commands = build_commands(module)
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
 
     result['commands'] = commands
 
@@ -138,6 +262,8 @@ def main():
 
         result['changed'] = True
 
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
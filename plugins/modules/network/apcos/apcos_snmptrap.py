@@ -0,0 +1,272 @@
+#!/usr/bin/python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: apcos_snmptrap
+author: "Matt Haught (@haught)"
+short_description: Manage snmp trap receivers on APC OS devices.
+description:
+  - This module provides declarative management of the APC snmp trap
+    receiver list on APC UPS NMC systems.
+  - The I(receivers) list is the complete desired list. Receivers on the
+    device that are not listed are removed, receivers that are listed
+    but missing are added to free slots.
+  - Addresses are compared in their canonical form, and host names
+    without regard to case.
+  - When a receiver is added to a slot, every setting of the slot is
+    set. Settings not given take the defaults C(public) for
+    I(community), C(snmpv1) for I(traptype) and C(false) for
+    I(authtraps).
+extends_documentation_fragment:
+  - haught.apcos.apcos
+notes:
+  - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
+  - APC NMC v2 cards running AOS <= v6.8.2 and APC
+    NMC v3 cards running AOS < v1.4.2.1 have a bug that
+    stalls output and will not work with ansible
+options:
+  receivers:
+    description:
+      - List of trap receivers.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      address:
+        description:
+          - Receiver NMS IP address.
+        type: str
+        required: true
+      community:
+        description:
+          - Trap community name.
+        type: str
+      traptype:
+        description:
+          - Trap type.
+        type: str
+        choices: ['snmpv1', 'snmpv3']
+      generation:
+        description:
+          - Trap generation enable.
+        type: bool
+        default: True
+      authtraps:
+        description:
+          - Authentication trap enable.
+        type: bool
+'''
+
+EXAMPLES = """
+- name: Set the trap receivers
+  haught.apcos.apcos_snmptrap:
+    receivers:
+      - address: "10.1.1.10"
+        community: "public"
+        traptype: snmpv1
+      - address: "10.1.1.11"
+        community: "public"
+        traptype: snmpv1
+        authtraps: false
+
+- name: Remove every trap receiver
+  haught.apcos.apcos_snmptrap:
+    receivers: []
+"""
+
+RETURN = """
+commands:
+  description: The list of configuration mode commands to send to the device
+  returned: always
+  type: list
+  sample:
+    - snmptrap -r2 10.1.1.11 -c2 public -t2 snmpV1 -g2 enable
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import (
+    load_config,
+    get_config,
+    parse_config_indexed,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
+)
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema, to_ip
+
+SOURCE = "snmptrap"
+SCHEMA = get_schema(SOURCE)
+
+UNSET_ADDRESS = '0.0.0.0'
+
+TRAP_TYPES = {
+    'snmpv1': 'snmpV1',
+    'snmpv3': 'snmpV3',
+}
+
+# Settings of a receiver added to a slot when not given
+NEW_RECEIVER = {
+    'community': 'public',
+    'traptype': 'snmpv1',
+    'authtraps': False,
+}
+
+ARGUMENT_SPEC = dict(
+    receivers=dict(type='list', elements='dict', required=True, options=dict(
+        address=dict(type='str', required=True),
+        community=dict(type='str', no_log=True),
+        traptype=dict(type='str', choices=['snmpv1', 'snmpv3']),
+        generation=dict(type='bool', default=True),
+        authtraps=dict(type='bool')
+    ))
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
+
+
+def normalize_address(address):
+    return to_ip((address or '').strip()).lower()
+
+
+def receiver_options(receiver, config):
+    options = []
+    if normalize_address(config.get('receiverip')) != normalize_address(receiver['address']):
+        options.append(('-r', receiver['address']))
+    if receiver['community'] and config.get('community') != receiver['community']:
+        options.append(('-c', receiver['community']))
+    if receiver['traptype'] and config.get('traptype') != receiver['traptype']:
+        options.append(('-t', TRAP_TYPES[receiver['traptype']]))
+    if receiver['generation'] is not None and config.get('generation') != receiver['generation']:
+        options.append(('-g', 'enable' if receiver['generation'] else 'disable'))
+    if receiver['authtraps'] is not None and config.get('authtraps') != receiver['authtraps']:
+        options.append(('-a', 'enable' if receiver['authtraps'] else 'disable'))
+    return options
+
+
+def receiver_command(index, options):
+    return SOURCE + ''.join(' %s%d %s' % (flag, index, value) for flag, value in options)
+
+
+def build_commands(module):
+    commands = []
+    slots = parse_config_indexed(get_config(module, source=SOURCE), None, schema=SCHEMA)
+    current = dict(
+        (normalize_address(config.get('receiverip')), index) for index, config in slots.items()
+        if normalize_address(config.get('receiverip')) not in ('', UNSET_ADDRESS)
+    )
+    desired = dict((normalize_address(receiver['address']), receiver) for receiver in module.params['receivers'])
+
+    removed = sorted(index for address, index in current.items() if address not in desired)
+    free = sorted(set(index for index in slots if index not in current.values()) | set(removed))
+    added = [receiver for receiver in module.params['receivers'] if normalize_address(receiver['address']) not in current]
+    if len(added) > len(free):
+        module.fail_json(msg='%d trap receivers requested but the device only has %d slots' % (len(desired), len(slots)))
+
+    plan = {}
+    for address, index in current.items():
+        if address in desired:
+            plan[index] = receiver_options(desired[address], slots[index])
+    for receiver, index in zip(added, free):
+        receiver = dict(receiver)
+        for key, value in NEW_RECEIVER.items():
+            if receiver[key] is None:
+                receiver[key] = value
+        plan[index] = receiver_options(receiver, slots[index])
+    for index in free[len(added):]:
+        if index in removed:
+            plan[index] = [('-r', UNSET_ADDRESS), ('-g', 'disable')]
+
+    for index in sorted(plan):
+        if plan[index]:
+            commands.append(receiver_command(index, plan[index]))
+    return commands
+
+
+def check_params(module):
+    addresses = [normalize_address(receiver['address']) for receiver in module.params['receivers']]
+    if len(addresses) != len(set(addresses)):
+        module.fail_json(msg='each address may only be listed once in receivers')
+
+
+def main():
+    """ main entry point for module execution
+    """
+    module = AnsibleModule(
+        argument_spec=ARGUMENT_SPEC,
+        supports_check_mode=True
+    )
+
+    check_params(module)
+
+    warnings = list()
+
+    result = {'changed': False}
+
+    if warnings:
+        result['warnings'] = warnings
+
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
+
+    result['commands'] = commands
+
+    if commands:
+        if not module.check_mode:
+            load_config(module, commands)
+
+        result['changed'] = True
+
+    add_connection_stats(module, result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
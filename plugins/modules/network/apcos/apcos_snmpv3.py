@@ -15,6 +15,9 @@ short_description: Manage snmpv3 configuration on APC OS devices.
 description:
   - This module provides declarative management of APC snmpv3
     configuration on APC UPS NMC systems.
+extends_documentation_fragment:
+  - haught.apcos.apcos
+  - haught.apcos.apcos.secret_store
 notes:
   - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
   - APC NMC v2 cards running AOS <= v6.8.2 and APC
@@ -69,6 +72,53 @@ options:
       - Force a auth/priv phrase change
     type: bool
     default: False
+  users:
+    description:
+      - List of SNMPv3 users to configure in one task.
+      - Mutually exclusive with I(index).
+    type: list
+    elements: dict
+    suboptions:
+      index:
+        description:
+          - Index of SNMPv3 user.
+        type: int
+        choices: [1, 2, 3, 4]
+        required: true
+      username:
+        description:
+          - SNMPv3 user name for index.
+        type: str
+      authprotocol:
+        description:
+          - SNMPv3 authentication protocol for index.
+        type: str
+        choices: ['SHA', 'MD5', 'NONE']
+      authphrase:
+        description:
+          - SNMPv3 authentication phrase for index.
+        type: str
+      privprotocol:
+        description:
+          - SNMPv3 privacy protocol for index.
+        type: str
+        choices: ['AES', 'DES', 'NONE']
+      privphrase:
+        description:
+          - SNMPv3 privacy phrase for index.
+        type: str
+      access:
+        description:
+          - SNMPv3 access enable for index.
+        type: bool
+      accessusername:
+        description:
+          - SNMPv3 access user name for index.
+        type: str
+      accessaddress:
+        description:
+          - SNMPv3 NMS IP/CIDR address for index.
+        type: str
 '''
 
 EXAMPLES = """
@@ -80,6 +130,21 @@ EXAMPLES = """
   haught.apcos.apcos_snmpv3:
     primarysnmpv3: "1.1.1.1"
     secondarysnmpv3: "4.4.4.4"
+
+- name: Set several users at once
+  haught.apcos.apcos_snmpv3:
+    users:
+      - index: 1
+        username: "monitor"
+        authprotocol: "SHA"
+        privprotocol: "AES"
+        access: true
+        accessusername: "monitor"
+        accessaddress: "10.1.1.10"
+      - index: 2
+        username: "backup"
+        authprotocol: "SHA"
+        privprotocol: "AES"
 """
 
 RETURN = """
@@ -89,6 +154,41 @@ commands:
   type: list
   sample:
     - snmpv3 -n ups001
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -96,83 +196,150 @@ from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos i
     load_config,
     get_config,
     parse_config_section,
+    parse_config_indexed,
+    secret_changed,
+    remember_secret,
+    save_secrets,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
 )
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
 
 SOURCE = "snmpv3"
+SCHEMA = get_schema(SOURCE)
+
+
+USER_OPTIONS = ['index', 'username', 'authphrase', 'authprotocol', 'privphrase', 'privprotocol',
+                'access', 'accessusername', 'accessaddress']
+
+ARGUMENT_SPEC = dict(
+    enable=dict(type='bool'),
+    index=dict(type='int', choices=[1, 2, 3, 4]),
+    username=dict(type='str'),
+    authphrase=dict(type='str', no_log=True),
+    authprotocol=dict(type='str', choices=['SHA', 'MD5', 'NONE']),
+    privphrase=dict(type='str', no_log=True),
+    privprotocol=dict(type='str', choices=['AES', 'DES', 'NONE']),
+    access=dict(type='bool'),
+    accessusername=dict(type='str'),
+    accessaddress=dict(type='str'),
+    forcepwchange=dict(type='bool', default=False),
+    secret_store=dict(type='path'),
+    users=dict(type='list', elements='dict', options=dict(
+        index=dict(type='int', choices=[1, 2, 3, 4], required=True),
+        username=dict(type='str'),
+        authphrase=dict(type='str', no_log=True),
+        authprotocol=dict(type='str', choices=['SHA', 'MD5', 'NONE']),
+        privphrase=dict(type='str', no_log=True),
+        privprotocol=dict(type='str', choices=['AES', 'DES', 'NONE']),
+        access=dict(type='bool'),
+        accessusername=dict(type='str'),
+        accessaddress=dict(type='str')
+    ))
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
+
+REQUIRED_BY = {
+    'username': 'index',
+    'authphrase': 'index',
+    'authprotocol': 'index',
+    'privphrase': 'index',
+    'privprotocol': 'index',
+    'access': 'index',
+    'accessusername': 'index',
+    'accessaddress': 'index'
+}
+
+MUTUALLY_EXCLUSIVE = [('index', 'users')]
+
+
+def get_users(module):
+    if module.params['users']:
+        return module.params['users']
+    if module.params['index']:
+        return [dict((key, module.params[key]) for key in USER_OPTIONS)]
+    return []
+
+
+def build_user_commands(module, user, config):
+    commands = []
+    index = str(user['index'])
+    if user['authprotocol']:
+        if config['user'].get('authentication') != user['authprotocol']:
+            commands.append(SOURCE + ' -ap' + index + ' ' + user['authprotocol'])
+    if user['privprotocol']:
+        if config['user'].get('encryption') != user['privprotocol']:
+            commands.append(SOURCE + ' -pp' + index + ' ' + user['privprotocol'])
+    username_changed = user['username'] and config['user'].get('username') != user['username']
+    if username_changed:
+        commands.append(SOURCE + ' -u' + index + ' ' + user['username'])
+    # set password if username changes, set to force or differs from the secret store
+    if user['authphrase']:
+        if username_changed or module.params['forcepwchange'] is True or \
+                secret_changed(module, 'authphrase' + index, user['authphrase']):
+            commands.append(SOURCE + ' -a' + index + ' ' + user['authphrase'])
+            remember_secret(module, 'authphrase' + index, user['authphrase'])
+    if user['privphrase']:
+        if username_changed or module.params['forcepwchange'] is True or \
+                secret_changed(module, 'privphrase' + index, user['privphrase']):
+            commands.append(SOURCE + ' -c' + index + ' ' + user['privphrase'])
+            remember_secret(module, 'privphrase' + index, user['privphrase'])
+    if user['accessusername']:
+        if config['access'].get('username') != user['accessusername']:
+            commands.append(SOURCE + ' -au' + index + ' ' + user['accessusername'])
+    if user['access'] is not None:
+        if config['access'].get('access') is False and user['access'] is True:
+            commands.append(SOURCE + ' -ac' + index + ' enable')
+        elif config['access'].get('access') is True and user['access'] is False:
+            commands.append(SOURCE + ' -ac' + index + ' disable')
+    if user['accessaddress']:
+        if config['access'].get('nmsip/hostname') != user['accessaddress']:
+            commands.append(SOURCE + ' -n' + index + ' ' + user['accessaddress'])
+    return commands
 
 
 def build_commands(module):
     commands = []
-    config = {}
-    config['config'] = parse_config_section(get_config(module, source=SOURCE), 'SNMPv3 Configuration')
-    config['user'] = parse_config_section(get_config(module, source=SOURCE), 'SNMPv3 User Profiles', module.params['index'])
-    config['access'] = parse_config_section(get_config(module, source=SOURCE), 'SNMPv3 Access Control', module.params['index'])
+    output = get_config(module, source=SOURCE)
+    config = parse_config_section(output, 'SNMPv3 Configuration', schema=SCHEMA)
+    profiles = parse_config_indexed(output, 'SNMPv3 User Profiles', schema=SCHEMA)
+    access = parse_config_indexed(output, 'SNMPv3 Access Control', schema=SCHEMA)
     if module.params['enable'] is not None:
-        if config['config']['snmpv3'].lower() == "disabled" and module.params['enable'] is True:
+        if config['snmpv3'] is False and module.params['enable'] is True:
             commands.append(SOURCE + ' -S enable')
-        elif config['config']['snmpv3'].lower() == "enabled" and module.params['enable'] is False:
+        elif config['snmpv3'] is True and module.params['enable'] is False:
             commands.append(SOURCE + ' -S disable')
-    if module.params['authprotocol'] and module.params['index']:
-        if config['user']['authentication'] != module.params['authprotocol']:
-            commands.append(SOURCE + ' -ap' + str(module.params['index']) + ' ' + module.params['authprotocol'])
-    if module.params['privprotocol'] and module.params['index']:
-        if config['user']['encryption'] != module.params['privprotocol']:
-            commands.append(SOURCE + ' -pp' + str(module.params['index']) + ' ' + module.params['privprotocol'])
-    if (module.params['username'] or module.params['forcepwchange'] is True) and module.params['index']:
-        if module.params['username'] and config['user']['username'] != module.params['username']:
-            commands.append(SOURCE + ' -u' + str(module.params['index']) + ' ' + module.params['username'])
-        # set password if username changes or set to force
-        if (module.params['username'] and config['user']['username'] != module.params['username']) or module.params['forcepwchange'] is True:
-            if module.params['authphrase'] and module.params['index']:
-                commands.append(SOURCE + ' -a' + str(module.params['index']) + ' ' + module.params['authphrase'])
-            if module.params['privphrase'] and module.params['index']:
-                commands.append(SOURCE + ' -c' + str(module.params['index']) + ' ' + module.params['privphrase'])
-    if module.params['accessusername'] and module.params['index']:
-        if config['access']['username'] != module.params['accessusername']:
-            commands.append(SOURCE + ' -au' + str(module.params['index']) + ' ' + module.params['accessusername'])
-    if module.params['access'] is not None and module.params['index']:
-        if config['access']['access'].lower() == "disabled" and module.params['access'] is True:
-            commands.append(SOURCE + ' -ac' + str(module.params['index']) + ' enable')
-        elif config['access']['access'].lower() == "enabled" and module.params['access'] is False:
-            commands.append(SOURCE + ' -ac' + str(module.params['index']) + ' disable')
-    if module.params['accessaddress'] and module.params['index']:
-        if config['access']['nmsip/hostname'] != module.params['accessaddress']:
-            commands.append(SOURCE + ' -n' + str(module.params['index']) + ' ' + module.params['accessaddress'])
+    for user in get_users(module):
+        user_config = {
+            'user': profiles.get(user['index'], {}),
+            'access': access.get(user['index'], {}),
+        }
+        commands.extend(build_user_commands(module, user, user_config))
     return commands
 
 
+def check_params(module):
+    indexes = [user['index'] for user in get_users(module)]
+    if len(indexes) != len(set(indexes)):
+        module.fail_json(msg='each index may only be listed once in users')
+
+
 def main():
     """ main entry point for module execution
     """
-    argument_spec = dict(
-        enable=dict(type='bool'),
-        index=dict(type='int', choices=[1, 2, 3, 4]),
-        username=dict(type='str'),
-        authphrase=dict(type='str', no_log=True),
-        authprotocol=dict(type='str', choices=['SHA', 'MD5', 'NONE']),
-        privphrase=dict(type='str', no_log=True),
-        privprotocol=dict(type='str', choices=['AES', 'DES', 'NONE']),
-        access=dict(type='bool'),
-        accessusername=dict(type='str'),
-        accessaddress=dict(type='str'),
-        forcepwchange=dict(type='bool', default=False)
-    )
-
     module = AnsibleModule(
-        argument_spec=argument_spec,
-        required_by={
-            'username': 'index',
-            'authphrase': 'index',
-            'authprotocol': 'index',
-            'privphrase': 'index',
-            'privprotocol': 'index',
-            'access': 'index',
-            'accessusername': 'index',
-            'accessaddress': 'index'
-        },
+        argument_spec=ARGUMENT_SPEC,
+        required_by=REQUIRED_BY,
+        mutually_exclusive=MUTUALLY_EXCLUSIVE,
         supports_check_mode=True
     )
 
+    check_params(module)
+
     warnings = list()
 
     result = {'changed': False}
@@ -180,17 +347,23 @@ def main():
     if warnings:
         result['warnings'] = warnings
 
-    commands = []
-    commands = build_commands(module)
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
 
     result['commands'] = commands
 
     if commands:
         if not module.check_mode:
             load_config(module, commands)
+            save_secrets(module)
 
         result['changed'] = True
 
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
@@ -15,11 +15,18 @@ short_description: Manage system configuration on APC OS devices.
 description:
   - This module provides declarative management of APC OS system
     configuration on APC UPS NMC systems.
+extends_documentation_fragment:
+  - haught.apcos.apcos
+  - haught.apcos.apcos.snmp
 notes:
   - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
   - APC NMC v2 cards running AOS <= v6.8.2 and APC
     NMC v3 cards running AOS < v1.4.2.1 have a bug that
     stalls output and will not work with ansible
+  - With I(snmp), a task that only sets I(name), I(contact) and
+    I(location) reads them over SNMP and only logs in to the card when
+    one of them has to change. I(hostnamesync) has no SNMP object, so a
+    task that sets it always reads the CLI.
 options:
   name:
     description:
@@ -40,8 +47,10 @@ options:
   hostnamesync:
     description:
       - Synchronize the system and the hostname.
+      - Left as it is when not set. This used to default to C(false),
+        which disabled the sync on every run; set it to C(false) to keep
+        that.
     type: bool
-    default: False
 '''
 
 EXAMPLES = """
@@ -62,6 +71,41 @@ commands:
   type: list
   sample:
     - system -l Bldg 101
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -69,14 +113,48 @@ from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos i
     load_config,
     get_config,
     parse_config,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
+)
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp import (
+    snmp_argument_spec,
+    read_snmp_config,
 )
 
 SOURCE = "system"
+SCHEMA = get_schema(SOURCE)
+
+# Keys of the parsed source compared for every option
+KEYS = {
+    'name': 'name',
+    'contact': 'contact',
+    'location': 'location',
+    'motd': 'message',
+    'hostnamesync': 'hostnamesync',
+}
+
+ARGUMENT_SPEC = dict(
+    name=dict(type='str'),
+    contact=dict(type='str'),
+    location=dict(type='str'),
+    motd=dict(type='str'),
+    hostnamesync=dict(type='bool')
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
+ARGUMENT_SPEC.update(snmp_argument_spec)
 
 
 def build_commands(module):
     commands = []
-    config = parse_config(get_config(module, source=SOURCE))
+    keys = [key for option, key in KEYS.items() if module.params[option] not in (None, '')]
+    config = read_snmp_config(module, SOURCE, keys)
+    if config is None:
+        config = parse_config(get_config(module, source=SOURCE), SCHEMA)
     if module.params['name']:
         if config['name'] != module.params['name']:
             commands.append(SOURCE + ' -n ' + module.params['name'])
@@ -90,9 +168,9 @@ def build_commands(module):
         if config['message'] != module.params['motd']:
             commands.append(SOURCE + ' -m ' + module.params['motd'])
     if module.params['hostnamesync'] is not None:
-        if config['hostnamesync'].lower() == "disabled" and module.params['hostnamesync'] is True:
+        if config['hostnamesync'] is False and module.params['hostnamesync'] is True:
             commands.append(SOURCE + ' -s enable')
-        elif config['hostnamesync'].lower() == "enabled" and module.params['hostnamesync'] is False:
+        elif config['hostnamesync'] is True and module.params['hostnamesync'] is False:
             commands.append(SOURCE + ' -s disable')
     return commands
 
@@ -100,16 +178,8 @@ def build_commands(module):
 def main():
     """ main entry point for module execution
     """
-    argument_spec = dict(
-        name=dict(type='str'),
-        contact=dict(type='str'),
-        location=dict(type='str'),
-        motd=dict(type='str'),
-        hostnamesync=dict(type='bool', default=False)
-    )
-
     module = AnsibleModule(
-        argument_spec=argument_spec,
+        argument_spec=ARGUMENT_SPEC,
         supports_check_mode=True
     )
 
@@ -120,7 +190,11 @@ def main():
     if warnings:
         result['warnings'] = warnings
 
-    commands = build_commands(module)
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
 
     result['commands'] = commands
 
@@ -130,6 +204,8 @@ def main():
 
         result['changed'] = True
 
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
@@ -0,0 +1,288 @@
+#!/usr/bin/python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: apcos_user
+author: "Matt Haught (@haught)"
+short_description: Manage local user accounts on APC OS devices.
+description:
+  - This module provides declarative management of local user
+    accounts on APC UPS NMC systems.
+  - The user table is read once and only the accounts that differ from
+    I(accounts) are changed, with one command per account.
+extends_documentation_fragment:
+  - haught.apcos.apcos
+  - haught.apcos.apcos.secret_store
+notes:
+  - Tested APC NMC v3 (AP9641) running APC OS v1.4.2.1
+  - APC NMC v2 cards running AOS <= v6.8.2 and APC
+    NMC v3 cards running AOS < v1.4.2.1 have a bug that
+    stalls output and will not work with ansible
+  - The session timeout is not part of the user table, so the
+    details of an account are only read when I(session_timeout)
+    is set for it.
+options:
+  accounts:
+    description:
+      - List of local user accounts.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description:
+          - User name of the account.
+        type: str
+        required: true
+      role:
+        description:
+          - User permission of the account.
+        type: str
+        choices: ['administrator', 'device', 'readonly', 'networkonly']
+      enable:
+        description:
+          - Account enable.
+        type: bool
+      session_timeout:
+        description:
+          - Session timeout of the account in minutes.
+        type: int
+      password:
+        description:
+          - Password of the account. Required to add an account and only
+            changed on existing accounts when I(forcepwchange) is set or
+            I(secret_store) shows it differs.
+        type: str
+  forcepwchange:
+    description:
+      - Force a password change
+    type: bool
+    default: False
+'''
+
+EXAMPLES = """
+- name: Set local accounts
+  haught.apcos.apcos_user:
+    accounts:
+      - name: device
+        role: device
+        enable: true
+        session_timeout: 10
+      - name: readonly
+        enable: false
+
+- name: Rotate passwords
+  haught.apcos.apcos_user:
+    accounts:
+      - name: device
+        password: "{{ device_password }}"
+      - name: readonly
+        password: "{{ readonly_password }}"
+    forcepwchange: true
+"""
+
+RETURN = """
+commands:
+  description: The list of configuration mode commands to send to the device
+  returned: always
+  type: list
+  sample:
+    - user -n device -pe Device -e enable -st 10
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
+"""
+
+import re
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import (
+    load_config,
+    get_config,
+    get_configs,
+    parse_config,
+    secret_changed,
+    remember_secret,
+    save_secrets,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
+)
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
+
+SOURCE = "user"
+SCHEMA = get_schema(SOURCE)
+
+ROLES = {
+    'administrator': 'Administrator',
+    'device': 'Device',
+    'readonly': 'Read-Only',
+    'networkonly': 'Network-Only',
+}
+
+ARGUMENT_SPEC = dict(
+    accounts=dict(type='list', elements='dict', required=True, options=dict(
+        name=dict(type='str', required=True),
+        role=dict(type='str', choices=['administrator', 'device', 'readonly', 'networkonly']),
+        enable=dict(type='bool'),
+        session_timeout=dict(type='int'),
+        password=dict(type='str', no_log=True)
+    )),
+    forcepwchange=dict(type='bool', default=False),
+    secret_store=dict(type='path')
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
+
+
+def parse_user_table(config):
+    users = {}
+    columns = None
+    for line in config.split('\n'):
+        header = re.match(r'^(User Name\s+)(Status\s+)User Type', line)
+        if hasattr(header, 'group'):
+            columns = (len(header.group(1)), len(header.group(1)) + len(header.group(2)))
+            continue
+        if columns is None:
+            continue
+        # user names may hold spaces, so the row is cut at the columns of
+        # the header, unless a long name pushed the status to the right
+        name, status, role = line[:columns[0]], line[columns[0]:columns[1]], line[columns[1]:]
+        if status.strip().lower() not in ('enabled', 'disabled'):
+            line_parts = re.match(r'^(.+?)\s+(Enabled|Disabled)\s+(.+?)\s*$', line, re.I)
+            if not hasattr(line_parts, 'group'):
+                continue
+            name, status, role = line_parts.groups()
+        users[name.strip()] = {
+            'status': SCHEMA['status'](status.strip()),
+            'userpermission': SCHEMA['userpermission'](role.strip()),
+        }
+    return users
+
+
+def user_flag(name):
+    return '-n "%s"' % name if ' ' in name else '-n ' + name
+
+
+def account_options(module, account, config):
+    options = []
+    if account['password']:
+        if not config or module.params['forcepwchange'] is True or \
+                secret_changed(module, 'password:' + account['name'], account['password']):
+            options.append(('-pw', account['password']))
+            remember_secret(module, 'password:' + account['name'], account['password'])
+    if account['role'] and config.get('userpermission') != account['role']:
+        options.append(('-pe', ROLES[account['role']]))
+    if account['enable'] is not None and config.get('status') != account['enable']:
+        options.append(('-e', 'enable' if account['enable'] else 'disable'))
+    if account['session_timeout'] is not None:
+        if not config or config.get('sessiontimeout') != account['session_timeout'] * 60:
+            options.append(('-st', str(account['session_timeout'])))
+    return options
+
+
+def build_commands(module):
+    commands = []
+    users = parse_user_table(get_config(module, source=SOURCE, flags=['-l']))
+    # the session timeout is only shown in the details of an account
+    details = [account['name'] for account in module.params['accounts']
+               if account['name'] in users and account['session_timeout'] is not None]
+    sources = [SOURCE + ' ' + user_flag(name) for name in details]
+    for name, output in zip(details, get_configs(module, sources) if sources else []):
+        users[name].update(parse_config(output, SCHEMA))
+    for account in module.params['accounts']:
+        config = users.get(account['name'], {})
+        if not config and not account['password']:
+            module.fail_json(msg='password is required to add account %s' % account['name'])
+        options = account_options(module, account, config)
+        if options:
+            commands.append(SOURCE + ' ' + user_flag(account['name']) + ''.join(' %s %s' % option for option in options))
+    return commands
+
+
+def check_params(module):
+    names = [account['name'] for account in module.params['accounts']]
+    if len(names) != len(set(names)):
+        module.fail_json(msg='each name may only be listed once in accounts')
+
+
+def main():
+    """ main entry point for module execution
+    """
+    module = AnsibleModule(
+        argument_spec=ARGUMENT_SPEC,
+        supports_check_mode=True
+    )
+
+    check_params(module)
+
+    warnings = list()
+
+    result = {'changed': False}
+
+    if warnings:
+        result['warnings'] = warnings
+
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
+
+    result['commands'] = commands
+
+    if commands:
+        if not module.check_mode:
+            load_config(module, commands)
+            save_secrets(module)
+
+        result['changed'] = True
+
+    add_connection_stats(module, result)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,8 @@ short_description: Manage web configuration on APC OS devices.
 description:
   - This module provides declarative management of APC web
     configuration on APC UPS NMC systems.
+extends_documentation_fragment:
+  - haught.apcos.apcos
 notes:
   - Tested APC NMC v3 (AP9641) running APC OS v2.2.1.1
   - APC NMC v2 cards running AOS <= v6.8.2 and APC
@@ -71,6 +73,41 @@ commands:
   type: list
   sample:
     - web -s enable
+connection_stats:
+  description: The counters of the persistent connection to the device since it was opened
+  returned: when I(connection_stats) is set
+  type: dict
+  sample:
+    commands: 14
+    bytes_read: 5120
+    command_time: 3.2
+    prompt_time: 0.0
+    timeouts: 0
+    errors: 0
+    cache_hits: 2
+    cache_misses: 5
+    connects: 1
+    connect_time: 2.4
+    latency: [0, 9, 4, 1, 0, 0, 0, 0, 0]
+    latency_buckets: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    per_command:
+      dns:
+        count: 1
+        time: 0.21
+        max: 0.21
+    cached: 5
+apcos_timing:
+  description: Seconds spent on the parts of the run that talked to the device, as collected by the haught.apcos.apcos_timing callback
+  returned: when the device was used and the APCOS_TIMING environment variable is set
+  type: dict
+  sample:
+    connect: 2.4
+    capabilities: 0.01
+    reads: {count: 1, time: 0.31}
+    writes: {count: 1, time: 0.42}
+    commands: {count: 0, time: 0.0}
+    per_command: {system: {count: 2, time: 0.73}}
+    total: 3.2
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -78,45 +115,65 @@ from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos i
     load_config,
     get_config,
     parse_config,
+    apcos_argument_spec,
+    read_plan,
+    write_plan,
+    config_unchanged,
+    save_fingerprints,
+    add_connection_stats,
 )
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.schema import get_schema
 
 SOURCE = "web"
+SCHEMA = get_schema(SOURCE)
+
+ARGUMENT_SPEC = dict(
+    enablehttp=dict(type='bool'),
+    enablehttps=dict(type='bool'),
+    httpport=dict(type='int'),
+    httpsport=dict(type='int'),
+    httpsproto=dict(type='str', choices=['TLS1.1', 'TLS1.2']),
+    limitedstatus=dict(type='bool'),
+    limitedstatusdefault=dict(type='bool'),
+    tls12ciphersuite=dict(type='int', choices=[0, 1, 2, 3, 4])
+)
+ARGUMENT_SPEC.update(apcos_argument_spec)
 
 
 def build_commands(module):
     commands = []
-    config = parse_config(get_config(module, source=SOURCE))
+    config = parse_config(get_config(module, source=SOURCE), SCHEMA)
     if module.params['enablehttp'] is not None:
-        if config['http'].lower() == "disabled" and module.params['enablehttp'] is True:
+        if config['http'] is False and module.params['enablehttp'] is True:
             commands.append(SOURCE + ' -h enable')
-        elif config['http'].lower() == "enabled" and module.params['enablehttp'] is False:
+        elif config['http'] is True and module.params['enablehttp'] is False:
             commands.append(SOURCE + ' -h disable')
     if module.params['enablehttps'] is not None:
-        if config['https'].lower() == "disabled" and module.params['enablehttps'] is True:
+        if config['https'] is False and module.params['enablehttps'] is True:
             commands.append(SOURCE + ' -s enable')
-        elif config['https'].lower() == "enabled" and module.params['enablehttps'] is False:
+        elif config['https'] is True and module.params['enablehttps'] is False:
             commands.append(SOURCE + ' -s disable')
     if module.params['httpport'] is not None:
-        if config['httpport'] != str(module.params['httpport']):
+        if config['httpport'] != module.params['httpport']:
             commands.append(SOURCE + ' -ph ' + str(module.params['httpport']))
     if module.params['httpsport'] is not None:
-        if config['httpsport'] != str(module.params['httpsport']):
+        if config['httpsport'] != module.params['httpsport']:
             commands.append(SOURCE + ' -ps ' + str(module.params['httpsport']))
     if module.params['httpsproto'] is not None:
         if config['minimumprotocol'] != module.params['httpsproto']:
             commands.append(SOURCE + ' -mp ' + module.params['httpsproto'])
     if module.params['limitedstatus'] is not None:
-        if config['limitedstatusaccess'].lower() == "disabled" and module.params['limitedstatus'] is True:
+        if config['limitedstatusaccess'] is False and module.params['limitedstatus'] is True:
             commands.append(SOURCE + ' -lsp enable')
-        elif config['limitedstatusaccess'].lower() == "enabled" and module.params['limitedstatus'] is False:
+        elif config['limitedstatusaccess'] is True and module.params['limitedstatus'] is False:
             commands.append(SOURCE + ' -lsp disable')
     if module.params['limitedstatusdefault'] is not None:
-        if config['lim.statuspageused'].lower() == "disabled" and module.params['limitedstatusdefault'] is True:
+        if config['lim.statuspageused'] is False and module.params['limitedstatusdefault'] is True:
             commands.append(SOURCE + ' -lsd enable')
-        elif config['lim.statuspageused'].lower() == "enabled" and module.params['limitedstatusdefault'] is False:
+        elif config['lim.statuspageused'] is True and module.params['limitedstatusdefault'] is False:
             commands.append(SOURCE + ' -lsd disable')
     if module.params['tls12ciphersuite'] is not None:
-        if config['tls1.2ciphersuitefilter'] != str(module.params['tls12ciphersuite']):
+        if config['tls1.2ciphersuitefilter'] != module.params['tls12ciphersuite']:
             commands.append(SOURCE + ' -cs ' + str(module.params['tls12ciphersuite']))
     return commands
 
@@ -124,19 +181,8 @@ def build_commands(module):
 def main():
     """ main entry point for module execution
     """
-    argument_spec = dict(
-        enablehttp=dict(type='bool'),
-        enablehttps=dict(type='bool'),
-        httpport=dict(type='int'),
-        httpsport=dict(type='int'),
-        httpsproto=dict(type='str', choices=['TLS1.1', 'TLS1.2']),
-        limitedstatus=dict(type='bool'),
-        limitedstatusdefault=dict(type='bool'),
-        tls12ciphersuite=dict(type='int', choices=[0, 1, 2, 3, 4])
-    )
-
     module = AnsibleModule(
-        argument_spec=argument_spec,
+        argument_spec=ARGUMENT_SPEC,
         supports_check_mode=True
     )
 
@@ -147,8 +193,11 @@ def main():
     if warnings:
         result['warnings'] = warnings
 
-    commands = []
-    commands = build_commands(module)
+    commands = read_plan(module)
+    if commands is None:
+        commands = [] if config_unchanged(module) else build_commands(module)
+        write_plan(module, commands)
+    save_fingerprints(module, commands)
 
     result['commands'] = commands
 
@@ -158,6 +207,8 @@ def main():
 
         result['changed'] = True
 
+    add_connection_stats(module, result)
+
     module.exit_json(**result)
 
 
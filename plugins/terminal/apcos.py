@@ -25,12 +25,17 @@ from ansible.plugins.terminal import TerminalBase
 
 class TerminalModule(TerminalBase):
 
+    # network_cli matches these against the last received window only, so
+    # both are anchored: the prompt to the end of the window and the error
+    # status to the start of a line, as in "E101: Command Not Found".
+    # Error codes inside command output, such as event log text, are not
+    # errors.
     terminal_stdout_re = [
-        re.compile(br"apc>$"),
+        re.compile(br"apc>\s*$"),
     ]
 
     terminal_stderr_re = [
-        re.compile(br"E10[0-7]"),
+        re.compile(br"^E10[0-7]:", re.M),
     ]
 
     def on_open_shell(self):
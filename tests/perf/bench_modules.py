@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+"""Payload size and startup benchmark of the apcos modules
+
+For every module this builds the AnsiballZ payload the controller would send
+and reports its size, the time a fresh interpreter takes to import the module,
+the time a re-import takes once everything is cached and the time main() takes
+to reach exit_json() against a fake connection serving the unit test fixtures.
+
+Run it from a checkout placed in an ansible_collections/haught/apcos tree:
+
+    python tests/perf/bench_modules.py --save baseline.json
+    python tests/perf/bench_modules.py --compare baseline.json
+
+With --compare the exit status is 1 if any module regressed by more than the
+thresholds.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import base64
+import importlib
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import zipfile
+
+COLLECTION = 'haught.apcos'
+PACKAGE = 'ansible_collections.haught.apcos'
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COLLECTION_ROOT = os.path.dirname(os.path.dirname(HERE))
+COLLECTIONS_PATH = os.path.dirname(os.path.dirname(os.path.dirname(COLLECTION_ROOT)))
+FIXTURES = os.path.join(COLLECTION_ROOT, 'tests', 'unit', 'plugins', 'modules', 'network', 'apcos', 'fixtures')
+
+# Arguments of a no-change run of every module against the fixtures.
+# apcos_reboot is left out as it waits for the device to come back.
+MODULE_ARGS = {
+    'apcos_command': {'commands': ['system', 'dns']},
+    'apcos_config_lines': {'lines': ['tcpip -h apctest2-1', 'console -t disable']},
+    'apcos_datalog': {},
+    'apcos_dns': {'primaryserver': '1.1.1.1', 'domainname': 'example.net'},
+    'apcos_drift': {'profile': {'dns': {'primarydnsserver': '1.1.1.1'}, 'system': {'name': 'apctest2-1'}}},
+    'apcos_eventlog': {},
+    'apcos_facts': {},
+    'apcos_ftp': {'port': 21},
+    'apcos_ntp': {'primaryserver': '10.10.10.10'},
+    'apcos_radius': {'access': 'local'},
+    'apcos_session': {},
+    'apcos_smtp': {'port': 25},
+    'apcos_snmp': {'enable': False},
+    'apcos_snmptrap': {'receivers': [
+        {'address': '10.11.12.13', 'authtraps': True},
+        {'address': '10.11.12.14', 'authtraps': False},
+    ]},
+    'apcos_snmpv3': {'enable': True},
+    'apcos_system': {'name': 'apctest2-1'},
+    'apcos_user': {'accounts': [{'name': 'apc'}]},
+    'apcos_web': {'enablehttp': False},
+}
+
+# Fixtures of commands whose output is not named after the command
+FIXTURE_NAMES = {
+    'data': 'apcos_config_datalog.cfg',
+}
+
+METRICS = ('payload_bytes', 'payload_files', 'cold_import_ms', 'warm_import_ms', 'main_ms')
+SIZE_METRICS = ('payload_bytes', 'payload_files')
+
+
+def fixture_output(command):
+    """Return the unit test fixture of a command, or a bare success status"""
+    words = command.split()
+    names = [
+        FIXTURE_NAMES.get(command, 'apcos_config_%s.cfg' % '_'.join(words)),
+        'apcos_config_%s.cfg' % words[0],
+    ]
+    for name in names:
+        path = os.path.join(FIXTURES, name)
+        if os.path.exists(path):
+            with open(path) as f:
+                return f.read()
+    return 'E000: Success\n'
+
+
+class FakeConnection(object):
+    """Serves the unit test fixtures in place of the persistent connection"""
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path
+
+    def _fixture(self, command):
+        return fixture_output(command)
+
+    def get_capabilities(self):
+        return json.dumps({'network_api': 'cliconf'})
+
+    def get_config(self, source='date', flags=None):
+        return self._fixture(' '.join([source] + list(flags or [])))
+
+    def get_configs(self, sources):
+        return [self._fixture(source) for source in sources]
+
+    def get(self, command, prompt=None, answer=None, **kwargs):
+        return self._fixture(command)
+
+    def edit_config(self, commands):
+        return None
+
+    def get_device_info(self):
+        return {'network_os': 'apcos', 'network_os_model': 'AP9641', 'network_os_hostname': 'apctest2-1'}
+
+    def get_stats(self, mark=False):
+        return {}
+
+    def get_option(self, option):
+        return None
+
+    def close(self):
+        return None
+
+
+def find_collections_path():
+    if os.path.basename(os.path.dirname(os.path.dirname(COLLECTION_ROOT))) == 'ansible_collections':
+        return COLLECTIONS_PATH
+    from ansible import constants as C
+    for path in C.COLLECTIONS_PATHS:
+        if os.path.isdir(os.path.join(path, 'ansible_collections', 'haught', 'apcos')):
+            return path
+    raise SystemExit('unable to find the %s collection, use --collections-path' % COLLECTION)
+
+
+def setup_collection_loader(collections_path):
+    from ansible.utils.collection_loader._collection_finder import _AnsibleCollectionFinder
+    _AnsibleCollectionFinder(paths=[collections_path])._install()
+
+
+def module_names():
+    path = os.path.join(COLLECTION_ROOT, 'plugins', 'modules')
+    names = sorted(name[:-3] for name in os.listdir(path) if name.startswith('apcos_') and name.endswith('.py'))
+    return [name for name in names if name in MODULE_ARGS]
+
+
+def payload_size(name, args):
+    from ansible.executor.module_common import modify_module
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.template import Templar
+
+    path = os.path.join(COLLECTION_ROOT, 'plugins', 'modules', name + '.py')
+    data = modify_module('%s.%s' % (COLLECTION, name), path, dict(args), Templar(loader=DataLoader()),
+                         task_vars={'ansible_python_interpreter': sys.executable},
+                         module_compression='ZIP_DEFLATED')[0]
+    match = re.search(br"ZIPDATA = (?:r)?(?:'''|\"\"\")(.*?)(?:'''|\"\"\")", data, re.S)
+    files = len(zipfile.ZipFile(io.BytesIO(base64.b64decode(match.group(1)))).namelist()) if match else 0
+    return len(data), files
+
+
+def cold_import_ms(name, collections_path, runs):
+    code = (
+        'import sys, time\n'
+        'start = time.perf_counter()\n'
+        'import %s.plugins.modules.%s\n'
+        'sys.stdout.write(str((time.perf_counter() - start) * 1000))\n' % (PACKAGE, name)
+    )
+    env = dict(os.environ, PYTHONPATH=collections_path + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    timings = []
+    for dummy in range(runs):
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        timings.append(float(out))
+    return min(timings)
+
+
+def warm_import_ms(name, runs):
+    module = importlib.import_module('%s.plugins.modules.%s' % (PACKAGE, name))
+    timings = []
+    for dummy in range(runs):
+        start = time.perf_counter()
+        importlib.reload(module)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main_ms(name, args, runs):
+    from ansible.module_utils import basic
+    from ansible.module_utils.common.text.converters import to_bytes
+    apcos = importlib.import_module('%s.plugins.module_utils.network.apcos.apcos' % PACKAGE)
+    module = importlib.import_module('%s.plugins.modules.%s' % (PACKAGE, name))
+
+    apcos.Connection = FakeConnection
+    module_args = dict(args, _ansible_remote_tmp='/tmp', _ansible_keep_remote_files=False)
+    timings = []
+    stdout = sys.stdout
+    for dummy in range(runs):
+        basic._ANSIBLE_ARGS = to_bytes(json.dumps({'ANSIBLE_MODULE_ARGS': module_args}))
+        sys.stdout = io.StringIO()
+        start = time.perf_counter()
+        try:
+            module.main()
+        except SystemExit as exc:
+            if exc.code:
+                sys.stdout, output = stdout, sys.stdout.getvalue()
+                raise RuntimeError('%s failed: %s' % (name, output))
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            sys.stdout = stdout
+        timings.append(elapsed)
+    return min(timings)
+
+
+def measure(name, collections_path, runs):
+    args = MODULE_ARGS[name]
+    size, files = payload_size(name, args)
+    return {
+        'payload_bytes': size,
+        'payload_files': files,
+        'cold_import_ms': round(cold_import_ms(name, collections_path, runs), 2),
+        'warm_import_ms': round(warm_import_ms(name, runs), 3),
+        'main_ms': round(main_ms(name, args, runs), 3),
+    }
+
+
+def regressions(results, baseline, size_threshold, time_threshold, time_floor):
+    failed = []
+    for name, metrics in sorted(results.items()):
+        for metric in METRICS:
+            before = baseline.get(name, {}).get(metric)
+            if not before:
+                continue
+            threshold = size_threshold if metric in SIZE_METRICS else time_threshold
+            if metric not in SIZE_METRICS and metrics[metric] - before < time_floor:
+                continue
+            if metrics[metric] > before * (1 + threshold):
+                failed.append('%s %s: %s -> %s' % (name, metric, before, metrics[metric]))
+    return failed
+
+
+def report(results):
+    print('%-16s %14s %14s %15s %15s %10s' % (('module',) + METRICS))
+    for name, metrics in sorted(results.items()):
+        print('%-16s %14d %14d %15.2f %15.3f %10.3f' % ((name,) + tuple(metrics[metric] for metric in METRICS)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the payload size and startup time of the apcos modules')
+    parser.add_argument('modules', nargs='*', help='modules to measure, all by default')
+    parser.add_argument('--collections-path',
+                        help='directory holding ansible_collections/haught/apcos, found from the checkout '
+                             'or the configured collections paths by default')
+    parser.add_argument('--runs', type=int, default=5, help='runs per timing, the fastest is kept')
+    parser.add_argument('--save', metavar='PATH', help='write the results to a JSON file')
+    parser.add_argument('--compare', metavar='PATH', help='fail on regressions against a saved JSON file')
+    parser.add_argument('--size-threshold', type=float, default=0.05,
+                        help='allowed relative growth of payload size and file count')
+    parser.add_argument('--time-threshold', type=float, default=0.5,
+                        help='allowed relative growth of the timings')
+    parser.add_argument('--time-floor', type=float, default=1.0,
+                        help='timings that grew by fewer milliseconds are not regressions')
+    args = parser.parse_args()
+
+    args.collections_path = args.collections_path or find_collections_path()
+    sys.path.insert(0, args.collections_path)
+    setup_collection_loader(args.collections_path)
+
+    names = args.modules or module_names()
+    results = dict((name, measure(name, args.collections_path, args.runs)) for name in names)
+    report(results)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failed = regressions(results, baseline, args.size_threshold, args.time_threshold, args.time_floor)
+        if failed:
+            print('\nregressions:\n  ' + '\n  '.join(failed))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,460 @@
+#!/usr/bin/env python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+"""Load test of the apcos modules against a fleet of simulated cards
+
+This starts one asyncio SSH server per simulated network management card on
+localhost, each on its own port. The cards answer the NMC CLI from the unit
+test fixtures with log-normal latency, limit the number of concurrent
+sessions and can drop or stall sessions at a given rate.
+
+Every module is then run with ansible-playbook against the whole fleet over
+network_cli, one playbook per module, and the report shows per module:
+
+  - the number of hosts that were ok, failed or unreachable
+  - the throughput in hosts per second of wall time
+  - the 50th, 95th and 99th percentile and the maximum task time
+  - the CPU seconds and peak resident memory of the controller, which
+    covers ansible-playbook, its forks and the persistent ansible-connection
+    processes
+  - the sessions, rejected sessions and commands seen by the cards
+
+    python tests/perf/load_fleet.py --cards 500 --forks 50
+    python tests/perf/load_fleet.py apcos_dns --cards 2000 --forks 200 --drop-rate 0.01
+
+Requires asyncssh, ansible.netcommon and paramiko or ansible-pylibssh.
+Thousands of cards need as many file descriptors, the soft limit is raised
+to the hard limit at start.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from bench_modules import MODULE_ARGS, find_collections_path, fixture_output
+
+try:
+    import asyncssh
+    HAS_ASYNCSSH = True
+except ImportError:
+    HAS_ASYNCSSH = False
+
+BANNER = (
+    'Schneider Electric                      Network Management Card AOS      v1.4.2.1\r\n'
+    '(c)Copyright 2021 All Rights Reserved   Smart-UPS & Matrix-UPS APP       v1.4.2.1\r\n'
+)
+PROMPT = '\r\napc>'
+PAGER = '\r\n<ESC>- Exit, <ENTER>- Refresh, <SPACE>- Next, <D>- Delete'
+PAGED_COMMANDS = ('data', 'eventlog')
+EXIT_COMMANDS = ('bye', 'exit', 'quit')
+
+COUNTERS = ('sessions', 'rejected', 'commands', 'dropped', 'stalled')
+
+# Records the time of every task per host, written into the callback
+# directory of the generated playbooks
+TIMING_CALLBACK = '''
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'fleet_timing'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self._start = {}
+        self._output = open(os.environ['FLEET_TIMING_OUTPUT'], 'a')
+
+    def v2_runner_on_start(self, host, task):
+        self._start[host.get_name()] = time.time()
+
+    def _record(self, result, status):
+        host = result._host.get_name()
+        elapsed = time.time() - self._start.pop(host, time.time())
+        self._output.write(json.dumps({'host': host, 'status': status, 'elapsed': elapsed}) + '\\n')
+        self._output.flush()
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, 'ok')
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result, 'failed')
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, 'unreachable')
+'''
+
+
+class LineReader(object):
+    """Reads and echoes one command line from a shell without a line editor"""
+
+    def __init__(self, process):
+        self._process = process
+        self._skip_lf = False
+
+    async def readline(self):
+        chars = []
+        while True:
+            char = await self._process.stdin.read(1)
+            if not char:
+                return None
+            if char == '\n' and self._skip_lf:
+                self._skip_lf = False
+                continue
+            self._skip_lf = char == '\r'
+            if char in '\r\n':
+                return ''.join(chars).strip()
+            if char != '\x1b':
+                self._process.stdout.write(char)
+            chars.append(char)
+
+
+class FakeCard(object):
+    """One simulated network management card"""
+
+    def __init__(self, index, args):
+        self.name = 'nmc%05d' % index
+        self.port = args.port + index
+        self.args = args
+        self.rng = random.Random('%s-%d' % (args.seed, index))
+        self.active = 0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def latency(self, median):
+        if not median:
+            return 0
+        return self.rng.lognormvariate(math.log(median), self.args.jitter)
+
+    def server(self):
+        return CardServer(self)
+
+    async def shell(self, process):
+        reader = LineReader(process)
+        try:
+            await asyncio.sleep(self.latency(self.args.login_latency))
+            process.stdout.write(BANNER + PROMPT)
+            while True:
+                command = await reader.readline()
+                if command is None or command in EXIT_COMMANDS:
+                    break
+                if not command:
+                    process.stdout.write(PROMPT)
+                    continue
+                self.counters['commands'] += 1
+                await asyncio.sleep(self.latency(self.args.latency))
+                roll = self.rng.random()
+                if roll < self.args.drop_rate:
+                    self.counters['dropped'] += 1
+                    break
+                if roll < self.args.drop_rate + self.args.stall_rate:
+                    self.counters['stalled'] += 1
+                    await asyncio.sleep(self.args.stall_time)
+                    break
+                process.stdout.write('\r\n' + fixture_output(command).rstrip('\n').replace('\n', '\r\n'))
+                if command.split()[0] in PAGED_COMMANDS:
+                    process.stdout.write(PAGER)
+                    if await reader.readline() is None:
+                        break
+                process.stdout.write(PROMPT)
+        except (asyncssh.BreakReceived, asyncssh.TerminalSizeChanged, asyncssh.DisconnectError):
+            pass
+        finally:
+            process.exit(0)
+
+
+class CardServer(asyncssh.SSHServer if HAS_ASYNCSSH else object):
+    """Accepts any password and enforces the session limit of a card"""
+
+    def __init__(self, card):
+        self._card = card
+        self._counted = False
+
+    def connection_made(self, conn):
+        self._conn = conn
+
+    def connection_lost(self, exc):
+        if self._counted:
+            self._card.active -= 1
+
+    def begin_auth(self, username):
+        if self._card.active >= self._card.args.max_sessions:
+            self._card.counters['rejected'] += 1
+            self._conn.disconnect(asyncssh.DISC_TOO_MANY_CONNECTIONS, 'Too many sessions')
+            return True
+        self._card.active += 1
+        self._card.counters['sessions'] += 1
+        self._counted = True
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    def validate_password(self, username, password):
+        return True
+
+
+class ProcessSampler(object):
+    """Samples memory and CPU of ansible-playbook and its helper processes
+
+    The forks are children of ansible-playbook, but the persistent
+    ansible-connection processes detach from it, so those are matched by
+    their command line.
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.peak_rss = 0
+        self.connection_cpu = {}
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+        self._ticks = os.sysconf('SC_CLK_TCK')
+        self._uid = os.getuid()
+
+    def _read(self, pid):
+        with open('/proc/%s/stat' % pid) as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/%s/cmdline' % pid, 'rb') as f:
+            cmdline = f.read()
+        # fields start at the state, the third field of the stat file
+        return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[21]), cmdline
+
+    def sample(self):
+        if not os.path.isdir('/proc'):
+            return
+        processes = {}
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                if os.stat('/proc/%s' % pid).st_uid != self._uid:
+                    continue
+                processes[int(pid)] = self._read(pid)
+            except (IOError, OSError, IndexError, ValueError):
+                continue
+        children = {}
+        for pid, (ppid, cpu, rss, cmdline) in processes.items():
+            children.setdefault(ppid, []).append(pid)
+        tree = set()
+        stack = [self.pid]
+        while stack:
+            pid = stack.pop()
+            if pid in processes and pid not in tree:
+                tree.add(pid)
+                stack.extend(children.get(pid, []))
+        rss = 0
+        for pid, (ppid, cpu, pages, cmdline) in processes.items():
+            connection = b'ansible-connection' in cmdline
+            if connection:
+                self.connection_cpu[pid] = float(cpu) / self._ticks
+            if connection or pid in tree:
+                rss += pages * self._page_size
+        self.peak_rss = max(self.peak_rss, rss)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(fraction * len(values))) - 1)]
+
+
+def write_run_files(workdir, cards, args):
+    inventory = os.path.join(workdir, 'inventory.ini')
+    with open(inventory, 'w') as f:
+        f.write('[fleet]\n')
+        for card in cards:
+            f.write('%s ansible_port=%d\n' % (card.name, card.port))
+        f.write('\n[fleet:vars]\n')
+        for key, value in (
+            ('ansible_host', '127.0.0.1'),
+            ('ansible_connection', 'ansible.netcommon.network_cli'),
+            ('ansible_network_os', 'haught.apcos.apcos'),
+            ('ansible_user', 'apc'),
+            ('ansible_password', 'apc'),
+            ('ansible_command_timeout', args.command_timeout),
+        ):
+            f.write('%s=%s\n' % (key, value))
+    callbacks = os.path.join(workdir, 'callback_plugins')
+    os.mkdir(callbacks)
+    with open(os.path.join(callbacks, 'fleet_timing.py'), 'w') as f:
+        f.write(TIMING_CALLBACK)
+    return inventory, callbacks
+
+
+async def run_module(name, cards, workdir, inventory, callbacks, args):
+    playbook = os.path.join(workdir, '%s.yml' % name)
+    with open(playbook, 'w') as f:
+        json.dump([{
+            'hosts': 'fleet',
+            'gather_facts': False,
+            'tasks': [{'haught.apcos.%s' % name: MODULE_ARGS[name]}],
+        }], f)
+    timings = os.path.join(workdir, '%s.jsonl' % name)
+    env = dict(
+        os.environ,
+        ANSIBLE_COLLECTIONS_PATH=args.collections_path,
+        ANSIBLE_CALLBACK_PLUGINS=callbacks,
+        ANSIBLE_CALLBACKS_ENABLED='fleet_timing',
+        ANSIBLE_FORKS=str(args.forks),
+        ANSIBLE_HOST_KEY_CHECKING='False',
+        ANSIBLE_RETRY_FILES_ENABLED='False',
+        ANSIBLE_LOCAL_TEMP=os.path.join(workdir, 'tmp'),
+        ANSIBLE_PERSISTENT_CONTROL_PATH_DIR=os.path.join(workdir, 'pc'),
+        FLEET_TIMING_OUTPUT=timings,
+    )
+    for card in cards:
+        card.counters = dict.fromkeys(COUNTERS, 0)
+
+    loop = asyncio.get_event_loop()
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.time()
+    process = await asyncio.create_subprocess_exec(
+        args.ansible_playbook, '-i', inventory, playbook,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL, env=env)
+    sampler = ProcessSampler(process.pid)
+    while process.returncode is None:
+        await loop.run_in_executor(None, sampler.sample)
+        try:
+            await asyncio.wait_for(process.wait(), args.sample_interval)
+        except asyncio.TimeoutError:
+            pass
+    wall = time.time() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - usage.ru_utime) + (after.ru_stime - usage.ru_stime)
+
+    records = []
+    if os.path.exists(timings):
+        with open(timings) as f:
+            records = [json.loads(line) for line in f]
+    statuses = [record['status'] for record in records]
+    elapsed = [record['elapsed'] for record in records if record['status'] == 'ok']
+    result = {
+        'hosts': len(cards),
+        'ok': statuses.count('ok'),
+        'failed': statuses.count('failed'),
+        'unreachable': statuses.count('unreachable'),
+        'wall_s': round(wall, 2),
+        'hosts_per_s': round(len(records) / wall, 2) if wall else None,
+        'cpu_s': round(cpu + sum(sampler.connection_cpu.values()), 2),
+        'peak_rss_mb': round(sampler.peak_rss / 1048576.0, 1),
+    }
+    for key, fraction in (('p50_s', 0.5), ('p95_s', 0.95), ('p99_s', 0.99), ('max_s', 1.0)):
+        value = percentile(elapsed, fraction)
+        result[key] = round(value, 3) if value is not None else None
+    for counter in COUNTERS:
+        result[counter] = sum(card.counters[counter] for card in cards)
+    return result
+
+
+async def run(args):
+    key = asyncssh.generate_private_key('ssh-ed25519')
+    cards = [FakeCard(index, args) for index in range(args.cards)]
+    servers = []
+    for card in cards:
+        servers.append(await asyncssh.create_server(
+            card.server, '127.0.0.1', card.port, server_host_keys=[key], process_factory=card.shell,
+            line_editor=False, encoding='utf-8'))
+    workdir = tempfile.mkdtemp(prefix='apcos_fleet_')
+    try:
+        inventory, callbacks = write_run_files(workdir, cards, args)
+        results = {}
+        for name in args.modules:
+            results[name] = await run_module(name, cards, workdir, inventory, callbacks, args)
+            report_line(name, results[name])
+        return results
+    finally:
+        for server in servers:
+            server.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+COLUMNS = (
+    ('ok', '%6d'), ('failed', '%6d'), ('unreachable', '%11d'), ('wall_s', '%8.2f'), ('hosts_per_s', '%11.2f'),
+    ('p50_s', '%7.3f'), ('p95_s', '%7.3f'), ('p99_s', '%7.3f'), ('max_s', '%7.3f'), ('cpu_s', '%8.2f'),
+    ('peak_rss_mb', '%11.1f'), ('sessions', '%8d'), ('rejected', '%8d'), ('commands', '%8d'),
+)
+
+
+def report_header():
+    print('%-16s' % 'module' + ' '.join('%*s' % (len(fmt % 0), name) for name, fmt in COLUMNS))
+
+
+def report_line(name, result):
+    cells = []
+    for column, fmt in COLUMNS:
+        value = result[column]
+        cells.append(fmt % value if value is not None else '%*s' % (len(fmt % 0), '-'))
+    print('%-16s' % name + ' '.join(cells))
+    sys.stdout.flush()
+
+
+def raise_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the apcos modules against a fleet of simulated cards')
+    parser.add_argument('modules', nargs='*', help='modules to run, all by default')
+    parser.add_argument('--cards', type=int, default=500, help='number of simulated cards')
+    parser.add_argument('--forks', type=int, default=50, help='forks of ansible-playbook')
+    parser.add_argument('--port', type=int, default=20000, help='port of the first card, the others follow')
+    parser.add_argument('--latency', type=float, default=0.3, help='median seconds a card takes per command')
+    parser.add_argument('--login-latency', type=float, default=1.0, help='median seconds a card takes to log in')
+    parser.add_argument('--jitter', type=float, default=0.5, help='sigma of the log-normal latency')
+    parser.add_argument('--max-sessions', type=int, default=4, help='concurrent sessions allowed per card')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='fraction of commands that drop the session')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='fraction of commands that never answer')
+    parser.add_argument('--stall-time', type=float, default=120, help='seconds a stalled session stays open')
+    parser.add_argument('--command-timeout', type=int, default=30, help='ansible_command_timeout of the hosts')
+    parser.add_argument('--sample-interval', type=float, default=0.5, help='seconds between process samples')
+    parser.add_argument('--seed', default='apcos', help='seed of the simulated latencies and failures')
+    parser.add_argument('--save', metavar='PATH', help='write the results to a JSON file')
+    parser.add_argument('--collections-path', help='directory holding ansible_collections/haught/apcos')
+    args = parser.parse_args()
+
+    if not HAS_ASYNCSSH:
+        raise SystemExit('asyncssh is required to simulate the cards')
+    args.ansible_playbook = shutil.which('ansible-playbook')
+    if not args.ansible_playbook:
+        raise SystemExit('ansible-playbook not found in PATH')
+    args.collections_path = args.collections_path or find_collections_path()
+    args.modules = args.modules or sorted(MODULE_ARGS)
+    unknown = sorted(set(args.modules) - set(MODULE_ARGS))
+    if unknown:
+        raise SystemExit('no arguments known for %s' % ', '.join(unknown))
+
+    raise_file_limit()
+    report_header()
+    results = asyncio.run(run(args))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+#
+# Copyright: Ansible Team
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+"""Replay recorded NMC sessions through the apcos cliconf and terminal plugins
+
+Transcripts are recorded from real devices by setting the record_path option
+of the apcos cliconf plugin, for example with ansible_apcos_record_path. Each
+line holds one command with its prompt, answer, output and elapsed time.
+
+Replaying sends every command through the real Cliconf plugin on top of a
+connection that serves the recorded output. The output is fed back in 256
+byte windows and checked against the terminal plugin patterns the way
+network_cli does, so changes to either plugin show up in the timings.
+
+    python tests/perf/replay.py tests/perf/transcripts/sample.jsonl
+    python tests/perf/replay.py session.jsonl --speed 1
+    python tests/perf/replay.py session.jsonl --module apcos_dns --args '{"primaryserver": "1.1.1.1"}'
+
+--speed 0, the default, replays without delays, 1 at the recorded speed and
+larger values that many times faster.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import gzip
+import importlib
+import io
+import json
+import sys
+import time
+from collections import deque
+
+PACKAGE = 'ansible_collections.haught.apcos'
+
+# network_cli reads the channel in chunks of this size and matches the
+# terminal patterns against a window of the same size
+WINDOW = 256
+PROMPT = b'\r\napc>'
+
+
+def load_transcript(path):
+    opener = gzip.open if path.endswith('.gz') else io.open
+    with opener(path, 'rt') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayConnection(object):
+    """Stands in for network_cli below the Cliconf plugin
+
+    Entries are served per command in recorded order. Once the entries of a
+    command are used up the last one is served again, so a transcript can be
+    replayed any number of times.
+    """
+
+    def __init__(self, entries, speed=0):
+        from ansible.errors import AnsibleConnectionFailure
+        from ansible_collections.haught.apcos.plugins.terminal.apcos import TerminalModule
+
+        self._error = AnsibleConnectionFailure
+        self._stdout_re = TerminalModule.terminal_stdout_re
+        self._stderr_re = TerminalModule.terminal_stderr_re
+        self._speed = speed
+        self._queues = {}
+        self._last = {}
+        for entry in entries:
+            self._queues.setdefault(entry['command'], deque()).append(entry)
+
+    def _entry(self, command):
+        queue = self._queues.get(command)
+        if queue:
+            self._last[command] = queue.popleft()
+        if command not in self._last:
+            raise self._error('command not in transcript: %s' % command)
+        return self._last[command]
+
+    def _receive(self, output):
+        data = output.encode('utf-8') + PROMPT
+        for end in range(WINDOW, len(data) + WINDOW, WINDOW):
+            window = data[max(0, min(end, len(data)) - WINDOW):min(end, len(data))]
+            if any(regex.search(window) for regex in self._stderr_re):
+                raise self._error(window)
+            if any(regex.search(window) for regex in self._stdout_re):
+                return data[:-len(PROMPT)]
+        raise self._error('prompt not found in the output')
+
+    def send(self, command, prompt=None, answer=None, sendonly=False, newline=True, prompt_retry_check=False,
+             check_all=False):
+        entry = self._entry(command.decode('utf-8') if isinstance(command, bytes) else command)
+        if self._speed:
+            time.sleep(entry.get('elapsed', 0) / self._speed)
+        if 'error' in entry:
+            raise self._error(entry['error'])
+        return self._receive(entry.get('output', ''))
+
+    def queue_message(self, level, message):
+        pass
+
+
+class ReplayRPC(object):
+    """Stands in for the module_utils Connection to the persistent connection"""
+
+    cliconf = None
+
+    def __init__(self, socket_path=None):
+        pass
+
+    def get_capabilities(self):
+        return json.dumps({'network_api': 'cliconf'})
+
+    def __getattr__(self, name):
+        return getattr(self.cliconf, name)
+
+
+def make_cliconf(entries, speed, options):
+    from ansible.plugins.loader import cliconf_loader
+    cliconf = cliconf_loader.get('haught.apcos.apcos', ReplayConnection(entries, speed))
+    cliconf.set_options(direct=options)
+    return cliconf
+
+
+def replay_transcript(entries, speed, options):
+    cliconf = make_cliconf(entries, speed, options)
+    start = time.time()
+    for entry in entries:
+        try:
+            cliconf.get(entry['command'], prompt=entry.get('prompt'), answer=entry.get('answer'))
+        except Exception:
+            if 'error' not in entry:
+                raise
+    return time.time() - start, cliconf.get_stats()
+
+
+def replay_module(entries, speed, options, name, args):
+    from ansible.module_utils import basic
+    from ansible.module_utils._text import to_bytes
+    apcos = importlib.import_module('%s.plugins.module_utils.network.apcos.apcos' % PACKAGE)
+    module = importlib.import_module('%s.plugins.modules.%s' % (PACKAGE, name))
+
+    ReplayRPC.cliconf = make_cliconf(entries, speed, options)
+    apcos.Connection = ReplayRPC
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps({'ANSIBLE_MODULE_ARGS': dict(args, _ansible_remote_tmp='/tmp')}))
+    stdout = sys.stdout
+    sys.stdout = io.StringIO()
+    start = time.time()
+    try:
+        module.main()
+    except SystemExit:
+        pass
+    finally:
+        elapsed = time.time() - start
+        sys.stdout, output = stdout, sys.stdout.getvalue()
+    result = json.loads(output)
+    if result.get('failed'):
+        raise RuntimeError('%s failed: %s' % (name, result.get('msg')))
+    return elapsed, ReplayRPC.cliconf.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded NMC sessions through the apcos plugins')
+    parser.add_argument('transcript', help='JSON lines transcript, optionally gzip compressed')
+    parser.add_argument('--speed', type=float, default=0, help='0 for no delays, 1 for recorded speed, N for N times faster')
+    parser.add_argument('--runs', type=int, default=5, help='number of replays, the fastest is reported')
+    parser.add_argument('--module', help='run this module against the transcript instead of replaying it in order')
+    parser.add_argument('--args', default='{}', help='JSON arguments of --module')
+    parser.add_argument('--cache-ttl', type=int, default=0, help='cache_ttl option of the cliconf plugin')
+    parser.add_argument('--collections-path', help='directory holding ansible_collections/haught/apcos')
+    args = parser.parse_args()
+
+    if args.collections_path:
+        sys.path.insert(0, args.collections_path)
+        from ansible.utils.collection_loader._collection_finder import _AnsibleCollectionFinder
+        _AnsibleCollectionFinder(paths=[args.collections_path])._install()
+    else:
+        from bench_modules import find_collections_path, setup_collection_loader
+        path = find_collections_path()
+        sys.path.insert(0, path)
+        setup_collection_loader(path)
+
+    entries = load_transcript(args.transcript)
+    options = {'cache_ttl': args.cache_ttl}
+    recorded = sum(entry.get('elapsed', 0) for entry in entries)
+    runs = []
+    for dummy in range(args.runs):
+        if args.module:
+            runs.append(replay_module(entries, args.speed, options, args.module, json.loads(args.args)))
+        else:
+            runs.append(replay_transcript(entries, args.speed, options))
+    elapsed, stats = min(runs, key=lambda run: run[0])
+
+    print('entries:        %d' % len(entries))
+    print('recorded:       %.3f ms' % (recorded * 1000))
+    print('replayed:       %.3f ms (fastest of %d)' % (elapsed * 1000, args.runs))
+    print('commands:       %d' % stats['commands'])
+    print('bytes read:     %d' % stats['bytes_read'])
+    print('errors:         %d' % stats['errors'])
+    print('cache hits:     %d' % stats['cache_hits'])
+    for name, command in sorted(stats['per_command'].items()):
+        print('  %-14s %4d  %.3f ms' % (name, command['count'], command['time'] * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
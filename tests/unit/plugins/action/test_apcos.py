@@ -0,0 +1,151 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import os
+import tempfile
+
+from ansible.playbook.task import Task
+from ansible_collections.community.network.tests.unit.compat import unittest
+from ansible_collections.community.network.tests.unit.compat.mock import MagicMock, patch
+from ansible_collections.haught.apcos.plugins.action.apcos import ActionModule
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'modules', 'network', 'apcos', 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return f.read().strip()
+
+
+class TestApcosAction(unittest.TestCase):
+
+    def setUp(self):
+        self.task = MagicMock(Task)
+        self.task.action = 'haught.apcos.apcos_dns'
+        self.task.async_val = 0
+        self.task.check_mode = False
+        self.task.args = {'primaryserver': '1.1.1.1'}
+        self.play_context = MagicMock()
+        self.play_context.check_mode = False
+        self.connection = MagicMock()
+        self.templar = MagicMock()
+        self.templar.template.side_effect = lambda value: value
+        self.action = ActionModule(self.task, self.connection, self.play_context, loader=None,
+                                   templar=self.templar, shared_loader_obj=None)
+        self.action._execute_module = MagicMock(return_value={'changed': True, 'commands': ['dns -p 8.8.8.8']})
+        self.action._remove_tmp_path = MagicMock()
+
+        self.mock_time = patch('ansible_collections.haught.apcos.plugins.action.apcos.time')
+        self.time = self.mock_time.start()
+        self.time.time.return_value = 1000.0
+
+        self.task_vars = {'ansible_facts': {
+            'net_config': {
+                'dns': load_fixture('apcos_config_dns.cfg'),
+                'system': load_fixture('apcos_config_system.cfg'),
+            },
+            'net_config_time': 900.0,
+        }}
+
+    def tearDown(self):
+        self.mock_time.stop()
+
+    def test_no_change_from_snapshot(self):
+        result = self.action.run(task_vars=self.task_vars)
+        self.assertEqual(result['changed'], False)
+        self.assertEqual(result['commands'], [])
+        self.action._execute_module.assert_not_called()
+
+    def test_change_runs_module(self):
+        self.task.args = {'primaryserver': '8.8.8.8', 'overridemanual': 'no'}
+        result = self.action.run(task_vars=self.task_vars)
+        self.assertEqual(result['changed'], True)
+        self.action._execute_module.assert_called_once()
+        self.assertEqual(sorted(result['ansible_facts']['ansible_net_config']), ['system'])
+
+    def test_check_mode_from_snapshot(self):
+        self.play_context.check_mode = True
+        self.task.args = {'primaryserver': '8.8.8.8', 'overridemanual': 'no'}
+        result = self.action.run(task_vars=self.task_vars)
+        self.assertEqual(result['changed'], True)
+        self.assertEqual(result['commands'], ['dns -p 8.8.8.8', 'dns -OM disable'])
+        self.action._execute_module.assert_not_called()
+
+    def test_stale_snapshot(self):
+        self.time.time.return_value = 1201.0
+        self.action.run(task_vars=self.task_vars)
+        self.action._execute_module.assert_called_once()
+
+    def test_max_age(self):
+        self.time.time.return_value = 1201.0
+        self.task_vars['ansible_apcos_config_max_age'] = 600
+        self.action.run(task_vars=self.task_vars)
+        self.action._execute_module.assert_not_called()
+
+    def test_no_snapshot(self):
+        self.action.run(task_vars={})
+        self.action._execute_module.assert_called_once()
+
+    def test_source_missing(self):
+        self.task.action = 'haught.apcos.apcos_ntp'
+        self.task.args = {'primaryserver': '10.10.10.10'}
+        self.action.run(task_vars=self.task_vars)
+        self.action._execute_module.assert_called_once()
+
+    def test_module_only_option(self):
+        self.task.args = {'primaryserver': '1.1.1.1', 'plan_path': '/tmp/plan.json'}
+        self.action.run(task_vars=self.task_vars)
+        self.action._execute_module.assert_called_once()
+
+    def test_invalid_args(self):
+        self.task.args = {'primaryserver': '1.1.1.1', 'unknown': True}
+        self.action.run(task_vars=self.task_vars)
+        self.action._execute_module.assert_called_once()
+
+    def test_check_params(self):
+        self.task.action = 'apcos_snmptrap'
+        self.task.args = {'receivers': [{'address': '10.11.12.13'}, {'address': '10.11.12.13'}]}
+        self.task_vars['ansible_facts']['net_config']['snmptrap'] = load_fixture('apcos_config_snmptrap.cfg')
+        self.action.run(task_vars=self.task_vars)
+        self.action._execute_module.assert_called_once()
+
+    def test_src_template(self):
+        self.task.action = 'haught.apcos.apcos_config_lines'
+        self.task.args = {'src': 'nmc.j2'}
+        self.task_vars['ansible_facts']['net_config']['tcpip'] = load_fixture('apcos_config_tcpip.cfg')
+        with tempfile.NamedTemporaryFile('w', suffix='.j2') as template:
+            template.write('tcpip -h apctest2-1\ndns -p 1.1.1.1\n')
+            template.flush()
+            self.action._find_needle = MagicMock(return_value=template.name)
+            result = self.action.run(task_vars=self.task_vars)
+        self.action._find_needle.assert_called_once_with('templates', 'nmc.j2')
+        self.assertEqual(self.task.args['src'], 'tcpip -h apctest2-1\ndns -p 1.1.1.1\n')
+        self.assertEqual(result['changed'], False)
+        self.action._execute_module.assert_not_called()
+
+    def test_pushed_sources_dropped(self):
+        self.task.action = 'haught.apcos.apcos_config_lines'
+        self.task.args = {'lines': ['dns -p 8.8.8.8', 'ntp -p 10.1.1.1']}
+        self.action._execute_module.return_value = {'changed': True, 'commands': ['dns -p 8.8.8.8', 'ntp -p 10.1.1.1']}
+        result = self.action.run(task_vars=self.task_vars)
+        self.assertEqual(sorted(result['ansible_facts']['ansible_net_config']), ['system'])
@@ -0,0 +1,162 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import json
+import os
+import shutil
+import tempfile
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible_collections.community.network.tests.unit.compat import unittest
+from ansible_collections.community.network.tests.unit.compat.mock import MagicMock, patch
+from ansible_collections.haught.apcos.plugins.cliconf.apcos import Cliconf, LATENCY_BUCKETS
+
+
+class TestApcosCliconf(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = MagicMock()
+        self.connection.send.side_effect = lambda command, **kwargs: b'output of ' + command
+        self.cliconf = Cliconf(self.connection)
+        self.options = {'cache_ttl': 60, 'cache_size': 2}
+        self.cliconf.get_option = lambda option: self.options[option]
+
+        self.mock_time = patch('ansible_collections.haught.apcos.plugins.cliconf.apcos.time')
+        self.time = self.mock_time.start()
+        self.time.time.return_value = 1000.0
+
+    def tearDown(self):
+        self.mock_time.stop()
+
+    def test_cache_disabled(self):
+        self.options['cache_ttl'] = 0
+        self.cliconf.get_config(source='system')
+        self.cliconf.get_config(source='system')
+        self.assertEqual(self.connection.send.call_count, 2)
+
+    def test_cache_hit(self):
+        self.assertEqual(self.cliconf.get_config(source='system'), b'output of system')
+        self.assertEqual(self.cliconf.get('system'), b'output of system')
+        self.assertEqual(self.connection.send.call_count, 1)
+
+    def test_cache_ttl(self):
+        self.cliconf.get('about')
+        self.time.time.return_value = 1061.0
+        self.cliconf.get('about')
+        self.assertEqual(self.connection.send.call_count, 2)
+
+    def test_cache_lru(self):
+        self.cliconf.get('about')
+        self.cliconf.get_config(source='dns')
+        self.cliconf.get('about')
+        self.cliconf.get_config(source='ntp')
+        self.cliconf.get('about')
+        self.assertEqual(self.connection.send.call_count, 3)
+        self.cliconf.get_config(source='dns')
+        self.assertEqual(self.connection.send.call_count, 4)
+
+    def test_get_configs_quoted_flag(self):
+        self.assertEqual(self.cliconf.get_configs(['user -n "John Doe"']), [b'output of user -n "John Doe"'])
+
+    def test_cache_edit_config(self):
+        self.cliconf.get_config(source='dns')
+        self.cliconf.edit_config(['dns -p 1.1.1.1'])
+        self.cliconf.get_config(source='dns')
+        self.assertEqual(self.connection.send.call_count, 3)
+
+    def test_cache_other_command(self):
+        self.cliconf.get_config(source='dns')
+        self.cliconf.get('dns -p 1.1.1.1')
+        self.cliconf.get_config(source='dns')
+        self.assertEqual(self.connection.send.call_count, 3)
+
+    def test_cache_prompt(self):
+        self.cliconf.get('about')
+        self.cliconf.get('reboot', prompt='YES', answer='YES')
+        self.cliconf.get('about')
+        self.assertEqual(self.connection.send.call_count, 3)
+
+    def test_stats(self):
+        self.cliconf.get_config(source='dns')
+        self.cliconf.get('dns')
+        self.time.time.side_effect = [1000.0, 1003.0]
+        self.cliconf.get('user -n apc -pw secret')
+        stats = self.cliconf.get_stats()
+        self.assertEqual(stats['commands'], 2)
+        self.assertEqual(stats['cache_hits'], 1)
+        self.assertEqual(stats['cache_misses'], 1)
+        self.assertEqual(stats['bytes_read'], len(b'output of dns') + len(b'output of user -n apc -pw secret'))
+        self.assertEqual(stats['command_time'], 3.0)
+        self.assertEqual(stats['latency'][0], 1)
+        self.assertEqual(stats['latency'][LATENCY_BUCKETS.index(5)], 1)
+        self.assertEqual(sorted(stats['per_command']), ['dns', 'user'])
+
+    def test_stats_mark(self):
+        self.cliconf.get('system')
+        self.assertEqual(self.cliconf.get_stats(mark=True)['since_mark'], {'system': {'count': 1, 'time': 0.0}})
+        self.cliconf.get('about')
+        self.assertNotIn('since_mark', self.cliconf.get_stats())
+        self.assertEqual(self.cliconf.get_stats(mark=True)['since_mark'], {'about': {'count': 1, 'time': 0.0}})
+
+    def test_stats_timeout(self):
+        self.connection.send.side_effect = AnsibleConnectionFailure('command timeout triggered, timeout value is 30 secs.')
+        self.assertRaises(AnsibleConnectionFailure, self.cliconf.get, 'about')
+        stats = self.cliconf.get_stats()
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_record_transcript(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            self.options['record_path'] = os.path.join(tmpdir, 'session.jsonl')
+            self.options['cache_ttl'] = 0
+            self.time.time.side_effect = [1000.0, 1000.25, 1001.0, 1001.5]
+            self.cliconf.get_config(source='dns')
+            self.cliconf.get('reboot', prompt='YES', answer='YES')
+            with open(self.options['record_path']) as f:
+                entries = [json.loads(line) for line in f]
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(entries, [
+            {'command': 'dns', 'prompt': None, 'answer': None, 'elapsed': 0.25, 'output': 'output of dns'},
+            {'command': 'reboot', 'prompt': 'YES', 'answer': 'YES', 'elapsed': 0.5, 'output': 'output of reboot'},
+        ])
+
+    def test_stats_connect(self):
+        self.connection._connected = False
+        self.connection._connect.side_effect = lambda: setattr(self.connection, '_connected', True)
+        self.options['cache_ttl'] = 0
+        self.time.time.side_effect = [1000.0, 1002.5, 1002.5, 1003.0, 1003.0, 1003.5]
+        self.cliconf.get('about')
+        self.cliconf.get('about -h')
+        stats = self.cliconf.get_stats()
+        self.assertEqual(self.connection._connect.call_count, 1)
+        self.assertEqual(stats['connects'], 1)
+        self.assertEqual(stats['connect_time'], 2.5)
+        self.assertEqual(stats['last_connect'], {'at': 1002.5, 'time': 2.5})
+        self.assertEqual(stats['per_command']['about']['time'], 1.0)
+
+    def test_cache_live_source(self):
+        self.cliconf.get_config(source='session')
+        self.cliconf.get('session')
+        self.assertEqual(self.connection.send.call_count, 2)
@@ -0,0 +1,168 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import os
+import socket
+import threading
+
+from ansible.inventory.data import InventoryData
+from ansible.parsing.dataloader import DataLoader
+from ansible.template import Templar
+from ansible.errors import AnsibleParserError
+from ansible_collections.community.network.tests.unit.compat import unittest
+from ansible_collections.community.network.tests.unit.compat.mock import AsyncMock, MagicMock, patch
+from ansible_collections.haught.apcos.plugins.inventory.apcos_scan import InventoryModule
+
+
+class BannerServer(threading.Thread):
+    """Answers every connection with an SSH banner"""
+
+    def __init__(self, address, port, banner):
+        super(BannerServer, self).__init__()
+        self.daemon = True
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((address, port))
+        self.sock.listen(5)
+        self.port = self.sock.getsockname()[1]
+        self.banner = banner
+
+    def run(self):
+        while True:
+            try:
+                conn, dummy = self.sock.accept()
+            except OSError:
+                return
+            conn.sendall(self.banner)
+            conn.close()
+
+    def stop(self):
+        self.sock.close()
+
+
+class TestApcosScanInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.options = {
+            'networks': ['127.0.0.1/32'],
+            'exclude': [],
+            'port': 22,
+            'timeout': 2,
+            'concurrency': 4,
+            'probe': 'banner',
+            'banner_patterns': ['cryptlib', 'APC'],
+            'hostnames': 'address',
+            'cache': True,
+            'strict': False,
+            'compose': {},
+            'groups': {},
+            'keyed_groups': [{'key': 'apcos_model', 'prefix': 'model'}],
+        }
+        self.plugin = InventoryModule()
+        self.plugin.get_option = lambda option: self.options[option]
+        self.plugin.inventory = InventoryData()
+        self.plugin.templar = Templar(loader=DataLoader())
+
+    def test_addresses(self):
+        self.options['networks'] = ['10.0.0.0/29', '10.0.1.7']
+        self.options['exclude'] = ['10.0.0.2', '10.0.0.4/31']
+        addresses = [str(address) for address in self.plugin._addresses()]
+        self.assertEqual(addresses, ['10.0.0.1', '10.0.0.3', '10.0.0.6', '10.0.1.7'])
+
+    def test_addresses_invalid(self):
+        self.options['networks'] = ['10.0.0.300/24']
+        self.assertRaises(AnsibleParserError, self.plugin._addresses)
+
+    def test_scan_banner(self):
+        card = BannerServer('127.0.0.1', 0, b'SSH-2.0-cryptlib\r\n')
+        other = BannerServer('127.0.0.2', card.port, b'SSH-2.0-OpenSSH_8.9\r\n')
+        card.start()
+        other.start()
+        try:
+            self.options['networks'] = ['127.0.0.0/30']
+            self.options['port'] = card.port
+            cards = self.plugin._scan()
+        finally:
+            card.stop()
+            other.stop()
+        self.assertEqual(cards, [{'address': '127.0.0.1', 'banner': 'SSH-2.0-cryptlib'}])
+
+    def test_credentials_templated(self):
+        os.environ['APCOS_SCAN_TEST_PASSWORD'] = 'secret'
+        try:
+            self.options['username'] = 'apc'
+            self.options['password'] = "{{ lookup('env', 'APCOS_SCAN_TEST_PASSWORD') }}"
+            self.assertEqual(self.plugin._credential('username'), 'apc')
+            self.assertEqual(self.plugin._credential('password'), 'secret')
+        finally:
+            del os.environ['APCOS_SCAN_TEST_PASSWORD']
+
+    def test_scan_about_checks_banner(self):
+        card = BannerServer('127.0.0.1', 0, b'SSH-2.0-cryptlib\r\n')
+        other = BannerServer('127.0.0.2', card.port, b'SSH-2.0-OpenSSH_8.9\r\n')
+        card.start()
+        other.start()
+        try:
+            self.options.update(networks=['127.0.0.0/30'], probe='about', port=card.port, username='apc',
+                                password='secret', known_hosts='/tmp/known_hosts')
+            with patch('ansible_collections.haught.apcos.plugins.inventory.apcos_scan.HAS_ASYNCSSH', True):
+                with patch('ansible_collections.haught.apcos.plugins.inventory.apcos_scan.asyncssh', create=True) as asyncssh:
+                    asyncssh.connect = AsyncMock(side_effect=OSError('host key not verifiable'))
+                    cards = self.plugin._scan()
+        finally:
+            card.stop()
+            other.stop()
+        self.assertEqual(cards, [])
+        asyncssh.connect.assert_called_once_with('127.0.0.1', port=card.port, username='apc', password='secret',
+                                                 known_hosts='/tmp/known_hosts')
+
+    def test_populate(self):
+        self.options['hostnames'] = 'hostname'
+        self.plugin._populate([
+            {'address': '10.0.0.5', 'banner': 'SSH-2.0-cryptlib', 'network_os_model': 'AP9641',
+             'network_os_firmware': 'v1.4.2.1', 'network_os_hostname': 'ups001'},
+            {'address': '10.0.0.6', 'network_os_model': 'AP9641', 'network_os_hostname': 'apc'},
+            {'address': '10.0.0.7', 'network_os_model': 'AP9631', 'network_os_hostname': 'apc'},
+        ])
+        hosts = self.plugin.inventory.hosts
+        self.assertEqual(sorted(hosts), ['10.0.0.6', '10.0.0.7', 'ups001'])
+        self.assertEqual(hosts['ups001'].vars['ansible_host'], '10.0.0.5')
+        self.assertEqual(hosts['ups001'].vars['ansible_network_os'], 'haught.apcos.apcos')
+        self.assertEqual(hosts['ups001'].vars['apcos_firmware'], 'v1.4.2.1')
+        self.assertEqual(sorted(host.name for host in self.plugin.inventory.groups['model_AP9641'].get_hosts()),
+                         ['10.0.0.6', 'ups001'])
+
+    def test_parse_cache(self):
+        cards = [{'address': '10.0.0.5', 'banner': 'SSH-2.0-cryptlib'}]
+        self.plugin._read_config_data = MagicMock()
+        self.plugin._scan = MagicMock(return_value=cards)
+        self.plugin._cache = {}
+        self.plugin.parse(self.plugin.inventory, None, '/tmp/apcos_scan.yml', cache=True)
+        self.plugin.parse(self.plugin.inventory, None, '/tmp/apcos_scan.yml', cache=True)
+        self.assertEqual(self.plugin._scan.call_count, 1)
+        self.assertEqual(list(self.plugin._cache.values()), [cards])
+        self.assertIn('10.0.0.5', self.plugin.inventory.hosts)
+
+    def test_verify_file(self):
+        self.assertFalse(self.plugin.verify_file('/nonexistent/apcos_scan.yml'))
+        self.assertFalse(self.plugin.verify_file(__file__))
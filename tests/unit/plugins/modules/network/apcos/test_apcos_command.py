@@ -0,0 +1,172 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+from ansible_collections.community.network.tests.unit.compat.mock import patch
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_command
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos import get_timing
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos.conditional import Conditional
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture
+
+
+class TestApcosCommandModule(TestApcosModule):
+
+    module = apcos_command
+
+    def setUp(self):
+        super(TestApcosCommandModule, self).setUp()
+
+        self.mock_run_commands = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_command.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+
+        self.mock_sleep = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_command.time.sleep')
+        self.sleep = self.mock_sleep.start()
+
+    def tearDown(self):
+        super(TestApcosCommandModule, self).tearDown()
+
+        self.mock_run_commands.stop()
+        self.mock_sleep.stop()
+
+    def load_fixtures(self, commands=None):
+        def run_commands(module, commands):
+            return [load_fixture('apcos_config_%s.cfg' % item['command'].split()[0]) for item in commands]
+        self.run_commands.side_effect = run_commands
+
+    def test_apcos_command_simple(self):
+        set_module_args({'commands': ['system']})
+        result = self.execute_module(changed=False)
+        self.assertEqual(len(result['stdout']), 1)
+        self.assertIn('apctest2-1', result['stdout'][0])
+
+    def test_apcos_command_wait_for_raw(self):
+        set_module_args({'commands': ['system', 'dns'], 'wait_for': [
+            'result[0] contains apctest2-1',
+            'result[1] matches "^Domain Name:\\s+example"',
+        ]})
+        self.execute_module(changed=False)
+        self.assertEqual(self.run_commands.call_count, 1)
+
+    def test_apcos_command_wait_for_key(self):
+        set_module_args({'commands': ['detstatus -all'], 'wait_for': [
+            'result[0].batterycapacity ge 80',
+            'result[0].batterycapacity lt 90.5',
+            'result[0].statusofups matches "^On Line"',
+            'result[0].self-testresult eq Passed',
+        ]})
+        self.execute_module(changed=False)
+
+    def test_apcos_command_wait_for_literal(self):
+        set_module_args({'commands': ['detstatus -all'], 'wait_for': [
+            'result[0] matches 84',
+            'result[0].batterycapacity matches "^84"',
+            'result[0] not matches yes',
+            'result[0] not contains yes',
+        ]})
+        self.execute_module(changed=False)
+
+    def test_apcos_command_wait_for_raw_number(self):
+        set_module_args({'commands': ['detstatus -all'], 'wait_for': [
+            'result[0] not eq 0',
+            'result[0] neq 0',
+            'result[0] not gt 0',
+        ]})
+        self.execute_module(changed=False)
+        self.assertEqual(Conditional('result[0] eq 84')(['84\n']), True)
+        self.assertEqual(Conditional('result[0] eq 0')(['E000: Success\n']), False)
+
+    def test_apcos_command_wait_for_bool(self):
+        set_module_args({'commands': ['dns'], 'wait_for': [
+            'result[0].systemnamesync eq false',
+            'result[0].overridemanualdnssettings not eq false',
+        ]})
+        self.execute_module(changed=False)
+
+    def test_apcos_command_wait_for_fails(self):
+        set_module_args({'commands': ['detstatus -all'], 'wait_for': ['result[0].batterycapacity ge 90'], 'retries': 3})
+        result = self.execute_module(failed=True)
+        self.assertEqual(result['failed_conditions'], ['result[0].batterycapacity ge 90'])
+        self.assertEqual(self.run_commands.call_count, 3)
+
+    def test_apcos_command_wait_for_any(self):
+        set_module_args({'commands': ['detstatus -all'], 'match': 'any', 'wait_for': [
+            'result[0].batterycapacity ge 90',
+            'result[0].outputvoltage gt 110',
+        ]})
+        self.execute_module(changed=False)
+
+    def test_apcos_command_wait_for_bad_index(self):
+        set_module_args({'commands': ['system'], 'wait_for': ['result[1] contains apc']})
+        self.execute_module(failed=True)
+
+    def test_apcos_command_wait_for_bad_syntax(self):
+        set_module_args({'commands': ['system'], 'wait_for': ['result[0] about apc']})
+        self.execute_module(failed=True)
+        self.run_commands.assert_not_called()
+
+    def test_apcos_command_connection_stats(self):
+        with patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos.get_connection') as get_connection:
+            get_connection.return_value.get_stats.return_value = {'commands': 1}
+            set_module_args({'commands': ['system'], 'connection_stats': True})
+            result = self.execute_module(changed=False)
+        self.assertEqual(result['connection_stats'], {'commands': 1})
+
+    def test_apcos_command_timing(self):
+        def get_connection(module):
+            module.apcos_connection = connection
+            get_timing(module)
+            return connection
+
+        with patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos.get_connection') as connection_mock:
+            connection = connection_mock.return_value
+            connection_mock.side_effect = get_connection
+            connection.get_stats.return_value = {
+                'last_connect': {'at': 0.0, 'time': 2.0},
+                'per_command': {'system': {'count': 3, 'time': 1.5}, 'about': {'count': 1, 'time': 0.2}},
+                'since_mark': {'system': {'count': 1, 'time': 0.5}, 'about': {'count': 1, 'time': 0.2}},
+            }
+            set_module_args({'commands': ['system'], 'connection_stats': True})
+            with patch.dict('os.environ', {'APCOS_TIMING': '1'}):
+                result = self.execute_module(changed=False)
+        connection.get_stats.assert_called_once_with(mark=True)
+        self.assertNotIn('since_mark', result['connection_stats'])
+        timing = result['apcos_timing']
+        self.assertEqual(timing['connect'], 0.0)
+        self.assertEqual(timing['per_command'], {'system': {'count': 1, 'time': 0.5}, 'about': {'count': 1, 'time': 0.2}})
+        self.assertEqual(timing['commands'], {'count': 0, 'time': 0.0})
+
+    def test_apcos_command_timing_disabled(self):
+        def get_connection(module):
+            module.apcos_connection = connection
+            get_timing(module)
+            return connection
+
+        with patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos.get_connection') as connection_mock:
+            connection = connection_mock.return_value
+            connection_mock.side_effect = get_connection
+            connection.get_stats.return_value = {'commands': 1}
+            set_module_args({'commands': ['system'], 'connection_stats': True})
+            with patch.dict('os.environ', {'APCOS_TIMING': ''}):
+                result = self.execute_module(changed=False)
+        connection.get_stats.assert_called_once_with(mark=False)
+        self.assertNotIn('apcos_timing', result)
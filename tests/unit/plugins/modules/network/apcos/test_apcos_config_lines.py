@@ -0,0 +1,93 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+from ansible_collections.community.network.tests.unit.compat.mock import patch
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_config_lines
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture
+
+
+class TestApcosConfigLinesModule(TestApcosModule):
+
+    module = apcos_config_lines
+
+    def setUp(self):
+        super(TestApcosConfigLinesModule, self).setUp()
+
+        self.mock_get_configs = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_config_lines.get_configs')
+        self.get_configs = self.mock_get_configs.start()
+
+        self.mock_load_config = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_config_lines.load_config')
+        self.load_config = self.mock_load_config.start()
+
+    def tearDown(self):
+        super(TestApcosConfigLinesModule, self).tearDown()
+
+        self.mock_get_configs.stop()
+        self.mock_load_config.stop()
+
+    def load_fixtures(self, commands=None):
+        def get_configs(module, sources):
+            return [load_fixture('apcos_config_%s.cfg' % source) for source in sources]
+        self.get_configs.side_effect = get_configs
+
+    def test_apcos_config_lines_in_effect(self):
+        set_module_args({'lines': [
+            'tcpip -i 10.0.0.5 -h apctest2-1',
+            'console  -t disable -s enabled',
+            'dns -p 1.1.1.1',
+        ]})
+        self.execute_module(changed=False, commands=[])
+        self.assertEqual(self.get_configs.call_count, 1)
+        self.assertEqual(self.get_configs.call_args[0][1], ['console', 'dns', 'tcpip'])
+        self.load_config.assert_not_called()
+
+    def test_apcos_config_lines_changed(self):
+        set_module_args({'lines': [
+            'tcpip -i 10.0.0.5 -h ups001',
+            'console -t disable',
+            'system -n "UPS 001"',
+            'system -n "UPS 001"',
+        ]})
+        commands = ['tcpip -i 10.0.0.5 -h ups001', 'system -n "UPS 001"']
+        self.execute_module(changed=True, commands=commands, sort=False)
+        self.load_config.assert_called_once()
+        self.assertEqual(self.load_config.call_args[0][1], commands)
+
+    def test_apcos_config_lines_unchecked(self):
+        set_module_args({'lines': ['smtp -w secret', 'eapol -S enable', 'dns -p']})
+        self.execute_module(changed=True, commands=['smtp -w secret', 'eapol -S enable', 'dns -p'], sort=False)
+        self.get_configs.assert_called_once_with(self.get_configs.call_args[0][0], [])
+
+    def test_apcos_config_lines_src(self):
+        set_module_args({'src': '# network\ntcpip -d example.net\n\ntcpip -d example.org\n'})
+        self.execute_module(changed=True, commands=['tcpip -d example.org'])
+
+    def test_apcos_config_lines_check_mode(self):
+        set_module_args({'lines': ['console -t enable'], '_ansible_check_mode': True})
+        self.execute_module(changed=True, commands=['console -t enable'])
+        self.load_config.assert_not_called()
+
+    def test_apcos_config_lines_exclusive(self):
+        set_module_args({'lines': ['console -t enable'], 'src': 'console -t enable'})
+        self.execute_module(failed=True)
@@ -0,0 +1,110 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import csv
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from ansible_collections.community.network.tests.unit.compat.mock import patch
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_datalog
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture
+
+
+class TestApcosDatalogModule(TestApcosModule):
+
+    module = apcos_datalog
+
+    def setUp(self):
+        super(TestApcosDatalogModule, self).setUp()
+
+        self.mock_run_commands = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_datalog.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.cursor_path = os.path.join(self.tmpdir, 'cursor.json')
+
+    def tearDown(self):
+        super(TestApcosDatalogModule, self).tearDown()
+
+        self.mock_run_commands.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def load_fixtures(self, commands=None):
+        config_file = 'apcos_config_datalog.cfg'
+        self.run_commands.return_value = [load_fixture(config_file)]
+
+    def test_apcos_datalog_stats(self):
+        set_module_args({})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['rows'], 4)
+        self.assertEqual(result['columns'], ['vmin', 'vmax', 'vout', 'wout', 'iout', 'freq', 'cap', 'vbat', 'tupsc'])
+        self.assertEqual(result['stats']['cap']['min'], 98.0)
+        self.assertEqual(result['stats']['cap']['max'], 100.0)
+        self.assertAlmostEqual(result['stats']['cap']['mean'], 99.25)
+        self.assertAlmostEqual(result['stats']['cap']['p95'], 100.0)
+        self.assertAlmostEqual(result['stats']['wout']['mean'], 22.0)
+        self.assertAlmostEqual(result['stats']['wout']['p95'], 22.9)
+        self.assertEqual(result['cursor']['timestamp'], '2021-03-26T16:00:00')
+
+    def test_apcos_datalog_no_new_rows(self):
+        set_module_args({'cursor_path': self.cursor_path})
+        self.execute_module(changed=False)
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['rows'], 0)
+        self.assertEqual(result['stats'], {})
+
+    def test_apcos_datalog_write_csv(self):
+        dest = os.path.join(self.tmpdir, 'data.csv.gz')
+        set_module_args({'cursor_path': self.cursor_path, 'dest': dest, 'format': 'csv'})
+        self.execute_module(changed=True)
+        self.execute_module(changed=False)
+        with gzip.open(dest, 'rt') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0][:3], ['timestamp', 'vmin', 'vmax'])
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1][0], '2021-03-26T15:30:00')
+        self.assertEqual(rows[1][4], '')
+
+    def test_apcos_datalog_write_csv_new_columns(self):
+        dest = os.path.join(self.tmpdir, 'data.csv.gz')
+        with gzip.open(dest, 'wt') as f:
+            f.write('timestamp,vmin,vmax\n')
+        set_module_args({'cursor_path': self.cursor_path, 'dest': dest, 'format': 'csv'})
+        result = self.execute_module(failed=True)
+        self.assertIn('vout', result['msg'])
+        with gzip.open(dest, 'rt') as f:
+            self.assertEqual(f.read(), 'timestamp,vmin,vmax\n')
+        self.assertFalse(os.path.exists(self.cursor_path))
+
+    @unittest.skipUnless(apcos_datalog.HAS_NUMPY, 'numpy is not installed')
+    def test_apcos_datalog_write_npz(self):
+        dest = os.path.join(self.tmpdir, 'data.npz')
+        set_module_args({'dest': dest, 'format': 'npz'})
+        self.execute_module(changed=True)
+        self.execute_module(changed=True)
+        with apcos_datalog.np.load(dest) as archive:
+            self.assertEqual(len(archive['timestamp']), 8)
+            self.assertEqual(archive['cap'][0], 98.0)
@@ -0,0 +1,62 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import ast
+import os
+
+import yaml
+
+from ansible_collections.community.network.tests.unit.compat import unittest
+
+MODULE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', '..', 'plugins', 'modules', 'network', 'apcos')
+
+
+def read_docs(name):
+    # the documentation strings are read without importing the module
+    with open(os.path.join(MODULE_PATH, name)) as f:
+        tree = ast.parse(f.read())
+    docs = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in ('DOCUMENTATION', 'EXAMPLES', 'RETURN'):
+                docs[node.targets[0].id] = ast.literal_eval(node.value)
+    return docs
+
+
+class TestApcosModuleDocs(unittest.TestCase):
+
+    def test_docs_are_valid_yaml(self):
+        modules = sorted(name for name in os.listdir(MODULE_PATH) if name.startswith('apcos_') and name.endswith('.py'))
+        self.assertTrue(modules)
+        for name in modules:
+            docs = read_docs(name)
+            self.assertEqual(sorted(docs), ['DOCUMENTATION', 'EXAMPLES', 'RETURN'], name)
+            for block, text in docs.items():
+                try:
+                    data = yaml.safe_load(text)
+                except yaml.YAMLError as exc:
+                    self.fail('%s %s: %s' % (name, block, exc))
+                if block == 'DOCUMENTATION':
+                    self.assertEqual(data['module'], name[:-3])
+                    for option, spec in (data.get('options') or {}).items():
+                        self.assertIn('description', spec, '%s: option %s' % (name, option))
@@ -0,0 +1,113 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.network.tests.unit.compat.mock import patch
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_drift
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture
+
+
+class TestApcosDriftModule(TestApcosModule):
+
+    module = apcos_drift
+
+    def setUp(self):
+        super(TestApcosDriftModule, self).setUp()
+
+        self.mock_get_configs = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_drift.get_configs')
+        self.get_configs = self.mock_get_configs.start()
+
+    def tearDown(self):
+        super(TestApcosDriftModule, self).tearDown()
+
+        self.mock_get_configs.stop()
+
+    def load_fixtures(self, commands=None):
+        def get_configs(module, sources):
+            return [load_fixture('apcos_config_%s.cfg' % source) for source in sources]
+        self.get_configs.side_effect = get_configs
+
+    def test_apcos_drift_none(self):
+        set_module_args({'profile': {
+            'dns': {'primarydnsserver': '1.1.1.1', 'systemnamesync': False},
+            'ntp': {'ntpstatus': 'enabled', 'primaryntpserver': '10.10.10.10'},
+            'system': {'name': 'apctest2-1'},
+        }})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['drift'], {})
+        self.assertEqual(result['drifted'], 0)
+        self.assertEqual(result['score'], 0.0)
+        self.assertEqual(self.get_configs.call_count, 1)
+        self.assertEqual(self.get_configs.call_args[0][1], ['dns', 'ntp', 'system'])
+
+    def test_apcos_drift_some(self):
+        set_module_args({'profile': {
+            'dns': {'primarydnsserver': '10.1.1.1', 'domainname': 'example.net'},
+            'system': {'location': 'Bldg2', 'name': 'apctest2-1'},
+        }})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['drift'], {
+            'dns': {'primarydnsserver': {'expected': '10.1.1.1', 'actual': '1.1.1.1'}},
+            'system': {'location': {'expected': 'Bldg2', 'actual': 'Bldg1'}},
+        })
+        self.assertEqual(result['drifted'], 2)
+        self.assertEqual(result['score'], 0.5)
+
+    def test_apcos_drift_indexed(self):
+        set_module_args({'profile': {
+            'snmptrap': {
+                '1': {'receiverip': '10.11.12.13', 'authtraps': True},
+                '2': {'receiverip': '10.11.12.14', 'authtraps': True},
+            },
+        }})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['drift'], {
+            'snmptrap': {'2.authtraps': {'expected': True, 'actual': False}},
+        })
+        self.assertEqual(result['score'], 0.25)
+
+    def test_apcos_drift_snmp_none(self):
+        set_module_args({'profile': {
+            'snmp': {'1': {'community': 'public_test', 'accesstype': 'read', 'address': '10.11.12.13'}},
+            'snmpv3': {
+                '1': {'username': 'lab-user', 'authentication': 'SHA', 'encryption': 'AES',
+                      'access': True, 'nmsip/hostname': '10.11.12.13'},
+                '2': {'access': False},
+            },
+        }})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['drift'], {})
+        self.assertEqual(result['score'], 0.0)
+
+    def test_apcos_drift_snmpv3_sections(self):
+        set_module_args({'profile': {
+            'snmpv3': {'2': {'authentication': 'SHA', 'access': True}},
+        }})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['drift'], {'snmpv3': {
+            '2.authentication': {'expected': 'SHA', 'actual': 'NONE'},
+            '2.access': {'expected': True, 'actual': False},
+        }})
+
+    def test_apcos_drift_bad_profile(self):
+        set_module_args({'profile': {'dns': 'primarydnsserver'}})
+        self.execute_module(failed=True)
@@ -0,0 +1,90 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+
+from ansible_collections.community.network.tests.unit.compat.mock import patch
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_eventlog
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture
+
+
+class TestApcosEventlogModule(TestApcosModule):
+
+    module = apcos_eventlog
+
+    def setUp(self):
+        super(TestApcosEventlogModule, self).setUp()
+
+        self.mock_run_commands = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_eventlog.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.cursor_path = os.path.join(self.tmpdir, 'cursor.json')
+
+    def tearDown(self):
+        super(TestApcosEventlogModule, self).tearDown()
+
+        self.mock_run_commands.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def load_fixtures(self, commands=None):
+        config_file = 'apcos_config_eventlog.cfg'
+        self.run_commands.return_value = [load_fixture(config_file)]
+
+    def test_apcos_eventlog_all_entries(self):
+        set_module_args({})
+        result = self.execute_module(changed=False)
+        self.assertEqual(len(result['entries']), 5)
+        self.assertEqual(result['entries'][0], {
+            'timestamp': '2021-03-26T14:48:50',
+            'event': 'System: Warmstart.',
+            'code': '0x0002'
+        })
+        self.assertEqual(result['cursor']['timestamp'], '2021-03-26T16:04:38')
+        self.assertEqual(len(result['cursor']['hashes']), 2)
+
+    def test_apcos_eventlog_writes_cursor(self):
+        set_module_args({'cursor_path': self.cursor_path})
+        result = self.execute_module(changed=False)
+        with open(self.cursor_path) as f:
+            self.assertEqual(json.load(f), result['cursor'])
+
+    def test_apcos_eventlog_entries_after_cursor(self):
+        with open(self.cursor_path, 'w') as f:
+            json.dump({'timestamp': '2021-03-26T15:52:10', 'hashes': []}, f)
+        set_module_args({'cursor_path': self.cursor_path})
+        result = self.execute_module(changed=False)
+        self.assertEqual([entry['timestamp'] for entry in result['entries']], [
+            '2021-03-26T15:52:10',
+            '2021-03-26T16:04:38',
+            '2021-03-26T16:04:38'
+        ])
+
+    def test_apcos_eventlog_no_new_entries(self):
+        set_module_args({'cursor_path': self.cursor_path})
+        self.execute_module(changed=False)
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['entries'], [])
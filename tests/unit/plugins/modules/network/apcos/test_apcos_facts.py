@@ -0,0 +1,227 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import unittest
+
+from ansible.module_utils.common.warnings import get_warning_messages
+from ansible_collections.community.network.tests.unit.compat.mock import patch
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_facts
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.plugins.module_utils.network.apcos import snmp
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture, fixture_path
+
+try:
+    import snmpsim  # noqa: F401
+    HAS_SNMPSIM = True
+except ImportError:
+    HAS_SNMPSIM = False
+
+
+FIXTURES = {
+    'user -l': 'apcos_config_user.cfg',
+    'user -n device': 'apcos_config_user_device.cfg',
+}
+
+SNMP_VALUES = {
+    'sysdescr': 'APC Web/SNMP Management Card (MB:v4.2.1 PF:v1.4.2.1 PN:apc_hw21_aos_1.4.2.1.bin '
+                'AF1:v1.4.2.1 AN1:apc_hw21_su_1.4.2.1.bin MN:AP9641 HR:05 SN: 5A1234E12345 MD:01/02/2020)',
+    'name': 'apctest2-1',
+    'batterycapacity': 100,
+    'runtimeremaining': 750000,
+    'statusofups': 2,
+}
+
+
+class TestApcosFactsModule(TestApcosModule):
+
+    module = apcos_facts
+
+    def setUp(self):
+        super(TestApcosFactsModule, self).setUp()
+
+        self.mock_get_configs = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_facts.get_configs')
+        self.get_configs = self.mock_get_configs.start()
+
+        self.mock_get_connection = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_facts.get_connection')
+        self.get_connection = self.mock_get_connection.start()
+
+        self.mock_time = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_facts.time')
+        self.time = self.mock_time.start()
+
+        self.mock_run_commands = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_facts.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+
+        self.mock_snmp_get = patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp.snmp_get')
+        self.snmp_get = self.mock_snmp_get.start()
+
+        self.mock_has_pysnmp = patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp.has_pysnmp', return_value=True)
+        self.mock_has_pysnmp.start()
+
+    def tearDown(self):
+        super(TestApcosFactsModule, self).tearDown()
+
+        self.mock_get_configs.stop()
+        self.mock_get_connection.stop()
+        self.mock_time.stop()
+        self.mock_run_commands.stop()
+        self.mock_snmp_get.stop()
+        self.mock_has_pysnmp.stop()
+
+    def load_fixtures(self, commands=None):
+        def get_configs(module, sources):
+            return [load_fixture(FIXTURES.get(source, 'apcos_config_%s.cfg' % source)) for source in sources]
+        self.get_configs.side_effect = get_configs
+        self.get_connection.return_value.get_device_info.return_value = {
+            'network_os': 'apcos',
+            'network_os_version': '05',
+            'network_os_model': 'AP9641',
+            'network_os_firmware': 'v1.4.2.1',
+            'network_os_hostname': 'apctest2-1',
+        }
+        self.time.time.return_value = 1616775878.0
+        self.run_commands.return_value = [load_fixture('apcos_config_detstatus.cfg')]
+        self.snmp_get.side_effect = lambda params, oids: [dict((snmp.OIDS[name], value) for name, value in SNMP_VALUES.items()).get(oid)
+                                                          for oid in oids]
+
+    def test_apcos_facts_all(self):
+        set_module_args({})
+        facts = self.execute_module()['ansible_facts']
+        self.assertEqual(facts['ansible_net_gather_subset'], ['config', 'default', 'status'])
+        self.assertEqual(facts['ansible_net_hostname'], 'apctest2-1')
+        self.assertEqual(facts['ansible_net_model'], 'AP9641')
+        self.assertEqual(facts['ansible_net_version'], '05')
+        self.assertEqual(facts['ansible_net_firmware'], 'v1.4.2.1')
+        self.assertEqual(facts['ansible_net_config_time'], 1616775878.0)
+        self.assertEqual(sorted(facts['ansible_net_config']), sorted(apcos_facts.DEFAULT_SOURCES))
+        self.assertEqual(facts['ansible_net_config']['dns'], load_fixture('apcos_config_dns.cfg'))
+        self.assertEqual(self.get_configs.call_count, 1)
+        self.assertEqual(facts['ansible_net_ups_status'], 'On Line')
+        self.assertEqual(facts['ansible_net_battery_capacity'], 84.0)
+        self.assertEqual(facts['ansible_net_runtime_remaining'], 4320)
+        self.snmp_get.assert_not_called()
+
+    def test_apcos_facts_config_sources(self):
+        set_module_args({'gather_subset': ['!default'], 'sources': ['system', 'user  -n device']})
+        facts = self.execute_module()['ansible_facts']
+        self.assertEqual(facts['ansible_net_gather_subset'], ['config', 'status'])
+        self.assertEqual(sorted(facts['ansible_net_config']), ['system', 'user -n device'])
+        self.assertNotIn('ansible_net_hostname', facts)
+        self.get_connection.assert_not_called()
+
+    def test_apcos_facts_invalid_subset(self):
+        set_module_args({'gather_subset': ['interfaces']})
+        result = self.execute_module(failed=True)
+        self.assertIn('interfaces', result['msg'])
+
+    def test_apcos_facts_snmp(self):
+        set_module_args({'gather_subset': ['!config'], 'snmp': {'community': 'public', 'host': '10.0.0.5'}})
+        facts = self.execute_module()['ansible_facts']
+        self.assertEqual(facts['ansible_net_hostname'], 'apctest2-1')
+        self.assertEqual(facts['ansible_net_model'], 'AP9641')
+        self.assertEqual(facts['ansible_net_version'], '05')
+        self.assertEqual(facts['ansible_net_firmware'], 'v1.4.2.1')
+        self.assertEqual(facts['ansible_net_ups_status'], 'On Line')
+        self.assertEqual(facts['ansible_net_battery_capacity'], 100.0)
+        self.assertEqual(facts['ansible_net_runtime_remaining'], 7500)
+        self.assertEqual(self.snmp_get.call_count, 1)
+        self.get_connection.assert_not_called()
+        self.run_commands.assert_not_called()
+
+    def test_apcos_facts_snmp_fallback(self):
+        SNMP_VALUES_PARTIAL = dict(SNMP_VALUES, sysdescr='APC Web/SNMP Management Card', runtimeremaining=None)
+        set_module_args({'gather_subset': ['!config'], 'snmp': {'community': 'public', 'host': '10.0.0.5'}})
+        self.load_fixtures()
+        self.snmp_get.side_effect = lambda params, oids: [dict((snmp.OIDS[name], value) for name, value in SNMP_VALUES_PARTIAL.items()).get(oid)
+                                                          for oid in oids]
+        self.load_fixtures = lambda commands=None: None
+        facts = self.execute_module()['ansible_facts']
+        self.assertEqual(facts['ansible_net_model'], 'AP9641')
+        self.assertEqual(facts['ansible_net_battery_capacity'], 100.0)
+        self.assertEqual(facts['ansible_net_runtime_remaining'], 4320)
+        self.assertEqual(self.get_connection.return_value.get_device_info.call_count, 1)
+        self.assertEqual(self.run_commands.call_count, 1)
+
+    def test_apcos_facts_snmp_timeout(self):
+        set_module_args({'gather_subset': ['status'], 'snmp': {'community': 'public', 'host': '10.0.0.5'}})
+        self.load_fixtures()
+        self.snmp_get.side_effect = snmp.SnmpError('No SNMP response received before timeout')
+        self.load_fixtures = lambda commands=None: None
+        result = self.execute_module()
+        self.assertEqual(result['ansible_facts']['ansible_net_ups_status'], 'On Line')
+        self.assertEqual(self.snmp_get.call_count, 1)
+        self.assertIn('No SNMP response', get_warning_messages()[-1])
+
+
+@unittest.skipUnless(snmp.has_pysnmp() and HAS_SNMPSIM and os.geteuid() != 0, 'needs pysnmp and snmpsim, run as a regular user')
+class TestApcosFactsSnmpsim(unittest.TestCase):
+    """Reads the objects of fixtures/snmpsim/apcos.snmprec from a local snmpsim"""
+
+    @classmethod
+    def setUpClass(cls):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        cls.port = sock.getsockname()[1]
+        sock.close()
+        cls.cache_dir = tempfile.mkdtemp()
+        cls.process = subprocess.Popen(
+            ['snmpsim-command-responder', '--data-dir=%s' % os.path.join(fixture_path, 'snmpsim'),
+             '--cache-dir=%s' % cls.cache_dir, '--agent-udpv4-endpoint=127.0.0.1:%d' % cls.port],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        cls.params = {'host': '127.0.0.1', 'port': cls.port, 'community': 'apcos', 'version': 'v2c',
+                      'timeout': 1, 'retries': 0}
+        for dummy in range(50):
+            try:
+                snmp.snmp_get(cls.params, [snmp.OIDS['name']])
+                break
+            except snmp.SnmpError:
+                time.sleep(0.2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.process.terminate()
+        cls.process.wait()
+        shutil.rmtree(cls.cache_dir)
+
+    def test_snmp_get(self):
+        names = sorted(snmp.OIDS)
+        values = dict(zip(names, snmp.snmp_get(self.params, [snmp.OIDS[name] for name in names])))
+        self.assertEqual(values['name'], 'apctest2-1')
+        self.assertEqual(values['location'], 'Bldg1')
+        self.assertEqual(values['statusofups'], 2)
+        self.assertEqual(values['runtimeremaining'], 750000)
+        self.assertEqual(snmp.parse_sys_descr(values['sysdescr'])['network_os_model'], 'AP9641')
+
+    def test_snmp_get_missing(self):
+        self.assertEqual(snmp.snmp_get(self.params, ['1.3.6.1.2.1.1.9.0', snmp.OIDS['name']]), [None, 'apctest2-1'])
+        self.assertEqual(snmp.snmp_get(dict(self.params, version='v1'), ['1.3.6.1.2.1.1.9.0', snmp.OIDS['name']]),
+                         [None, None])
+
+    def test_snmp_get_timeout(self):
+        self.assertRaises(snmp.SnmpError, snmp.snmp_get, dict(self.params, community='private', timeout=0.2),
+                          [snmp.OIDS['name']])
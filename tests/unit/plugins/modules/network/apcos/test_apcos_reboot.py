@@ -0,0 +1,109 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.module_utils.connection import ConnectionError
+from ansible_collections.community.network.tests.unit.compat.mock import patch, MagicMock
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_reboot
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture
+
+
+class TestApcosRebootModule(TestApcosModule):
+
+    module = apcos_reboot
+
+    def setUp(self):
+        super(TestApcosRebootModule, self).setUp()
+
+        self.mock_get_connection = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_reboot.get_connection')
+        self.get_connection = self.mock_get_connection.start()
+
+        self.mock_run_commands = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_reboot.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+
+        self.mock_port_open = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_reboot.port_open')
+        self.port_open = self.mock_port_open.start()
+
+        self.mock_time = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_reboot.time')
+        self.time = self.mock_time.start()
+
+        self.about = load_fixture('apcos_config_about.cfg')
+
+    def tearDown(self):
+        super(TestApcosRebootModule, self).tearDown()
+
+        self.mock_get_connection.stop()
+        self.mock_run_commands.stop()
+        self.mock_port_open.stop()
+        self.mock_time.stop()
+
+    def load_fixtures(self, commands=None):
+        connection = MagicMock()
+        connection.get_option.side_effect = lambda option: {'host': 'ups01', 'port': None}[option]
+        self.get_connection.return_value = connection
+
+        self.clock = [1000.0]
+
+        def sleep(seconds):
+            self.clock[0] += seconds
+        self.time.time.side_effect = lambda: self.clock[0]
+        self.time.sleep.side_effect = sleep
+
+        def run_commands(module, commands):
+            if commands[0]['command'] == 'reboot':
+                raise ConnectionError('connection closed')
+            return [self.about]
+        self.run_commands.side_effect = run_commands
+
+    def test_apcos_reboot(self):
+        self.port_open.side_effect = [True, False, False, False, True]
+        set_module_args({'interval': 2, 'max_interval': 3})
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['downtime'], 7.0)
+        self.assertEqual(result['elapsed'], 7.0)
+        self.assertEqual(result['uptime'], 60)
+        self.assertEqual([call[0][0] for call in self.time.sleep.call_args_list], [2, 2, 3])
+        self.assertEqual(self.port_open.call_args[0][:2], ('ups01', 22))
+
+    def test_apcos_reboot_down_fixed_interval(self):
+        self.port_open.side_effect = [True, True, True, False, False, False, True]
+        set_module_args({'interval': 2, 'max_interval': 8})
+        result = self.execute_module(changed=True)
+        self.assertEqual([call[0][0] for call in self.time.sleep.call_args_list], [2, 2, 2, 2, 4])
+        self.assertEqual(result['downtime'], 12.0)
+
+    def test_apcos_reboot_timeout(self):
+        self.port_open.return_value = False
+        set_module_args({'timeout': 60})
+        result = self.execute_module(failed=True)
+        self.assertIn('open', result['msg'])
+
+    def test_apcos_reboot_not_rebooted(self):
+        self.port_open.side_effect = [False, True]
+        self.about = self.about.replace('0 Hours 1 Minute', '5 Hours 1 Minute')
+        set_module_args({})
+        self.execute_module(failed=True)
+
+    def test_apcos_reboot_check_mode(self):
+        set_module_args({'_ansible_check_mode': True})
+        self.execute_module(changed=True)
+        self.run_commands.assert_not_called()
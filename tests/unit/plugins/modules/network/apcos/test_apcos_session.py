@@ -0,0 +1,103 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+import time
+
+from ansible_collections.community.network.tests.unit.compat.mock import patch
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_session
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture
+
+
+class TestApcosSessionModule(TestApcosModule):
+
+    module = apcos_session
+
+    def setUp(self):
+        super(TestApcosSessionModule, self).setUp()
+
+        self.mock_get_config = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_session.get_config')
+        self.get_config = self.mock_get_config.start()
+
+        self.mock_load_config = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_session.load_config')
+        self.load_config = self.mock_load_config.start()
+
+        self.mock_get_connection = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_session.get_connection')
+        self.get_connection = self.mock_get_connection.start()
+        self.connection = self.get_connection.return_value
+        self.connection.get_option.return_value = 'apc'
+        self.connection.get_stats.return_value = {'last_connect': {'at': time.time() - 12, 'time': 2.0}}
+
+    def tearDown(self):
+        super(TestApcosSessionModule, self).tearDown()
+
+        self.mock_get_config.stop()
+        self.mock_load_config.stop()
+        self.mock_get_connection.stop()
+
+    def load_fixtures(self, commands=None):
+        config_file = 'apcos_config_session.cfg'
+        self.get_config.return_value = load_fixture(config_file)
+
+    def test_apcos_session_list(self):
+        set_module_args({})
+        result = self.execute_module(changed=False, commands=[])
+        self.assertEqual(len(result['sessions']), 5)
+        self.assertEqual(result['sessions'][0], {
+            'id': 12,
+            'user': 'apc',
+            'interface': 'SSH',
+            'address': '10.0.0.5',
+            'age': 12,
+            'current': True,
+            'stale': False
+        })
+        self.assertEqual(result['sessions'][2]['age'], 93600)
+        self.assertEqual([session['id'] for session in result['sessions'] if session['stale']], [9, 4])
+        self.assertEqual(result['ended'], [])
+        self.load_config.assert_not_called()
+
+    def test_apcos_session_end_stale(self):
+        set_module_args({'end_stale': True})
+        result = self.execute_module(changed=True, commands=['session -d 9', 'session -d 4'], sort=False)
+        self.assertEqual(result['ended'], [9, 4])
+        self.assertEqual(self.load_config.call_args[0][1], ['session -d 9', 'session -d 4'])
+
+    def test_apcos_session_end_stale_check_mode(self):
+        set_module_args({'end_stale': True, '_ansible_check_mode': True})
+        self.execute_module(changed=True, commands=['session -d 9', 'session -d 4'])
+        self.load_config.assert_not_called()
+
+    def test_apcos_session_users_interfaces(self):
+        set_module_args({'end_stale': True, 'users': ['device', 'admin'], 'interfaces': ['ssh']})
+        self.execute_module(changed=True, commands=['session -d 10'])
+
+    def test_apcos_session_keeps_current(self):
+        self.connection.get_stats.return_value = {'last_connect': None}
+        set_module_args({'end_stale': True, 'max_age': 0})
+        result = self.execute_module(changed=True, commands=['session -d 9', 'session -d 4'])
+        self.assertTrue(result['sessions'][0]['current'])
+
+    def test_apcos_session_nothing_stale(self):
+        set_module_args({'end_stale': True, 'max_age': 100000})
+        self.execute_module(changed=False, commands=[])
@@ -101,3 +101,26 @@ class TestApcosSnmpModule(TestApcosModule):
         set_module_args({'index': 1, 'accessaddress': '10.11.12.13'})
         result = self.execute_module(changed=False)
         self.assertEqual(result['changed'], False)
+
+    def test_apcos_snmp_set_communities(self):
+        set_module_args({'communities': [
+            {'index': 1, 'community': 'public_test', 'accesstype': 'write'},
+            {'index': 2, 'community': 'private', 'accesstype': 'read', 'accessaddress': '10.11.12.0/24'}
+        ]})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'snmp -a1 write',
+            'snmp -c2 private',
+            'snmp -a2 read',
+            'snmp -n2 10.11.12.0/24'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+        self.assertEqual(self.get_config.call_count, 1)
+
+    def test_apcos_snmp_communities_unchanged(self):
+        set_module_args({'communities': [
+            {'index': 1, 'community': 'public_test', 'accesstype': 'read'},
+            {'index': 3, 'accesstype': 'disabled', 'accessaddress': '0.0.0.0'}
+        ]})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['changed'], False)
@@ -0,0 +1,132 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.network.tests.unit.compat.mock import patch
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_snmptrap
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture
+
+
+class TestApcosSnmptrapModule(TestApcosModule):
+
+    module = apcos_snmptrap
+
+    def setUp(self):
+        super(TestApcosSnmptrapModule, self).setUp()
+
+        self.mock_get_config = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_snmptrap.get_config')
+        self.get_config = self.mock_get_config.start()
+
+        self.mock_load_config = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_snmptrap.load_config')
+        self.load_config = self.mock_load_config.start()
+
+    def tearDown(self):
+        super(TestApcosSnmptrapModule, self).tearDown()
+
+        self.mock_get_config.stop()
+        self.mock_load_config.stop()
+
+    def load_fixtures(self, commands=None):
+        config_file = 'apcos_config_snmptrap.cfg'
+        self.get_config.return_value = load_fixture(config_file)
+        self.load_config.return_value = None
+
+    def test_apcos_snmptrap_unchanged(self):
+        set_module_args({'receivers': [
+            {'address': '10.11.12.13', 'community': 'public', 'traptype': 'snmpv1', 'authtraps': True},
+            {'address': '10.11.12.14', 'community': 'public', 'authtraps': False}
+        ]})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['changed'], False)
+
+    def test_apcos_snmptrap_change_receiver(self):
+        set_module_args({'receivers': [
+            {'address': '10.11.12.13', 'community': 'private', 'authtraps': False},
+            {'address': '10.11.12.14'}
+        ]})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'snmptrap -c1 private -a1 disable'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+
+    def test_apcos_snmptrap_add_receiver(self):
+        set_module_args({'receivers': [
+            {'address': '10.11.12.13'},
+            {'address': '10.11.12.14'},
+            {'address': '10.11.12.15', 'community': 'traps', 'traptype': 'snmpv1'}
+        ]})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'snmptrap -r3 10.11.12.15 -c3 traps -g3 enable'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+
+    def test_apcos_snmptrap_replace_receiver(self):
+        set_module_args({'receivers': [
+            {'address': '10.11.12.14'},
+            {'address': '10.11.12.20'}
+        ]})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'snmptrap -r1 10.11.12.20 -a1 disable'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+
+    def test_apcos_snmptrap_replace_receiver_settings(self):
+        set_module_args({'receivers': [
+            {'address': '10.11.12.14'},
+            {'address': '10.11.12.20', 'community': 'traps', 'traptype': 'snmpv3'}
+        ]})
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['commands'], ['snmptrap -r1 10.11.12.20 -c1 traps -t1 snmpV3 -a1 disable'])
+
+    def test_apcos_snmptrap_normalized_address(self):
+        config = load_fixture('apcos_config_snmptrap.cfg').replace('10.11.12.14', '2001:db8::14')
+        set_module_args({'receivers': [
+            {'address': ' 10.11.12.13'},
+            {'address': '2001:DB8:0:0::0014'}
+        ]})
+        with patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_snmptrap.get_config', return_value=config):
+            self.execute_module(changed=False)
+
+    def test_apcos_snmptrap_hostname(self):
+        config = load_fixture('apcos_config_snmptrap.cfg').replace('10.11.12.14', 'NMS.example.net')
+        set_module_args({'receivers': [
+            {'address': '10.11.12.13'},
+            {'address': 'nms.example.net'}
+        ]})
+        with patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_snmptrap.get_config', return_value=config):
+            self.execute_module(changed=False)
+
+    def test_apcos_snmptrap_remove_receivers(self):
+        set_module_args({'receivers': []})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'snmptrap -r1 0.0.0.0 -g1 disable',
+            'snmptrap -r2 0.0.0.0 -g2 disable'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+
+    def test_apcos_snmptrap_too_many_receivers(self):
+        set_module_args({'receivers': [{'address': '10.0.0.%d' % i} for i in range(7)]})
+        self.execute_module(failed=True)
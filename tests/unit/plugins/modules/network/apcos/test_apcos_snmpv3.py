@@ -20,6 +20,10 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import os
+import shutil
+import tempfile
+
 from ansible_collections.community.network.tests.unit.compat.mock import patch
 from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_snmpv3
 from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
@@ -39,9 +43,14 @@ class TestApcosSnmpv3Module(TestApcosModule):
         self.mock_load_config = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_snmpv3.load_config')
         self.load_config = self.mock_load_config.start()
 
+        self.tmpdir = tempfile.mkdtemp()
+        self.secret_store = os.path.join(self.tmpdir, 'secrets.json')
+
     def tearDown(self):
         super(TestApcosSnmpv3Module, self).tearDown()
 
+        shutil.rmtree(self.tmpdir)
+
         self.mock_get_config.stop()
         self.mock_load_config.stop()
 
@@ -194,3 +203,58 @@ class TestApcosSnmpv3Module(TestApcosModule):
         set_module_args({'index': 1, 'accessaddress': '10.11.12.13'})
         result = self.execute_module(changed=False)
         self.assertEqual(result['changed'], False)
+
+    def test_apcos_snmpv3_authprotocol_none_unchanged(self):
+        set_module_args({'index': 2, 'authprotocol': 'NONE', 'privprotocol': 'NONE'})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['changed'], False)
+
+    def test_apcos_snmpv3_set_users(self):
+        set_module_args({'users': [
+            {'index': 1, 'username': 'lab-user', 'authprotocol': 'SHA', 'accessaddress': '10.11.12.14'},
+            {'index': 2, 'username': 'monitor', 'authphrase': 'password', 'access': True},
+            {'index': 3, 'privprotocol': 'NONE'}
+        ]})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'snmpv3 -n1 10.11.12.14',
+            'snmpv3 -u2 monitor',
+            'snmpv3 -a2 password',
+            'snmpv3 -ac2 enable'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+        self.assertEqual(self.get_config.call_count, 1)
+
+    def test_apcos_snmpv3_users_unchanged(self):
+        set_module_args({'users': [
+            {'index': 1, 'username': 'lab-user', 'access': True},
+            {'index': 4, 'username': 'apc snmp profile4', 'access': False}
+        ]})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['changed'], False)
+
+    def test_apcos_snmpv3_users_duplicate_index(self):
+        set_module_args({'users': [{'index': 1, 'username': 'a'}, {'index': 1, 'username': 'b'}]})
+        self.execute_module(failed=True)
+
+    def test_apcos_snmpv3_secret_store(self):
+        set_module_args({'index': 1, 'authphrase': 'password', 'privphrase': 'password', 'secret_store': self.secret_store})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'snmpv3 -a1 password',
+            'snmpv3 -c1 password'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+        with open(self.secret_store) as f:
+            self.assertNotIn('password', f.read())
+        self.execute_module(changed=False)
+
+    def test_apcos_snmpv3_secret_store_changed(self):
+        set_module_args({'index': 1, 'authphrase': 'password', 'secret_store': self.secret_store})
+        self.execute_module(changed=True)
+        set_module_args({'index': 1, 'authphrase': 'password2', 'secret_store': self.secret_store})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'snmpv3 -a1 password2'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
@@ -20,6 +20,12 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
 from ansible_collections.community.network.tests.unit.compat.mock import patch
 from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_system
 from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
@@ -39,17 +45,29 @@ class TestApcosSystemModule(TestApcosModule):
         self.mock_load_config = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_system.load_config')
         self.load_config = self.mock_load_config.start()
 
+        self.mock_get_configs = patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos.get_configs')
+        self.get_configs = self.mock_get_configs.start()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.plan_path = os.path.join(self.tmpdir, 'plan.json')
+
     def tearDown(self):
         super(TestApcosSystemModule, self).tearDown()
 
         self.mock_get_config.stop()
         self.mock_load_config.stop()
+        self.mock_get_configs.stop()
+        shutil.rmtree(self.tmpdir)
 
     def load_fixtures(self, commands=None):
         config_file = 'apcos_config_system.cfg'
-        self.get_config.return_value = load_fixture(config_file)
         self.load_config.return_value = None
 
+        def get_config(module, source, flags=None):
+            module.device_configs = {source: load_fixture(config_file)}
+            return load_fixture(config_file)
+        self.get_config.side_effect = get_config
+
     def test_apcos_system_rename(self):
         set_module_args({'name': 'test'})
         result = self.execute_module(changed=True)
@@ -101,3 +119,119 @@ class TestApcosSystemModule(TestApcosModule):
         set_module_args({'hostnamesync': False})
         result = self.execute_module(changed=False)
         self.assertEqual(result['changed'], False)
+
+    def test_apcos_system_hostsync_default(self):
+        config = load_fixture('apcos_config_system.cfg').replace('Host Name Sync: Disabled', 'Host Name Sync: Enabled')
+        set_module_args({'name': 'apctest2-1'})
+        with patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_system.get_config', return_value=config):
+            result = self.execute_module(changed=False)
+        self.assertEqual(result['commands'], [])
+
+    def test_apcos_system_plan(self):
+        set_module_args({'name': 'test', 'plan_path': self.plan_path, '_ansible_check_mode': True})
+        self.execute_module(changed=True)
+        self.assertTrue(os.path.exists(self.plan_path))
+        self.load_config.assert_not_called()
+
+        self.get_configs.return_value = [load_fixture('apcos_config_system.cfg').replace('16:04:38', '16:09:12')]
+        set_module_args({'name': 'test', 'plan_path': self.plan_path})
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['commands'], ['system -n test'])
+        self.assertEqual(self.get_config.call_count, 1)
+        self.assertEqual(self.load_config.call_args[0][1], ['system -n test'])
+        self.assertFalse(os.path.exists(self.plan_path))
+
+    def test_apcos_system_plan_stale(self):
+        set_module_args({'name': 'test', 'plan_path': self.plan_path, '_ansible_check_mode': True})
+        self.execute_module(changed=True)
+
+        self.get_configs.return_value = [load_fixture('apcos_config_system.cfg').replace('Bldg1', 'Bldg2')]
+        set_module_args({'name': 'test', 'plan_path': self.plan_path})
+        self.execute_module(failed=True)
+        self.load_config.assert_not_called()
+
+    def test_apcos_system_plan_other_task(self):
+        set_module_args({'name': 'test', 'plan_path': self.plan_path, '_ansible_check_mode': True})
+        self.execute_module(changed=True)
+
+        set_module_args({'name': 'test2', 'plan_path': self.plan_path})
+        self.execute_module(failed=True)
+        self.assertTrue(os.path.exists(self.plan_path))
+
+    def test_apcos_system_plan_salted(self):
+        set_module_args({'name': 'test', 'plan_path': self.plan_path, '_ansible_check_mode': True})
+        self.execute_module(changed=True)
+        with open(self.plan_path) as f:
+            plan = json.load(f)
+        self.assertEqual(len(plan['salt']), 32)
+        unsalted = json.dumps({'contact': None, 'hostnamesync': None, 'location': None, 'motd': None, 'name': 'test'},
+                              sort_keys=True)
+        self.assertNotEqual(plan['params'], hashlib.sha256(unsalted.encode('utf-8')).hexdigest())
+
+        del plan['salt']
+        with open(self.plan_path, 'w') as f:
+            json.dump(plan, f)
+        set_module_args({'name': 'test', 'plan_path': self.plan_path})
+        self.execute_module(failed=True)
+        self.load_config.assert_not_called()
+
+    def test_apcos_system_fingerprint(self):
+        fingerprint_path = os.path.join(self.tmpdir, 'fingerprint.json')
+        set_module_args({'name': 'apctest2-1', 'fingerprint_path': fingerprint_path})
+        self.execute_module(changed=False)
+        self.assertTrue(os.path.exists(fingerprint_path))
+        self.assertEqual(self.get_config.call_count, 1)
+
+        self.get_configs.return_value = [load_fixture('apcos_config_system.cfg').replace('16:04:38', '16:09:12')]
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['commands'], [])
+        self.assertEqual(self.get_config.call_count, 1)
+
+        self.get_configs.return_value = [load_fixture('apcos_config_system.cfg').replace('Bldg1', 'Bldg2')]
+        self.execute_module(changed=False)
+        self.assertEqual(self.get_config.call_count, 2)
+
+    def test_apcos_system_fingerprint_other_task(self):
+        fingerprint_path = os.path.join(self.tmpdir, 'fingerprint.json')
+        set_module_args({'name': 'apctest2-1', 'fingerprint_path': fingerprint_path})
+        self.execute_module(changed=False)
+
+        self.get_configs.return_value = [load_fixture('apcos_config_system.cfg')]
+        set_module_args({'name': 'test', 'fingerprint_path': fingerprint_path})
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['commands'], ['system -n test'])
+        self.get_configs.assert_not_called()
+
+    @patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp.has_pysnmp', return_value=True)
+    @patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp.snmp_get')
+    def test_apcos_system_snmp(self, snmp_get, has_pysnmp):
+        snmp_get.return_value = ['apctest2-1', 'Bldg1']
+        set_module_args({'name': 'apctest2-1', 'location': 'Bldg1', 'snmp': {'community': 'public', 'host': '10.0.0.5'}})
+        self.execute_module(changed=False)
+        self.get_config.assert_not_called()
+
+        snmp_get.return_value = ['test', 'Bldg1']
+        self.execute_module(changed=True, commands=['system -n apctest2-1'])
+        self.get_config.assert_not_called()
+
+    @patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp.has_pysnmp', return_value=True)
+    @patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp.snmp_get')
+    def test_apcos_system_snmp_cli_keys(self, snmp_get, has_pysnmp):
+        set_module_args({'name': 'apctest2-1', 'hostnamesync': True, 'snmp': {'community': 'public', 'host': '10.0.0.5'}})
+        self.execute_module(changed=True, commands=['system -s enable'])
+        snmp_get.assert_not_called()
+        self.assertEqual(self.get_config.call_count, 1)
+
+        self.get_config.reset_mock()
+        set_module_args({'name': 'apctest2-1', 'hostnamesync': False, 'snmp': {'community': 'public', 'host': '10.0.0.5'}})
+        self.execute_module(changed=False)
+        snmp_get.assert_not_called()
+        self.assertEqual(self.get_config.call_count, 1)
+
+    @patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp.has_pysnmp', return_value=True)
+    @patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.snmp.snmp_get')
+    def test_apcos_system_snmp_missing(self, snmp_get, has_pysnmp):
+        snmp_get.return_value = [None]
+        set_module_args({'contact': 'network@ncsu.edu', 'snmp': {'community': 'public', 'host': '10.0.0.5'}})
+        self.execute_module(changed=False)
+        self.assertEqual(self.get_config.call_count, 1)
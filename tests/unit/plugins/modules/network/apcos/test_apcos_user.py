@@ -0,0 +1,142 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+
+from ansible_collections.community.network.tests.unit.compat.mock import patch
+from ansible_collections.haught.apcos.plugins.modules.network.apcos import apcos_user
+from ansible_collections.community.network.tests.unit.plugins.modules.utils import set_module_args
+from ansible_collections.haught.apcos.tests.unit.plugins.modules.network.apcos.apcos_module import TestApcosModule, load_fixture
+
+
+class TestApcosUserModule(TestApcosModule):
+
+    module = apcos_user
+
+    def setUp(self):
+        super(TestApcosUserModule, self).setUp()
+
+        self.mock_get_config = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_user.get_config')
+        self.get_config = self.mock_get_config.start()
+
+        self.mock_get_configs = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_user.get_configs')
+        self.get_configs = self.mock_get_configs.start()
+
+        self.mock_load_config = patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_user.load_config')
+        self.load_config = self.mock_load_config.start()
+
+    def tearDown(self):
+        super(TestApcosUserModule, self).tearDown()
+
+        self.mock_get_config.stop()
+        self.mock_get_configs.stop()
+        self.mock_load_config.stop()
+
+    def load_fixtures(self, commands=None):
+        def get_config(module, source, flags=None):
+            return load_fixture('apcos_config_user.cfg')
+
+        def get_configs(module, sources):
+            return [load_fixture('apcos_config_user_device.cfg').replace('device', source.split(' ', 2)[2].strip('"'))
+                    for source in sources]
+        self.get_config.side_effect = get_config
+        self.get_configs.side_effect = get_configs
+        self.load_config.return_value = None
+
+    def test_apcos_user_unchanged(self):
+        set_module_args({'accounts': [
+            {'name': 'device', 'role': 'device', 'enable': True, 'session_timeout': 3},
+            {'name': 'readonly', 'role': 'readonly', 'enable': False, 'password': 'secret'}
+        ]})
+        result = self.execute_module(changed=False)
+        self.assertEqual(result['changed'], False)
+        self.assertEqual(self.get_config.call_count, 1)
+        self.assertEqual(self.get_configs.call_args[0][1], ['user -n device'])
+
+    def test_apcos_user_set_accounts(self):
+        set_module_args({'accounts': [
+            {'name': 'device', 'role': 'administrator', 'session_timeout': 10},
+            {'name': 'readonly', 'enable': True}
+        ]})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'user -n device -pe Administrator -st 10',
+            'user -n readonly -e enable'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+
+    def test_apcos_user_add_account(self):
+        set_module_args({'accounts': [
+            {'name': 'monitor', 'role': 'readonly', 'enable': True, 'password': 'secret'}
+        ]})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'user -n monitor -pw secret -pe Read-Only -e enable'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+
+    def test_apcos_user_add_account_without_password(self):
+        set_module_args({'accounts': [{'name': 'monitor', 'role': 'readonly'}]})
+        self.execute_module(failed=True)
+
+    def test_apcos_user_set_password_forced(self):
+        set_module_args({'accounts': [{'name': 'readonly', 'password': 'secret'}], 'forcepwchange': True})
+        result = self.execute_module(changed=True)
+        expected_commands = [
+            'user -n readonly -pw secret'
+        ]
+        self.assertEqual(result['commands'], expected_commands)
+
+    def test_apcos_user_name_with_spaces(self):
+        table = load_fixture('apcos_config_user.cfg') + 'John Doe           Enabled     Device User\n'
+        set_module_args({'accounts': [{'name': 'John Doe', 'role': 'readonly', 'session_timeout': 3}]})
+        with patch('ansible_collections.haught.apcos.plugins.modules.network.apcos.apcos_user.get_config', return_value=table):
+            result = self.execute_module(changed=True)
+        self.assertEqual(self.get_configs.call_args[0][1], ['user -n "John Doe"'])
+        self.assertEqual(result['commands'], ['user -n "John Doe" -pe Read-Only'])
+
+    def test_apcos_user_parse_long_name(self):
+        table = load_fixture('apcos_config_user.cfg') + 'a very long user name Enabled  Device User\n'
+        users = apcos_user.parse_user_table(table)
+        self.assertEqual(users['a very long user name']['status'], users['device']['status'])
+        self.assertEqual(users['readonly']['status'], False)
+
+    def test_apcos_user_plan_masks_secrets(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        plan_path = os.path.join(tmpdir, 'plan.json')
+        args = {'accounts': [{'name': 'monitor', 'role': 'readonly', 'password': 's3cr3t'}], 'plan_path': plan_path}
+        set_module_args(dict(args, _ansible_check_mode=True))
+        self.execute_module(changed=True)
+        with open(plan_path) as f:
+            plan = json.load(f)
+        self.assertNotIn('s3cr3t', json.dumps(plan))
+
+        set_module_args(args)
+        with patch('ansible_collections.haught.apcos.plugins.module_utils.network.apcos.apcos.get_configs',
+                   return_value=[load_fixture('apcos_config_user.cfg')]):
+            result = self.execute_module(changed=True)
+        self.assertEqual(result['commands'], ['user -n monitor -pw s3cr3t -pe Read-Only'])
+        self.assertFalse(os.path.exists(plan_path))
@@ -0,0 +1,46 @@
+#
+# (c) 2016 Red Hat Inc.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+from ansible_collections.community.network.tests.unit.compat import unittest
+from ansible_collections.haught.apcos.plugins.terminal.apcos import TerminalModule
+
+
+def find(regexes, response):
+    return any(regex.search(response) for regex in regexes)
+
+
+class TestApcosTerminal(unittest.TestCase):
+
+    def test_prompt(self):
+        self.assertTrue(find(TerminalModule.terminal_stdout_re, b'E000: Success\r\nHost Name: ups01\r\napc>'))
+        self.assertTrue(find(TerminalModule.terminal_stdout_re, b'E000: Success\r\napc> '))
+        self.assertFalse(find(TerminalModule.terminal_stdout_re, b'Welcome to apc> shell\r\nE000: Success'))
+
+    def test_error_status(self):
+        self.assertTrue(find(TerminalModule.terminal_stderr_re, b'dns -x\r\nE102: Parameter Error\r\napc>'))
+        self.assertTrue(find(TerminalModule.terminal_stderr_re, b'E101: Command Not Found\r\napc>'))
+
+    def test_error_code_in_output(self):
+        output = b'E000: Success\r\n03/26/2021 16:04:38 System: Upload failed, E101 returned by peer. 0x0021\r\napc>'
+        self.assertFalse(find(TerminalModule.terminal_stderr_re, output))
+        self.assertFalse(find(TerminalModule.terminal_stderr_re, b'Serial Number: E1070012\r\napc>'))